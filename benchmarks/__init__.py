@@ -0,0 +1,11 @@
+"""Performance benchmarks for toydata.
+
+Each module is a standalone script, run it from the repository root, e.g.
+
+    python -m benchmarks.bench_concurrent
+
+Running the package itself runs bench_maps, which compares every map
+implementation on the same workloads:
+
+    python -m benchmarks
+"""
@@ -0,0 +1,8 @@
+"""Run the benchmark suite of all map implementations, see bench_maps.
+
+Takes the same options as bench_maps, e.g. `python -m benchmarks --help`.
+"""
+
+from benchmarks.bench_maps import main
+
+main()
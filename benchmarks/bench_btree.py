@@ -0,0 +1,83 @@
+"""BPlusTreeMap against the binary tree maps and SortedTableMap.
+
+For each map: insert n shuffled keys, look each up once, scan ranges of
+--span keys from random starting points, and bulk load the sorted keys.
+Times are in seconds; SortedTableMap's inserts are quadratic, so it is
+skipped above --table-limit keys.
+
+    python -m benchmarks.bench_btree --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+from itertools import islice
+from random import Random
+
+from toydata.BTree import BPlusTreeMap
+from toydata.Maps import SortedTableMap
+from toydata.SearchTree import AVLTreeMap, RedBlackTreeMap
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run(factory, keys, starts, span):
+    """Return (insert, lookup, scan, bulk load) seconds for one map"""
+    m = factory()
+
+    def insert():
+        for k in keys:
+            m[k] = k
+
+    def lookup():
+        for k in keys:
+            m[k]
+
+    def scan():
+        for k in starts:
+            for _ in islice(m.find_range(k, None), span):
+                pass
+
+    def bulk():
+        type(m).from_sorted((k, k) for k in range(len(keys)))
+
+    return timed(insert), timed(lookup), timed(scan), timed(bulk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5])
+    parser.add_argument("--order", type=int, default=64)
+    parser.add_argument("--scans", type=int, default=1000)
+    parser.add_argument("--span", type=int, default=100)
+    parser.add_argument("--table-limit", type=int, default=10**5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    maps = [
+        (f"BPlusTreeMap({args.order})", lambda: BPlusTreeMap(args.order)),
+        ("AVLTreeMap", AVLTreeMap),
+        ("RedBlackTreeMap", RedBlackTreeMap),
+        ("SortedTableMap", SortedTableMap),
+    ]
+    columns = f"{'insert':>8} {'lookup':>8} {'scan':>8} {'bulk':>8}"
+    print(f"{'n':>9} {'map':<18} {columns}")
+    for n in args.sizes:
+        rng = Random(args.seed)
+        keys = list(range(n))
+        rng.shuffle(keys)
+        starts = [rng.randrange(n) for _ in range(args.scans)]
+        for name, factory in maps:
+            if factory is SortedTableMap and n > args.table_limit:
+                print(f"{n:>9} {name:<18} {'skipped':>8}")
+                continue
+            times = run(factory, keys, starts, args.span)
+            print(f"{n:>9} {name:<18} " + " ".join(f"{t:>8.3f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Memoization with the cache maps against functools.lru_cache.
+
+A Zipf-distributed stream of arguments is fed to a memoized function;
+each cache is used the way callers do it by hand (look up, compute on a
+miss, store). Reports throughput and hit ratio per cache.
+
+    python -m benchmarks.bench_cache --calls 200000 --keys 10000 --maxsize 1000
+
+functools.lru_cache is implemented in C, so it sets the upper bound; the
+point of comparison is the overhead of the pure-Python policies and the
+hit ratio each policy achieves on the same stream.
+"""
+
+import argparse
+import bisect
+import functools
+import itertools
+import time
+
+from random import Random
+
+from toydata.CacheMaps import LFUCacheMap, LRUCacheMap, TTLCacheMap
+
+
+def zipf_stream(n, keys, s, rng):
+    """Return n keys in range(keys) drawn with Zipf exponent s"""
+    weights = itertools.accumulate(1 / (i**s) for i in range(1, keys + 1))
+    cumulative = list(weights)
+    total = cumulative[-1]
+    return [bisect.bisect(cumulative, rng.random() * total) for _ in range(n)]
+
+
+def compute(k):
+    """Stand-in for the expensive function being memoized"""
+    return k * k
+
+
+def run_map(cache, stream):
+    """Return (seconds, hit ratio) of memoizing compute with cache"""
+    start = time.perf_counter()
+    for k in stream:
+        try:
+            cache[k]
+        except KeyError:
+            cache[k] = compute(k)
+    elapsed = time.perf_counter() - start
+    info = cache.cache_info()
+    return elapsed, info["hits"] / (info["hits"] + info["misses"])
+
+
+def run_lru_cache(maxsize, stream):
+    memo = functools.lru_cache(maxsize=maxsize)(compute)
+    start = time.perf_counter()
+    for k in stream:
+        memo(k)
+    elapsed = time.perf_counter() - start
+    info = memo.cache_info()
+    return elapsed, info.hits / (info.hits + info.misses)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--maxsize", type=int, default=1000)
+    parser.add_argument("--zipf", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stream = zipf_stream(args.calls, args.keys, args.zipf, Random(args.seed))
+    results = [
+        ("functools.lru_cache", run_lru_cache(args.maxsize, stream)),
+        ("LRUCacheMap", run_map(LRUCacheMap(args.maxsize), stream)),
+        ("LFUCacheMap", run_map(LFUCacheMap(args.maxsize), stream)),
+        # a ttl longer than the run makes it a pure size-bounded cache
+        ("TTLCacheMap", run_map(TTLCacheMap(3600, args.maxsize), stream)),
+    ]
+    print(f"{args.calls} calls, {args.keys} keys, maxsize {args.maxsize}")
+    print(f"{'cache':<20} {'calls/s':>12} {'hit ratio':>10}")
+    for name, (elapsed, ratio) in results:
+        print(f"{name:<20} {args.calls / elapsed:>12.0f} {ratio:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
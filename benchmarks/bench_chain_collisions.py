@@ -0,0 +1,90 @@
+"""Correctness and speed of ChainHashMap under heavy bucket collisions.
+
+Keys are built so that only a handful of distinct hash() values exist,
+which forces long chains in the UnsortedTableMap buckets no matter how far
+the table grows. Every lookup is checked, so a broken bucket fails loudly.
+
+    python -m benchmarks.bench_chain_collisions --keys 5000 --hashes 64
+
+Lookups are drawn uniformly and from a skewed (80/20) distribution; the
+latter is where move-to-front buckets pay off.
+"""
+
+import argparse
+import time
+
+from random import Random
+
+from toydata.Maps import ChainHashMap
+
+
+class Collider:
+    """Key whose hash is shared by every key in the same group"""
+
+    __slots__ = "_n", "_groups"
+
+    def __init__(self, n, groups):
+        self._n = n
+        self._groups = groups
+
+    def __hash__(self):
+        return self._n % self._groups
+
+    def __eq__(self, other):
+        return self._n == other._n
+
+
+def lookup_stream(keys, size, skewed, rng):
+    """Return size keys drawn uniformly or with 80% of hits on 20% of keys"""
+    if not skewed:
+        return [keys[rng.randrange(len(keys))] for _ in range(size)]
+    hot = keys[: max(1, len(keys) // 5)]
+    return [
+        hot[rng.randrange(len(hot))] if rng.random() < 0.8 else rng.choice(keys)
+        for _ in range(size)
+    ]
+
+
+def run(keys, stream, move_to_front):
+    """Return (insert seconds, lookup seconds) and check every lookup"""
+    m = ChainHashMap(move_to_front=move_to_front)
+    start = time.perf_counter()
+    for k in keys:
+        m[k] = k._n
+    inserted = time.perf_counter()
+    for k in stream:
+        if m[k] != k._n:
+            raise AssertionError(f"wrong value for key {k._n}")
+    looked_up = time.perf_counter()
+    if sorted(k._n for k in m) != sorted(k._n for k in keys):
+        raise AssertionError("map lost keys")
+    return inserted - start, looked_up - inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=5000)
+    parser.add_argument("--hashes", type=int, default=64)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = Random(args.seed)
+    keys = [Collider(n, args.hashes) for n in range(args.keys)]
+    rng.shuffle(keys)
+    print(f"{args.keys} keys over {args.hashes} hash values")
+    print(f"{'lookups':>8} {'move_to_front':>14} {'insert':>12} {'lookup':>12}")
+    for skewed in (False, True):
+        stream = lookup_stream(keys, args.lookups, skewed, rng)
+        for move_to_front in (False, True):
+            t_insert, t_lookup = run(keys, stream, move_to_front)
+            print(
+                f"{'skewed' if skewed else 'uniform':>8} {str(move_to_front):>14} "
+                f"{args.keys / t_insert:>7.0f} op/s "
+                f"{args.lookups / t_lookup:>7.0f} op/s"
+            )
+    print("all lookups verified")
+
+
+if __name__ == "__main__":
+    main()
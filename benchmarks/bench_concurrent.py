@@ -0,0 +1,114 @@
+"""Multithreaded scaling of ConcurrentHashMap against a globally locked map.
+
+In the default mixed mode every thread runs the same mix of lookups and
+overwrites over a shared, preloaded key space. In insert mode the map
+starts empty and every operation inserts a new key, so segments keep
+growing while other threads write to them. The baseline wraps each
+ChainHashMap call in one global lock, which is what callers had to do
+before ConcurrentHashMap existed.
+
+    python -m benchmarks.bench_concurrent --threads 1 2 4 8 --ops 100000
+    python -m benchmarks.bench_concurrent --mode insert
+
+Under the GIL both maps are bound to one core and the numbers mostly show
+per-call overhead. On a free-threaded build (e.g. python3.13t) the striped
+map keeps scaling with the thread count while the global lock does not.
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from random import Random
+
+from toydata.Maps import ChainHashMap, ConcurrentHashMap
+
+
+class LockedChainHashMap:
+    """ChainHashMap behind a single global lock"""
+
+    def __init__(self):
+        self._map = ChainHashMap()
+        self._lock = threading.Lock()
+
+    def get(self, k):
+        with self._lock:
+            return self._map.get(k)
+
+    def __setitem__(self, k, v):
+        with self._lock:
+            self._map[k] = v
+
+
+def run(factory, threads, ops, keys, write_ratio, insert=False):
+    """Return throughput (ops/s) of threads workers sharing one map.
+
+    If insert is True the map starts empty and every operation inserts a
+    key no other operation uses; keys and write_ratio are ignored.
+    """
+    m = factory()
+    if not insert:
+        for k in range(keys):
+            m[k] = k
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        if insert:
+            # threads interleave their keys, so all of them hit every segment
+            stream = [(True, seed + threads * i) for i in range(ops)]
+        else:
+            rng = Random(seed)
+            stream = [
+                (rng.random() < write_ratio, rng.randrange(keys)) for _ in range(ops)
+            ]
+        barrier.wait()
+        for write, k in stream:
+            if write:
+                m[k] = k
+            else:
+                m.get(k)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=100_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--segments", type=int, default=16)
+    parser.add_argument("--mode", choices=["mixed", "insert"], default="mixed")
+    args = parser.parse_args(argv)
+    insert = args.mode == "insert"
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    print(f"mode {args.mode}")
+    print(f"{'threads':>7} {'global lock':>14} {'striped':>14} {'speedup':>8}")
+    for n in args.threads:
+        locked = run(
+            LockedChainHashMap, n, args.ops, args.keys, args.write_ratio, insert
+        )
+        striped = run(
+            lambda: ConcurrentHashMap(segments=args.segments),
+            n,
+            args.ops,
+            args.keys,
+            args.write_ratio,
+            insert,
+        )
+        speedup = striped / locked
+        print(f"{n:>7} {locked:>10.0f} op/s {striped:>10.0f} op/s {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Throughput, latency percentiles and peak memory of every map.
+
+For each size n, key distribution and map, the map is loaded with n keys
+and then runs the same pre-generated operation streams:
+
+    insert   the n inserts of the load itself
+    lookup   n lookups of present keys
+    mixed    n operations: 50% lookups, 25% inserts of new keys, 25% deletes
+    range    n / 10 scans of 100 consecutive items (sorted maps only)
+    delete   deletes of every remaining key
+
+Key distributions:
+
+    uniform     random keys, operations pick keys uniformly
+    zipf        random keys, operations pick keys with Zipf exponent --zipf
+    sequential  keys 0..n-1 inserted in order, operations cycle through them
+    adversarial multiples of the MAD prime of the hash maps, inserted in
+                order: every key lands in the same hash bucket, and the
+                trees see sorted inserts
+
+Every operation is timed on its own to give the p50, p99 and p99.9
+latencies; throughput is operations over the summed time. Peak memory is
+traced (tracemalloc) during a separate load of the same keys. A phase
+that runs past --budget seconds is cut short and marked with "*", ending
+that map's run, and a map whose load is cut short is skipped for the
+larger sizes.
+
+Streams are generated from --seed and the hash maps' random MAD
+parameters are seeded too, so runs are reproducible. Everything runs
+offline, from the repository root:
+
+    python -m benchmarks.bench_maps
+    python -m benchmarks.bench_maps --sizes 1000000 --dists uniform --csv out.csv
+
+Sizes up to 10^7 work, but pure-Python maps need minutes per phase there.
+"""
+
+import argparse
+import csv
+import random
+import time
+import tracemalloc
+
+from itertools import islice
+
+from benchmarks.bench_cache import zipf_stream
+from toydata.ArraySearchTree import ArrayAVLTreeMap, ArrayRedBlackTreeMap
+from toydata.BTree import BPlusTreeMap
+from toydata.Maps import (
+    BlockedSortedTableMap,
+    ChainHashMap,
+    CuckooHashMap,
+    ProbeHashMap,
+    SortedTableMap,
+)
+from toydata.SearchTree import AVLTreeMap, RedBlackTreeMap, SplayTreeMap
+from toydata.SkipList import SkipListMap
+
+# name -> (factory, supports find_range)
+MAPS = {
+    "ChainHashMap": (ChainHashMap, False),
+    "ProbeHashMap": (ProbeHashMap, False),
+    "CuckooHashMap": (CuckooHashMap, False),
+    "SortedTableMap": (SortedTableMap, True),
+    "BlockedSortedTableMap": (BlockedSortedTableMap, True),
+    "AVLTreeMap": (AVLTreeMap, True),
+    "SplayTreeMap": (SplayTreeMap, True),
+    "RedBlackTreeMap": (RedBlackTreeMap, True),
+    "ArrayAVLTreeMap": (ArrayAVLTreeMap, True),
+    "ArrayRedBlackTreeMap": (ArrayRedBlackTreeMap, True),
+    "BPlusTreeMap": (BPlusTreeMap, True),
+    "SkipListMap": (SkipListMap, True),
+}
+
+DISTS = ["uniform", "zipf", "sequential", "adversarial"]
+PHASES = ["insert", "lookup", "mixed", "range", "delete"]
+SCAN = 100
+# default MAD prime of HashMapBase, see _hash_function
+PRIME = 10945121
+
+
+class Workload:
+    """Keys and operation streams of one (size, distribution) pair.
+
+    Operations are (name, key) pairs, generated once and replayed against
+    every map.
+    """
+
+    def __init__(self, n, dist, zipf, rng):
+        if dist == "sequential":
+            keys = list(range(n))
+            fresh = iter(range(n, 3 * n))
+        elif dist == "adversarial":
+            keys = [i * PRIME for i in range(n)]
+            fresh = iter(range(n * PRIME, 3 * n * PRIME, PRIME))
+        else:
+            # loaded keys are even, new keys odd
+            keys = [2 * k for k in rng.sample(range(8 * n), n)]
+            fresh = iter([2 * k + 1 for k in rng.sample(range(8 * n), 2 * n)])
+        self.keys = keys
+        picks = self._picks(n, dist, zipf, rng)
+        self.lookup = [("get", keys[i]) for i in picks]
+        self.range = [("scan", keys[i]) for i in picks[: max(1, n // 10)]]
+        # simulate the mixed stream to know which keys are live
+        live = list(keys)
+        self.mixed = []
+        for i in self._picks(n, dist, zipf, rng):
+            r = rng.random()
+            if r < 0.25 or not live:
+                k = next(fresh)
+                live.append(k)
+                self.mixed.append(("set", k))
+                continue
+            j = i % len(live)
+            if r < 0.5:
+                live[j], live[-1] = live[-1], live[j]
+                self.mixed.append(("del", live.pop()))
+            else:
+                self.mixed.append(("get", live[j]))
+        if dist in ("sequential", "adversarial"):
+            live.sort()
+        else:
+            rng.shuffle(live)
+        self.delete = [("del", k) for k in live]
+
+    @staticmethod
+    def _picks(n, dist, zipf, rng):
+        """Return n indices into the loaded keys"""
+        if dist == "sequential":
+            return list(range(n))
+        if dist == "zipf":
+            # hot keys are the first ones loaded, which are in random order
+            return zipf_stream(n, n, zipf, rng)
+        return [rng.randrange(n) for _ in range(n)]
+
+
+def replay(m, ops, budget):
+    """Apply ops to map m, timing each one; return (latencies in ns,
+    True if cut short by the budget)"""
+    actions = {
+        "get": m.__getitem__,
+        "set": lambda k: m.__setitem__(k, k),
+        "del": m.__delitem__,
+        "scan": lambda k: sum(1 for _ in islice(m.find_range(k, None), SCAN)),
+    }
+    clock = time.perf_counter_ns
+    deadline = clock() + int(budget * 1e9)
+    latencies = []
+    for name, k in ops:
+        action = actions[name]
+        start = clock()
+        action(k)
+        end = clock()
+        latencies.append(end - start)
+        if end > deadline:
+            return latencies, len(latencies) < len(ops)
+    return latencies, False
+
+
+def peak_memory(factory, keys, budget):
+    """Return peak bytes traced while loading keys into a new map, or None
+    if the load runs past the budget"""
+    deadline = time.perf_counter() + budget
+    tracemalloc.start()
+    try:
+        m = factory()
+        for k in keys:
+            m[k] = k
+            if time.perf_counter() > deadline:
+                return None
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def percentile(ordered, q):
+    """Return the q-quantile of an ascending list"""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(name, workload, seed, budget, memory):
+    """Yield a result row per phase of one map on one workload"""
+    factory, ranged = MAPS[name]
+    # the hash maps draw their MAD parameters from the random module
+    random.seed(seed)
+    m = factory()
+    streams = {
+        "insert": [("set", k) for k in workload.keys],
+        "lookup": workload.lookup,
+        "mixed": workload.mixed,
+        "range": workload.range if ranged else None,
+        "delete": workload.delete,
+    }
+    for phase in PHASES:
+        if streams[phase] is None:
+            continue
+        latencies, cut = replay(m, streams[phase], budget)
+        row = {"phase": phase, "ops": len(latencies), "cut": cut}
+        if latencies:
+            ordered = sorted(latencies)
+            row["ops_per_s"] = len(ordered) / (sum(ordered) / 1e9 or 1e-9)
+            for label, q in [("p50_us", 0.5), ("p99_us", 0.99), ("p999_us", 0.999)]:
+                row[label] = percentile(ordered, q) / 1e3
+        if phase == "insert" and memory and not cut:
+            random.seed(seed)
+            row["peak_mb"] = peak_memory(factory, workload.keys, budget)
+            if row["peak_mb"] is not None:
+                row["peak_mb"] /= 2**20
+        yield row
+        if cut:
+            # later phases expect the map this stream leaves behind
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4])
+    parser.add_argument("--dists", nargs="+", choices=DISTS, default=DISTS)
+    parser.add_argument("--maps", nargs="+", choices=MAPS, default=list(MAPS))
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--budget", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--csv", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    fields = ["n", "dist", "map", "phase", "ops", "cut", "ops_per_s"]
+    fields += ["p50_us", "p99_us", "p999_us", "peak_mb"]
+    rows = []
+    print(
+        f"{'n':>8} {'dist':<11} {'map':<21} {'phase':<6} {'op/s':>11}"
+        f" {'p50 us':>8} {'p99 us':>8} {'p99.9 us':>9} {'peak MB':>8}"
+    )
+    for dist in args.dists:
+        # maps whose load ran past the budget at a smaller size
+        slow = set()
+        for n in args.sizes:
+            workload = Workload(n, dist, args.zipf, random.Random(args.seed))
+            for name in args.maps:
+                if name in slow:
+                    print(f"{n:>8} {dist:<11} {name:<21} skipped")
+                    continue
+                for row in run(name, workload, args.seed, args.budget, args.memory):
+                    row.update(n=n, dist=dist, map=name)
+                    rows.append(row)
+                    if row["phase"] == "insert" and row["cut"]:
+                        slow.add(name)
+                    print(_format(row))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def _format(row):
+    """Return a table line for a result row"""
+    line = f"{row['n']:>8} {row['dist']:<11} {row['map']:<21} {row['phase']:<6}"
+    if not row["ops"]:
+        return line
+    mark = "*" if row["cut"] else " "
+    line += (
+        f" {row['ops_per_s']:>10.0f}{mark} {row['p50_us']:>8.2f}"
+        f" {row['p99_us']:>8.2f} {row['p999_us']:>9.2f}"
+    )
+    if row.get("peak_mb") is not None:
+        line += f" {row['peak_mb']:>8.2f}"
+    return line
+
+
+if __name__ == "__main__":
+    main()
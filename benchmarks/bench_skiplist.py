@@ -0,0 +1,138 @@
+"""SkipListMap against RedBlackTreeMap, alone and under concurrent readers.
+
+First inserts n shuffled keys, looks each of them up once and runs range
+scans of 100 keys, reporting operations per second for both maps. Then
+runs reader threads doing range scans while one writer keeps inserting
+and deleting, comparing the lock-free readers of a concurrent SkipListMap
+with a RedBlackTreeMap behind one lock, which readers must take as well.
+
+    python -m benchmarks.bench_skiplist --sizes 10000 100000 --threads 1 2 4
+
+Under the GIL the concurrent numbers mostly show locking overhead; on a
+free-threaded build (e.g. python3.13t) the lock-free readers also scale.
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from random import Random
+
+from toydata.SearchTree import RedBlackTreeMap
+from toydata.SkipList import SkipListMap
+
+SCAN = 100
+
+
+class LockedTreeMap:
+    """RedBlackTreeMap behind a single global lock"""
+
+    def __init__(self):
+        self._map = RedBlackTreeMap()
+        self._lock = threading.Lock()
+
+    def __setitem__(self, k, v):
+        with self._lock:
+            self._map[k] = v
+
+    def __delitem__(self, k):
+        with self._lock:
+            del self._map[k]
+
+    def find_range(self, start, stop):
+        with self._lock:
+            return list(self._map.find_range(start, stop))
+
+
+def run(factory, keys):
+    """Return seconds spent on (set, get, range scans) over keys"""
+    t = factory()
+    start = time.perf_counter()
+    for k in keys:
+        t[k] = k
+    inserted = time.perf_counter()
+    for k in keys:
+        t[k]
+    looked_up = time.perf_counter()
+    for k in keys[: len(keys) // SCAN]:
+        for _ in t.find_range(k, k + SCAN):
+            pass
+    scanned = time.perf_counter()
+    return inserted - start, looked_up - inserted, scanned - looked_up
+
+
+def run_concurrent(factory, threads, n, seconds):
+    """Return range scans per second of threads readers sharing one map
+    with a writer"""
+    m = factory()
+    for k in range(0, 2 * n, 2):
+        m[k] = k
+    stop = threading.Event()
+    scans = []
+
+    def reader(seed):
+        rng = Random(seed)
+        count = 0
+        while not stop.is_set():
+            k = rng.randrange(2 * n)
+            for _ in m.find_range(k, k + 2 * SCAN):
+                pass
+            count += 1
+        scans.append(count)
+
+    def writer():
+        rng = Random(-1)
+        while not stop.is_set():
+            k = 2 * rng.randrange(n) + 1
+            m[k] = k
+            del m[k]
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for w in workers:
+        w.start()
+    time.sleep(seconds)
+    stop.set()
+    for w in workers:
+        w.join()
+    return sum(scans) / seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'n':>9} {'map':<16} {'set/s':>10} {'get/s':>10} {'scan/s':>10}")
+    for n in args.sizes:
+        keys = list(range(n))
+        Random(args.seed).shuffle(keys)
+        for name, factory in [
+            ("SkipListMap", SkipListMap),
+            ("RedBlackTreeMap", RedBlackTreeMap),
+        ]:
+            t_set, t_get, t_scan = run(factory, keys)
+            print(
+                f"{n:>9} {name:<16} {n / t_set:>10.0f} {n / t_get:>10.0f}"
+                f" {n // SCAN / t_scan:>10.0f}"
+            )
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    print(f"{'readers':>7} {'locked tree':>16} {'skip list':>16}")
+    n = args.sizes[-1]
+    for threads in args.threads:
+        locked = run_concurrent(LockedTreeMap, threads, n, args.seconds)
+        skip = run_concurrent(
+            lambda: SkipListMap(concurrent=True), threads, n, args.seconds
+        )
+        print(f"{threads:>7} {locked:>11.0f} scan/s {skip:>11.0f} scan/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Loading unsorted keys into SortedTableMap and BlockedSortedTableMap.
+
+SortedTableMap moves on average half of its table per insert, so loading
+grows quadratically; BlockedSortedTableMap only moves one block.
+
+    python -m benchmarks.bench_sorted_load --sizes 10000 100000 1000000
+
+Sizes where SortedTableMap would take longer than --limit seconds (judged
+from the previous size) are skipped for it.
+"""
+
+import argparse
+import time
+
+from random import Random
+
+from toydata.Maps import BlockedSortedTableMap, SortedTableMap
+
+
+def load(factory, keys):
+    """Return (seconds to insert keys, seconds to delete half of them)"""
+    m = factory()
+    start = time.perf_counter()
+    for k in keys:
+        m[k] = k
+    inserted = time.perf_counter()
+    for k in keys[::2]:
+        del m[k]
+    return inserted - start, time.perf_counter() - inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5])
+    parser.add_argument("--load", type=int, default=1000)
+    parser.add_argument("--limit", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'n':>9} {'map':<22} {'insert s':>9} {'delete s':>9}")
+    previous = {}
+    for n in args.sizes:
+        keys = list(range(n))
+        Random(args.seed).shuffle(keys)
+        for name, factory, exponent in (
+            ("SortedTableMap", SortedTableMap, 2),
+            ("BlockedSortedTableMap", lambda: BlockedSortedTableMap(args.load), 1),
+        ):
+            if name in previous:
+                last_n, last_time = previous[name]
+                if last_time * (n / last_n) ** exponent > args.limit:
+                    print(f"{n:>9} {name:<22} {'skipped':>9}")
+                    continue
+            t_insert, t_delete = load(factory, keys)
+            previous[name] = (n, t_insert + t_delete)
+            print(f"{n:>9} {name:<22} {t_insert:>9.3f} {t_delete:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""SplayTreeMap on Zipf-distributed lookups, against the balanced trees.
+
+Builds each map from n keys, then replays one trace of Zipf-distributed
+lookups (hot keys are scattered over the key range) and reports lookups
+per second. SplayTreeMap is run with every --rates value as splay_rate.
+
+    python -m benchmarks.bench_splay --size 100000 --lookups 500000 --zipf 1.2
+"""
+
+import argparse
+import time
+
+from random import Random
+
+from benchmarks.bench_cache import zipf_stream
+from toydata.SearchTree import AVLTreeMap, RedBlackTreeMap, SplayTreeMap
+
+
+def replay(t, trace):
+    """Return lookups per second of trace against map t"""
+    start = time.perf_counter()
+    for k in trace:
+        t[k]
+    return len(trace) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=500_000)
+    parser.add_argument("--zipf", type=float, default=1.2)
+    parser.add_argument("--rates", type=float, nargs="+", default=[1.0, 0.1, 0.01])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = Random(args.seed)
+    keys = list(range(args.size))
+    rng.shuffle(keys)
+    # the r-th most popular key is keys[r]
+    trace = [keys[r] for r in zipf_stream(args.lookups, args.size, args.zipf, rng)]
+    pairs = [(k, k) for k in range(args.size)]
+
+    maps = [("AVLTreeMap", AVLTreeMap), ("RedBlackTreeMap", RedBlackTreeMap)]
+    for rate in args.rates:
+        maps.append(
+            (f"SplayTreeMap({rate:g})", lambda rate=rate: SplayTreeMap(splay_rate=rate))
+        )
+    print(f"n={args.size} lookups={args.lookups} zipf={args.zipf}")
+    print(f"{'map':<22} {'lookups/s':>10}")
+    for name, factory in maps:
+        t = factory()
+        for k, v in pairs:
+            t[k] = v
+        print(f"{name:<22} {replay(t, trace):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Lookup, insert and iteration speed of the search tree maps.
+
+Inserts n shuffled keys, looks each of them up once, then iterates the
+whole map, reporting operations per second for every tree map. With
+--memory, reports instead the bytes allocated per entry by a map built
+from n keys (keys and values are shared small ints, so this is the cost
+of the tree itself).
+
+    python -m benchmarks.bench_tree --sizes 10000 100000 1000000
+    python -m benchmarks.bench_tree --memory --sizes 1000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from random import Random
+
+from toydata.ArraySearchTree import ArrayAVLTreeMap, ArrayRedBlackTreeMap
+from toydata.SearchTree import AVLTreeMap, RedBlackTreeMap, SplayTreeMap
+
+TREES = {
+    "AVLTreeMap": AVLTreeMap,
+    "RedBlackTreeMap": RedBlackTreeMap,
+    "SplayTreeMap": SplayTreeMap,
+    "ArrayAVLTreeMap": ArrayAVLTreeMap,
+    "ArrayRedBlackTreeMap": ArrayRedBlackTreeMap,
+}
+
+
+def run(factory, keys):
+    """Return seconds spent on (set, get, iterate) over keys"""
+    t = factory()
+    start = time.perf_counter()
+    for k in keys:
+        t[k] = k
+    inserted = time.perf_counter()
+    for k in keys:
+        t[k]
+    looked_up = time.perf_counter()
+    for _ in t:
+        pass
+    iterated = time.perf_counter()
+    return inserted - start, looked_up - inserted, iterated - looked_up
+
+
+def footprint(factory, keys):
+    """Return bytes allocated per entry by a map holding keys"""
+    tracemalloc.start()
+    t = factory()
+    for k in keys:
+        t[k] = 0
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5])
+    parser.add_argument("--trees", nargs="+", choices=TREES, default=list(TREES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        print(f"{'n':>9} {'tree':<21} {'bytes/entry':>11}")
+    else:
+        header = f"{'set/s':>10} {'get/s':>10} {'iter/s':>11}"
+        print(f"{'n':>9} {'tree':<21} {header}")
+    for n in args.sizes:
+        keys = list(range(n))
+        Random(args.seed).shuffle(keys)
+        for name in args.trees:
+            if args.memory:
+                print(f"{n:>9} {name:<21} {footprint(TREES[name], keys):>11.1f}")
+                continue
+            t_set, t_get, t_iter = run(TREES[name], keys)
+            print(
+                f"{n:>9} {name:<21} {n / t_set:>10.0f} {n / t_get:>10.0f}"
+                f" {n / t_iter:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import random
+import unittest
+
+try:
+    import numpy as np
+
+    from toydata.ArrayMaps import ArraySortedTableMap
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class testArraySortedTableMap(unittest.TestCase):
+    def test_insert(self):
+        m = ArraySortedTableMap(buffer=8)
+        rng = random.Random(3)
+        keys = [rng.uniform(0, 100) for _ in range(200)]
+        for k in keys:
+            m[k] = str(k)
+        self.assertEqual(len(m), 200)
+        self.assertEqual(m[keys[5]], str(keys[5]))
+        self.assertEqual(list(m), sorted(keys))
+        self.assertEqual(list(reversed(m)), sorted(keys, reverse=True))
+        with self.assertRaises(KeyError):
+            m[101.0]
+        with self.assertRaises(ValueError):
+            m[float("nan")] = 1
+
+    def test_change_delete(self):
+        m = ArraySortedTableMap(buffer=4)
+        for k in range(10):
+            m[float(k)] = k
+        m[3.0] = "x"
+        m[10.0] = 10
+        self.assertEqual(m[3.0], "x")
+        del m[10.0]
+        del m[4.0]
+        with self.assertRaises(KeyError):
+            del m[4.0]
+        self.assertEqual(list(m), [0.0, 1.0, 2.0, 3.0, 5.0, 6.0, 7.0, 8.0, 9.0])
+
+    def test_find(self):
+        m = ArraySortedTableMap()
+        self.assertIsNone(m.find_min())
+        for k in (1.0, 3.0, 5.0):
+            m[k] = k * 10
+        self.assertEqual(m.find_min(), (1.0, 10.0))
+        self.assertEqual(m.find_max(), (5.0, 50.0))
+        self.assertEqual(m.find_ge(3.0), (3.0, 30.0))
+        self.assertEqual(m.find_gt(3.0), (5.0, 50.0))
+        self.assertEqual(m.find_lt(3.0), (1.0, 10.0))
+        self.assertIsNone(m.find_lt(1.0))
+        self.assertIsNone(m.find_le(0.5))
+        self.assertEqual(m.find_le(3.0), (3.0, 30.0))
+        self.assertEqual(m.find_le(4.0), (3.0, 30.0))
+        self.assertEqual(
+            list(m.find_range_reversed(None, 5.0)), [(3.0, 30.0), (1.0, 10.0)]
+        )
+        self.assertEqual(list(m.find_range(2, None)), [(3.0, 30.0), (5.0, 50.0)])
+        self.assertEqual(m.rank(4.0), 2)
+        self.assertEqual(m.select(1), (3.0, 30.0))
+        self.assertEqual(m.count_range(1.0, 5.0), 2)
+
+    def test_range_arrays(self):
+        m = ArraySortedTableMap(value_dtype=np.float64)
+        m.update_many(np.arange(100.0), np.arange(100.0) * 2)
+        keys, values = m.range_arrays(10, 20)
+        self.assertEqual(keys.tolist(), list(range(10, 20)))
+        self.assertTrue(np.shares_memory(keys, m._keys))
+        self.assertTrue(np.shares_memory(values, m._values))
+        m[15.0] = -1.0
+        self.assertEqual(values[5], -1.0)
+        self.assertEqual(len(m.range_arrays(20, 10)[0]), 0)
+
+    def test_numeric_values(self):
+        for dtype in (np.float64, np.int64):
+            m = ArraySortedTableMap(value_dtype=dtype, buffer=4)
+            m[1.0] = 1
+            self.assertEqual(list(m), [1.0])
+            for k in range(2, 12):
+                m[float(k)] = k
+            self.assertEqual(list(m), [float(k) for k in range(1, 12)])
+            self.assertEqual(m.find_max(), (11.0, 11))
+            self.assertEqual(m._values.dtype, dtype)
+            with self.assertRaises(ValueError):
+                m.get_many([1.0, 50.0])
+            result = m.get_many([1.0, 50.0, 3.0], default=-1)
+            self.assertEqual(result.dtype, dtype)
+            self.assertEqual(result.tolist(), [1, -1, 3])
+            self.assertEqual(m.select(0), (1.0, 1))
+            self.assertEqual(m.select(-1), (11.0, 11))
+            with self.assertRaises(IndexError):
+                m.select(11)
+
+    def test_batches(self):
+        m = ArraySortedTableMap(buffer=16)
+        for k in range(0, 100, 2):
+            m[float(k)] = k
+        m.update_many([1.0, 3.0, 4.0, 1.0], ["a", "b", "c", "d"])
+        self.assertEqual(m[1.0], "d")
+        self.assertEqual(m[4.0], "c")
+        self.assertEqual(len(m), 52)
+        result = m.get_many([0.0, 1.0, 5.0, 200.0], default="-")
+        self.assertEqual(result.tolist(), [0, "d", "-", "-"])
+        self.assertEqual(ArraySortedTableMap().get_many([1.0]).tolist(), [None])
+        with self.assertRaises(ValueError):
+            m.update_many([1.0], [])
+
+    def test_random(self):
+        rng = random.Random(5)
+        m = ArraySortedTableMap(buffer=32)
+        d = {}
+        for _ in range(3000):
+            k = float(rng.randrange(500))
+            if k in d and rng.random() < 0.4:
+                del m[k]
+                del d[k]
+            else:
+                m[k] = d[k] = rng.random()
+            if rng.random() < 0.01:
+                self.assertEqual(list(m), sorted(d))
+        self.assertEqual(list(m.find_range(None, None)), sorted(d.items()))
@@ -0,0 +1,108 @@
+import random
+import unittest
+
+from toydata.ArraySearchTree import ArrayAVLTreeMap, ArrayRedBlackTreeMap
+
+
+def check_tree(t):
+    """Return height of t, checking links, sizes and balance data"""
+    left, right, parent, count = t._left, t._right, t._parent, t._count
+
+    def walk(i):
+        # returns (height, black height) of the subtree at i
+        if i == 0:
+            return 0, 1
+        for child in (left[i], right[i]):
+            if child and parent[child] != i:
+                raise AssertionError("broken parent link")
+        hl, bl = walk(left[i])
+        hr, br = walk(right[i])
+        if count[i] != 1 + count[left[i]] + count[right[i]]:
+            raise AssertionError("wrong subtree size")
+        if isinstance(t, ArrayAVLTreeMap):
+            if abs(hl - hr) > 1 or t._height[i] != 1 + max(hl, hr):
+                raise AssertionError("bad AVL height")
+            return 1 + max(hl, hr), 0
+        if bl != br:
+            raise AssertionError("unequal black heights")
+        if t._red[i] and t._red[parent[i]]:
+            raise AssertionError("red node with red parent")
+        return 1 + max(hl, hr), bl + (not t._red[i])
+
+    if left[0] or right[0] or parent[0] or count[0] or parent[t._root]:
+        raise AssertionError("nil sentinel was modified")
+    return walk(t._root)[0]
+
+
+class testArrayTreeMaps(unittest.TestCase):
+    def test_insert(self):
+        for cls in (ArrayAVLTreeMap, ArrayRedBlackTreeMap):
+            t = cls()
+            t[1] = "a"
+            t[2] = "b"
+            t[3] = "c"
+            self.assertEqual(t[1], "a")
+            self.assertEqual(t[3], "c")
+            t[3] = "cc"
+            self.assertEqual(t[3], "cc")
+            self.assertEqual(check_tree(t), 2)
+            with self.assertRaises(KeyError):
+                t[4]
+
+    def test_delete(self):
+        for cls in (ArrayAVLTreeMap, ArrayRedBlackTreeMap):
+            t = cls()
+            for k in range(10):
+                t[k] = k
+            del t[3]
+            with self.assertRaises(KeyError):
+                del t[3]
+            self.assertEqual(list(t), [0, 1, 2, 4, 5, 6, 7, 8, 9])
+            # the freed slot is reused
+            t[30] = 30
+            self.assertEqual(len(t._keys), 11)
+            check_tree(t)
+
+    def test_random(self):
+        for cls in (ArrayAVLTreeMap, ArrayRedBlackTreeMap):
+            rng = random.Random(3)
+            t = cls()
+            d = {}
+            for _ in range(3000):
+                k = rng.randrange(400)
+                if k in d and rng.random() < 0.5:
+                    del t[k]
+                    del d[k]
+                else:
+                    t[k] = d[k] = rng.random()
+            self.assertLessEqual(check_tree(t), 2 * len(d).bit_length())
+            self.assertEqual(list(t), sorted(d))
+            self.assertEqual(list(t.find_range(None, None)), sorted(d.items()))
+            ordered = sorted(d)
+            self.assertEqual(t.select(5)[0], ordered[5])
+            self.assertEqual(t.rank(200), sum(1 for k in d if k < 200))
+            self.assertEqual(t.count_range(100, 300), t.rank(300) - t.rank(100))
+
+    def test_queries(self):
+        for cls in (ArrayAVLTreeMap, ArrayRedBlackTreeMap):
+            t = cls.from_unsorted([(k, str(k)) for k in (50, 10, 30, 20, 40, 10)])
+            check_tree(t)
+            self.assertEqual(t.find_min(), (10, "10"))
+            self.assertEqual(t.find_ge(25), (30, "30"))
+            self.assertIsNone(t.find_ge(51))
+            self.assertEqual(list(t.find_range(20, 40)), [(20, "20"), (30, "30")])
+            self.assertIsNone(cls().find_min())
+            self.assertIsNone(cls().find_max())
+            self.assertEqual(t.find_max(), (50, "50"))
+            self.assertEqual(t.find_gt(30), (40, "40"))
+            self.assertEqual(t.find_lt(30), (20, "20"))
+            self.assertEqual(t.find_le(35), (30, "30"))
+            self.assertIsNone(t.find_lt(10))
+            self.assertEqual(list(reversed(t)), [50, 40, 30, 20, 10])
+            self.assertEqual(
+                list(t.find_range_reversed(15, 40)), [(30, "30"), (20, "20")]
+            )
+            with self.assertRaises(ValueError):
+                cls.from_sorted([(2, 2), (1, 1)])
+            for n in range(40):
+                check_tree(cls.from_sorted((k, k) for k in range(n)))
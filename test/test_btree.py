@@ -0,0 +1,115 @@
+import random
+import unittest
+
+from toydata.BTree import BPlusTreeMap
+
+
+def check_tree(t):
+    """Check node fill, key bounds and leaf links of a BPlusTreeMap"""
+    leaves = []
+
+    def walk(node, depth, low, high):
+        is_root = node is t._root
+        if depth == t._height:
+            if not is_root and len(node._keys) < t._min:
+                raise AssertionError("underfull leaf")
+            if any(not (low is None or low <= k) for k in node._keys):
+                raise AssertionError("key below its separator")
+            if any(not (high is None or k < high) for k in node._keys):
+                raise AssertionError("key above its separator")
+            leaves.append(node)
+            return
+        if len(node._children) != len(node._keys) + 1:
+            raise AssertionError("keys and children do not match")
+        if len(node._children) > t._order or len(node._children) < (
+            2 if is_root else t._min
+        ):
+            raise AssertionError("badly filled internal node")
+        bounds = [low] + node._keys + [high]
+        for i, child in enumerate(node._children):
+            walk(child, depth + 1, bounds[i], bounds[i + 1])
+
+    walk(t._root, 0, None, None)
+    if leaves[0] is not t._head or leaves[-1] is not t._tail:
+        raise AssertionError("wrong head or tail leaf")
+    for a, b in zip(leaves, leaves[1:]):
+        if a._next is not b or b._prev is not a:
+            raise AssertionError("broken leaf links")
+
+
+class testBPlusTreeMap(unittest.TestCase):
+    def test_insert(self):
+        t = BPlusTreeMap(order=4)
+        for k in range(100):
+            t[k] = str(k)
+        check_tree(t)
+        self.assertEqual(len(t), 100)
+        self.assertEqual(t[42], "42")
+        t[42] = "x"
+        self.assertEqual(t[42], "x")
+        with self.assertRaises(KeyError):
+            t[100]
+        self.assertEqual(list(t), list(range(100)))
+        self.assertEqual(list(reversed(t)), list(range(99, -1, -1)))
+
+    def test_delete(self):
+        t = BPlusTreeMap(order=3)
+        for k in range(50):
+            t[k] = k
+        for k in range(0, 50, 2):
+            del t[k]
+        check_tree(t)
+        with self.assertRaises(KeyError):
+            del t[0]
+        for k in range(1, 50, 2):
+            del t[k]
+        self.assertEqual(len(t), 0)
+        self.assertEqual(list(t), [])
+        self.assertIsNone(t.find_min())
+
+    def test_random(self):
+        for order in (3, 4, 7, 32):
+            rng = random.Random(order)
+            t = BPlusTreeMap(order)
+            d = {}
+            for _ in range(3000):
+                k = rng.randrange(500)
+                if k in d and rng.random() < 0.5:
+                    del t[k]
+                    del d[k]
+                else:
+                    t[k] = d[k] = rng.random()
+            check_tree(t)
+            self.assertEqual(list(t.find_range(None, None)), sorted(d.items()))
+
+    def test_find(self):
+        t = BPlusTreeMap.from_sorted(((k, str(k)) for k in range(0, 100, 2)), order=4)
+        check_tree(t)
+        self.assertEqual(t.first(), (0, "0"))
+        self.assertEqual(t.last(), (98, "98"))
+        self.assertEqual(t.find_max(), (98, "98"))
+        self.assertEqual(t.find_ge(51), (52, "52"))
+        self.assertEqual(t.find_ge(52), (52, "52"))
+        self.assertIsNone(t.find_ge(99))
+        self.assertEqual(t.find_gt(52), (54, "54"))
+        self.assertEqual(t.find_lt(52), (50, "50"))
+        self.assertIsNone(t.find_lt(0))
+        self.assertEqual(t.find_le(53), (52, "52"))
+        self.assertEqual(
+            list(t.find_range(9, 15)), [(10, "10"), (12, "12"), (14, "14")]
+        )
+        self.assertEqual(list(t.find_range(15, 9)), [])
+
+    def test_bulk(self):
+        for n in (0, 1, 4, 5, 17, 300):
+            t = BPlusTreeMap.from_sorted(((k, k) for k in range(n)), order=4)
+            check_tree(t)
+            self.assertEqual(list(t), list(range(n)))
+            t[n] = n
+            check_tree(t)
+        t = BPlusTreeMap.from_unsorted([(3, "c"), (1, "a"), (3, "z")])
+        self.assertEqual(list(t.find_range(None, None)), [(1, "a"), (3, "z")])
+        with self.assertRaises(ValueError):
+            BPlusTreeMap.from_sorted([(2, 2), (1, 1)])
+        with self.assertRaises(ValueError):
+            BPlusTreeMap(order=2)
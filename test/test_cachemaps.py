@@ -0,0 +1,132 @@
+import unittest
+
+from toydata.CacheMaps import LFUCacheMap, LRUCacheMap, TTLCacheMap
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class testLRUCacheMap(unittest.TestCase):
+    def test_evict(self):
+        c = LRUCacheMap(maxsize=2)
+        c["a"] = 1
+        c["b"] = 2
+        self.assertEqual(c["a"], 1)
+        c["c"] = 3
+        self.assertNotIn("b", c)
+        self.assertEqual(list(c), ["c", "a"])
+        c["a"] = 10
+        c["d"] = 4
+        self.assertEqual(list(c), ["d", "a"])
+        self.assertEqual(c["a"], 10)
+
+    def test_counters(self):
+        c = LRUCacheMap(maxsize=2)
+        c["a"] = 1
+        c["a"]
+        self.assertIsNone(c.get("b"))
+        self.assertIn("a", c)
+        self.assertEqual(
+            c.cache_info(), {"hits": 1, "misses": 1, "maxsize": 2, "currsize": 1}
+        )
+        c.cache_clear()
+        self.assertEqual(len(c), 0)
+        self.assertEqual(c.cache_info()["hits"], 0)
+
+    def test_delete(self):
+        c = LRUCacheMap(maxsize=3)
+        for k in "abc":
+            c[k] = k
+        del c["b"]
+        with self.assertRaises(KeyError):
+            del c["b"]
+        c["d"] = "d"
+        c["e"] = "e"
+        self.assertEqual(list(c), ["e", "d", "c"])
+
+    def test_maxsize(self):
+        with self.assertRaises(ValueError):
+            LRUCacheMap(maxsize=0)
+
+
+class testLFUCacheMap(unittest.TestCase):
+    def test_evict(self):
+        c = LFUCacheMap(maxsize=2)
+        c["a"] = 1
+        c["b"] = 2
+        c["a"]
+        c["c"] = 3
+        self.assertNotIn("b", c)
+        self.assertEqual(c.use_count("a"), 2)
+        # c is now the least frequently used
+        c["d"] = 4
+        self.assertNotIn("c", c)
+        self.assertEqual(list(c), ["d", "a"])
+
+    def test_ties(self):
+        c = LFUCacheMap(maxsize=3)
+        for k in "abc":
+            c[k] = k
+        c["a"]
+        c["b"]
+        c["c"]
+        # all used twice, a is the least recent
+        c["d"] = "d"
+        self.assertEqual(sorted(c), ["b", "c", "d"])
+
+    def test_delete(self):
+        c = LFUCacheMap(maxsize=2)
+        c["a"] = 1
+        c["a"]
+        c["b"] = 2
+        del c["b"]
+        c["c"] = 3
+        c["d"] = 4
+        self.assertEqual(sorted(c), ["a", "d"])
+        self.assertEqual(c.cache_info()["hits"], 1)
+
+
+class testTTLCacheMap(unittest.TestCase):
+    def test_expire(self):
+        timer = FakeTimer()
+        c = TTLCacheMap(ttl=10, timer=timer)
+        c["a"] = 1
+        timer.now = 5
+        c["b"] = 2
+        self.assertEqual(c["a"], 1)
+        timer.now = 10
+        with self.assertRaises(KeyError):
+            c["a"]
+        self.assertEqual(list(c), ["b"])
+        c["b"] = 3
+        timer.now = 16
+        self.assertEqual(c["b"], 3)
+        self.assertEqual(len(c), 1)
+        timer.now = 25
+        self.assertEqual(len(c), 0)
+        self.assertEqual(c.cache_info()["misses"], 1)
+
+    def test_maxsize(self):
+        timer = FakeTimer()
+        c = TTLCacheMap(ttl=10, maxsize=2, timer=timer)
+        c["a"] = 1
+        timer.now = 1
+        c["b"] = 2
+        timer.now = 2
+        c["a"] = 1
+        c["c"] = 3
+        self.assertEqual(sorted(c), ["a", "c"])
+
+    def test_stale_records(self):
+        timer = FakeTimer()
+        c = TTLCacheMap(ttl=10, timer=timer)
+        for i in range(1000):
+            timer.now = i / 1000
+            c["a"] = i
+        self.assertLess(len(c._expiry), 20)
+        self.assertEqual(c["a"], 999)
@@ -1,6 +1,18 @@
+import os
+import random
+import tempfile
+import threading
 import unittest
 
-from toydata.Maps import ChainHashMap, ProbeHashMap, SortedTableMap
+from toydata.Maps import (
+    BlockedSortedTableMap,
+    ChainHashMap,
+    ConcurrentHashMap,
+    CuckooHashMap,
+    ProbeHashMap,
+    SortedTableMap,
+    UnsortedTableMap,
+)
 
 
 class testChainHashMap(unittest.TestCase):
@@ -15,7 +27,10 @@ class testChainHashMap(unittest.TestCase):
         t = ChainHashMap()
         t["a"] = 1
         del t["a"]
-        self.assertIsNone(t["a"])
+        with self.assertRaises(KeyError):
+            t["a"]
+        with self.assertRaises(KeyError):
+            del t["a"]
 
     def test_change(self):
         t = ChainHashMap()
@@ -23,6 +38,60 @@ class testChainHashMap(unittest.TestCase):
         t["a"] = 2
         self.assertEqual(t["a"], 2)
 
+    def test_collisions(self):
+        # all keys share hash() 0, so they always land in the same bucket
+        keys = [(2**61 - 1) * i for i in range(50)]
+        for move_to_front in (False, True):
+            t = ChainHashMap(move_to_front=move_to_front)
+            for i, k in enumerate(keys):
+                t[k] = i
+            self.assertEqual(len(t), 50)
+            self.assertEqual(max(len(b) for b in t._table if b is not None), 50)
+            for i, k in enumerate(keys):
+                self.assertEqual(t[k], i)
+            for k in keys[::2]:
+                del t[k]
+            self.assertEqual(len(t), 25)
+            self.assertEqual(sorted(t), sorted(keys[1::2]))
+            with self.assertRaises(KeyError):
+                t[keys[0]]
+
+    def test_resize(self):
+        t = ChainHashMap()
+        for i in range(1000):
+            t[i] = i
+        self.assertEqual(len(t), 1000)
+        self.assertEqual(sorted(t), list(range(1000)))
+        self.assertTrue(all(t[i] == i for i in range(1000)))
+
+
+class testUnsortedTableMap(unittest.TestCase):
+    def test_map(self):
+        m = UnsortedTableMap()
+        with self.assertRaises(KeyError):
+            m["a"]
+        m["a"] = 1
+        m["b"] = 2
+        m["c"] = 3
+        self.assertEqual(m["c"], 3)
+        m["b"] = 20
+        self.assertEqual(list(m), ["a", "b", "c"])
+        self.assertEqual(dict(m.items()), {"a": 1, "b": 20, "c": 3})
+        del m["a"]
+        with self.assertRaises(KeyError):
+            del m["a"]
+        self.assertEqual(list(m), ["b", "c"])
+        self.assertEqual(len(m), 2)
+
+    def test_move_to_front(self):
+        m = UnsortedTableMap(move_to_front=True)
+        for k in "abc":
+            m[k] = k.upper()
+        self.assertEqual(m["c"], "C")
+        self.assertEqual(list(m), ["c", "a", "b"])
+        self.assertEqual(m["b"], "B")
+        self.assertEqual(list(m), ["b", "c", "a"])
+
 
 class testProbeHashMap(unittest.TestCase):
     def test_add(self):
@@ -45,6 +114,314 @@ class testProbeHashMap(unittest.TestCase):
         t["a"] = 2
         self.assertEqual(t["a"], 2)
 
+    def test_resize_after_delete(self):
+        t = ProbeHashMap()
+        for i in range(100):
+            t[i] = i
+            if i % 2:
+                del t[i - 1]
+        self.assertEqual(sorted(t), list(range(1, 100, 2)))
+        self.assertEqual(len(t), 50)
+
+    def test_churn(self):
+        # new keys replacing deleted ones must not use up every empty slot
+        t = ProbeHashMap()
+        for i in range(8):
+            t[i] = i
+        for i in range(8, 2000):
+            t[i] = i
+            del t[i - 8]
+        self.assertEqual(sorted(t), list(range(1992, 2000)))
+        self.assertLessEqual(t._tombstones() + len(t), 3 * len(t._table) // 4 + 1)
+
+    def test_churn_at_half_load(self):
+        t = ProbeHashMap()
+        for i in range(1000):
+            t[i] = i
+        # fill up to half load, where one more key would grow the table
+        n = 1000
+        while len(t) < len(t._table) // 2:
+            t[n] = n
+            n += 1
+        capacity = len(t._table)
+        rehashes = []
+        resize = t._resize
+        t._resize = lambda c: (rehashes.append(c), resize(c))
+        for i in range(n, n + 4 * capacity):
+            del t[i - n]
+            t[i] = i
+        self.assertEqual(len(t._table), capacity)
+        # each rehash is paid for by a quarter of the table in deletions
+        self.assertLessEqual(len(rehashes), 16)
+        self.assertEqual(sorted(t), list(range(4 * capacity, n + 4 * capacity)))
+
+
+class testCuckooHashMap(unittest.TestCase):
+    def test_add(self):
+        t = CuckooHashMap()
+        with self.assertRaises(KeyError):
+            t["a"]
+        t["a"] = 1
+        self.assertEqual(t["a"], 1)
+
+    def test_delete(self):
+        t = CuckooHashMap()
+        t["a"] = 1
+        del t["a"]
+        with self.assertRaises(KeyError):
+            t["a"]
+        with self.assertRaises(KeyError):
+            del t["a"]
+
+    def test_change(self):
+        t = CuckooHashMap()
+        t["a"] = 1
+        t["a"] = 2
+        self.assertEqual(t["a"], 2)
+        self.assertEqual(len(t), 1)
+
+    def test_many(self):
+        t = CuckooHashMap()
+        for i in range(2000):
+            t[i] = str(i)
+        self.assertEqual(len(t), 2000)
+        self.assertEqual(sorted(t), list(range(2000)))
+        for i in range(0, 2000, 3):
+            del t[i]
+        for i in range(2000):
+            self.assertEqual(t.get(i), None if i % 3 == 0 else str(i))
+        stats = t.displacement_stats()
+        self.assertEqual(stats["inserts"], 2000)
+        self.assertEqual(sum(stats["histogram"].values()), 2000)
+        self.assertGreater(stats["rehashes"], 0)
+
+    def test_same_hash(self):
+        # keys sharing one hash() can not be separated by any MAD function
+        t = CuckooHashMap()
+        keys = [(2**61 - 1) * i for i in range(5)]
+        for k in keys:
+            t[k] = k
+        self.assertEqual(len(t), 5)
+        self.assertTrue(all(t[k] == k for k in keys))
+        del t[keys[-1]]
+        self.assertNotIn(keys[-1], t)
+        self.assertEqual(set(t), set(keys[:-1]))
+
+    def test_congruent_keys(self):
+        # hash() values equal modulo the default prime share every slot
+        t = CuckooHashMap()
+        keys = [i * 10945121 for i in range(60)]
+        for k in keys:
+            t[k] = k
+        self.assertLessEqual(len(t._table), 4 * len(keys))
+        self.assertLessEqual(len(t._stash), CuckooHashMap._MAX_STASH)
+        self.assertTrue(all(t[k] == k for k in keys))
+        for k in keys[::2]:
+            del t[k]
+        self.assertEqual(set(t), set(keys[1::2]))
+        # equal hash() values keep to the stash, the tables do not grow
+        t = CuckooHashMap()
+        keys = [(2**61 - 1) * i for i in range(40)]
+        for k in keys:
+            t[k] = k
+        self.assertLessEqual(len(t._table), 4 * len(keys))
+        self.assertTrue(all(t[k] == k for k in keys))
+
+
+class testConcurrentHashMap(unittest.TestCase):
+    def test_add(self):
+        t = ConcurrentHashMap()
+        with self.assertRaises(KeyError):
+            t["a"]
+        t["a"] = 1
+        self.assertEqual(t["a"], 1)
+        self.assertEqual(len(t), 1)
+
+    def test_delete(self):
+        t = ConcurrentHashMap()
+        t["a"] = 1
+        del t["a"]
+        with self.assertRaises(KeyError):
+            t["a"]
+        with self.assertRaises(KeyError):
+            del t["a"]
+        self.assertEqual(len(t), 0)
+
+    def test_change(self):
+        t = ConcurrentHashMap()
+        t["a"] = 1
+        t["a"] = 2
+        self.assertEqual(t["a"], 2)
+        self.assertEqual(len(t), 1)
+
+    def test_resize(self):
+        t = ConcurrentHashMap(segments=2, cap=1)
+        for i in range(1000):
+            t[i] = i * i
+        self.assertEqual(len(t), 1000)
+        self.assertEqual(sorted(t), list(range(1000)))
+        for i in range(0, 1000, 2):
+            del t[i]
+        self.assertEqual(len(t), 500)
+        for i in range(1000):
+            self.assertEqual(t.get(i), None if i % 2 == 0 else i * i)
+
+    def test_threads(self):
+        t = ConcurrentHashMap(segments=4)
+        # failures inside a thread never reach unittest, so collect them
+        errors = []
+
+        def worker(base):
+            try:
+                for i in range(base, base + 2000):
+                    t[i] = i
+                    if t[i] != i:
+                        errors.append((i, t[i]))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n * 2000,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(t), 16000)
+        self.assertEqual(dict(t.items()), {i: i for i in range(16000)})
+
+
+class testHashMapStats(unittest.TestCase):
+    def test_disabled(self):
+        t = ProbeHashMap()
+        for i in range(10):
+            t[i] = i
+        stats = t.stats()
+        self.assertEqual(stats["size"], 10)
+        self.assertEqual(stats["lookups"], 0)
+        self.assertEqual(stats["resizes"], 0)
+
+    def test_probe(self):
+        t = ProbeHashMap()
+        t.enable_stats()
+        for i in range(100):
+            t[i] = i
+        for i in range(100):
+            t[i]
+        del t[0]
+        stats = t.stats()
+        self.assertEqual(stats["lookups"], 100)
+        self.assertEqual(sum(stats["probe_histogram"].values()), 100)
+        self.assertGreaterEqual(stats["mean_probes"], 1)
+        self.assertGreater(stats["resizes"], 0)
+        self.assertGreater(stats["resize_time"], 0)
+        self.assertEqual(stats["tombstone_ratio"], 1 / stats["capacity"])
+        # 99 items and one tombstone in the probe clusters
+        clusters = stats["chain_histogram"].items()
+        self.assertEqual(sum(length * count for length, count in clusters), 100)
+        t.disable_stats()
+        t[1]
+        self.assertEqual(t.stats()["lookups"], 0)
+
+    def test_probe_rehash_in_place(self):
+        # tombstone purges rebuild the table like a resize does
+        t = ProbeHashMap()
+        for i in range(8):
+            t[i] = i
+        t.enable_stats()
+        capacity = len(t._table)
+        for i in range(8, 208):
+            t[i] = i
+            del t[i - 8]
+        self.assertEqual(len(t._table), capacity)
+        stats = t.stats()
+        self.assertGreater(stats["resizes"], 0)
+        self.assertGreater(stats["resize_time"], 0)
+
+    def test_chain(self):
+        # all keys share hash() 0, so they form a single chain
+        keys = [(2**61 - 1) * i for i in range(10)]
+        t = ChainHashMap()
+        t.enable_stats()
+        for k in keys:
+            t[k] = k
+        for k in keys:
+            t[k]
+        with self.assertRaises(KeyError):
+            t[(2**61 - 1) * 10]
+        stats = t.stats()
+        self.assertEqual(stats["chain_histogram"][10], 1)
+        histogram = {n: 1 for n in range(1, 10)}
+        histogram[10] = 2
+        self.assertEqual(stats["probe_histogram"], histogram)
+        self.assertEqual(stats["max_probes"], 10)
+
+    def test_other_maps(self):
+        for t in (CuckooHashMap(), ConcurrentHashMap(segments=2)):
+            t.enable_stats()
+            for i in range(100):
+                t[i] = i
+            for i in range(100):
+                t[i]
+            stats = t.stats()
+            self.assertEqual(stats["lookups"], 100)
+            self.assertEqual(stats["size"], 100)
+            self.assertGreater(stats["resizes"], 0)
+
+
+class testSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "map.bin")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def filled(self, cls):
+        m = cls()
+        for i in range(200):
+            m[i] = str(i)
+        for i in range(0, 200, 3):
+            del m[i]
+        m["key"] = "value"
+        return m
+
+    def test_save_load(self):
+        for cls in (ChainHashMap, ProbeHashMap, CuckooHashMap, ConcurrentHashMap):
+            m = self.filled(cls)
+            m.save(self.path)
+            loaded = cls.load(self.path)
+            self.assertEqual(len(loaded), len(m))
+            self.assertEqual(dict(loaded.items()), dict(m.items()))
+            # restored without rehashing: same parameters and layout
+            self.assertEqual(loaded._scale, m._scale)
+            self.assertEqual(len(loaded._table), len(m._table))
+            loaded["new"] = 1
+            del loaded[1]
+            self.assertEqual(loaded["new"], 1)
+            self.assertNotIn(1, loaded)
+
+    def test_mapped(self):
+        for cls in (ChainHashMap, ProbeHashMap, CuckooHashMap, ConcurrentHashMap):
+            m = self.filled(cls)
+            m.save(self.path)
+            with cls.load(self.path, mapped=True) as view:
+                self.assertEqual(len(view), len(m))
+                self.assertEqual(view[1], "1")
+                self.assertEqual(view["key"], "value")
+                self.assertNotIn(3, view)
+                self.assertEqual(dict(view.items()), dict(m.items()))
+                with self.assertRaises(TypeError):
+                    view[1] = "one"
+
+    def test_wrong_file(self):
+        ChainHashMap().save(self.path)
+        with self.assertRaises(ValueError):
+            ProbeHashMap.load(self.path)
+        with open(self.path, "wb") as f:
+            f.write(b"not a map" * 10)
+        with self.assertRaises(ValueError):
+            ChainHashMap.load(self.path)
+
 
 class testSortedTableMap(unittest.TestCase):
     def testSetGet(self):
@@ -84,3 +461,183 @@ class testSortedTableMap(unittest.TestCase):
         m["a"] = 1
         m["c"] = 3
         m["b"] = 2
+
+    def testRandom(self):
+        rng = random.Random(0)
+        m = SortedTableMap()
+        d = {}
+        for _ in range(2000):
+            k = rng.randrange(500)
+            if rng.random() < 0.3 and k in d:
+                del m[k]
+                del d[k]
+            else:
+                m[k] = d[k] = rng.random()
+        self.assertEqual(list(m), sorted(d))
+        self.assertEqual(m._keys, [item._key for item in m._table])
+        expected = sorted((k, v) for k, v in d.items() if 100 <= k < 200)
+        self.assertEqual(list(m.find_range(100, 200)), expected)
+        self.assertEqual(list(m.find_range(200, 100)), [])
+
+    def testGetMany(self):
+        m = SortedTableMap()
+        for k in range(0, 1000, 2):
+            m[k] = str(k)
+        queries = list(range(-5, 1010, 7))
+        expected = [str(k) if 0 <= k < 1000 and k % 2 == 0 else None for k in queries]
+        self.assertEqual(m.get_many(queries), expected)
+        # unsorted batches give the same answers
+        self.assertEqual(m.get_many(queries[::-1], "x")[-1], "x")
+        self.assertEqual(m.get_many(queries[::-1]), [m.get(k) for k in queries[::-1]])
+        self.assertEqual(m.get_many([998, 0, 998, 4]), ["998", "0", "998", "4"])
+        self.assertEqual(SortedTableMap().get_many([1, 2]), [None, None])
+
+
+class testBlockedSortedTableMap(unittest.TestCase):
+    def testFind(self):
+        m = BlockedSortedTableMap()
+        self.assertIsNone(m.find_min())
+        self.assertIsNone(m.find_lt("a"))
+        m["a"] = 1
+        m["c"] = 3
+        m["b"] = 2
+        self.assertEqual(m.find_min(), ("a", 1))
+        self.assertEqual(m.find_max(), ("c", 3))
+        m["e"] = 5
+        self.assertEqual(m.find_ge("d"), ("e", 5))
+        self.assertEqual(m.find_lt("d"), ("c", 3))
+        self.assertEqual(m.find_lt("c"), ("b", 2))
+        self.assertIsNone(m.find_lt("a"))
+        self.assertEqual(m.find_gt("c"), ("e", 5))
+        self.assertIsNone(m.find_gt("e"))
+        self.assertEqual(list(m.find_range("a", "e")), [("a", 1), ("b", 2), ("c", 3)])
+        self.assertEqual(list(m.find_range("b", None)), [("b", 2), ("c", 3), ("e", 5)])
+        self.assertEqual(str(m), "(a:1) (b:2) (c:3) (e:5)")
+
+    def testRandom(self):
+        rng = random.Random(0)
+        m = BlockedSortedTableMap(load=4)
+        d = {}
+        for _ in range(3000):
+            k = rng.randrange(400)
+            if rng.random() < 0.4 and k in d:
+                del m[k]
+                del d[k]
+            else:
+                m[k] = d[k] = rng.random()
+        keys = sorted(d)
+        self.assertEqual(list(m), keys)
+        self.assertEqual(list(reversed(m)), keys[::-1])
+        self.assertEqual(len(m), len(d))
+        self.assertTrue(all(len(block) <= 8 for block in m._lists))
+        self.assertEqual(m._maxes, [block[-1] for block in m._lists])
+        for i in range(len(keys)):
+            self.assertEqual(m.peekitem(i), (keys[i], d[keys[i]]))
+        self.assertEqual(m.peekitem(), (keys[-1], d[keys[-1]]))
+        with self.assertRaises(IndexError):
+            m.peekitem(len(keys))
+        for k in range(-1, 401):
+            self.assertEqual(m.get(k), d.get(k))
+            ge = [x for x in keys if x >= k]
+            lt = [x for x in keys if x < k]
+            self.assertEqual(m.find_ge(k), (ge[0], d[ge[0]]) if ge else None)
+            self.assertEqual(m.find_lt(k), (lt[-1], d[lt[-1]]) if lt else None)
+        expected = [(k, d[k]) for k in keys if 50 <= k < 300]
+        self.assertEqual(list(m.find_range(50, 300)), expected)
+        for k in keys:
+            del m[k]
+        self.assertEqual(len(m), 0)
+        self.assertEqual(m._lists, [])
+
+
+class testSortedTableMapBulk(unittest.TestCase):
+    def testFromSorted(self):
+        for cls in (SortedTableMap, BlockedSortedTableMap):
+            m = cls.from_sorted((k, str(k)) for k in range(0, 5000, 5))
+            self.assertEqual(len(m), 1000)
+            self.assertEqual(m[45], "45")
+            self.assertEqual(m.find_ge(46), (50, "50"))
+            m[46] = "46"
+            self.assertEqual(m.find_lt(50), (46, "46"))
+            with self.assertRaises(ValueError):
+                cls.from_sorted([(1, "a"), (3, "c"), (2, "b")])
+            with self.assertRaises(ValueError):
+                cls.from_sorted([(1, "a"), (1, "b")])
+            self.assertEqual(len(cls.from_sorted([])), 0)
+
+    def testFromUnsorted(self):
+        for cls in (SortedTableMap, BlockedSortedTableMap):
+            m = cls.from_unsorted([(3, "c"), (1, "a"), (2, "b"), (1, "z")])
+            expected = [(1, "z"), (2, "b"), (3, "c")]
+            self.assertEqual(list(m.find_range(None, None)), expected)
+
+    def testMerge(self):
+        for cls in (SortedTableMap, BlockedSortedTableMap):
+            a = cls.from_sorted((k, "a") for k in range(0, 100, 2))
+            b = cls.from_sorted((k, "b") for k in range(0, 100, 3))
+            m = a.merge(b)
+            keys = sorted(set(range(0, 100, 2)) | set(range(0, 100, 3)))
+            self.assertEqual(list(m), keys)
+            self.assertEqual(m[6], "b")
+            self.assertEqual(m[4], "a")
+            self.assertEqual(len(a), 50)
+            self.assertEqual(list(a.merge(cls())), list(a))
+
+
+class testRankSelect(unittest.TestCase):
+    def test_rank_select(self):
+        keys = random.Random(1).sample(range(10000), 2000)
+        ordered = sorted(keys)
+        for cls in (SortedTableMap, lambda: BlockedSortedTableMap(load=16)):
+            m = cls()
+            for k in keys:
+                m[k] = str(k)
+            for i in (0, 1, 777, 1999, -1):
+                self.assertEqual(m.select(i), (ordered[i], str(ordered[i])))
+            with self.assertRaises(IndexError):
+                m.select(2000)
+            for k in (-1, 0, ordered[500], ordered[500] + 1, 10**6):
+                self.assertEqual(m.rank(k), sum(1 for x in keys if x < k))
+            expected = sum(1 for x in keys if 100 <= x < 5000)
+            self.assertEqual(m.count_range(100, 5000), expected)
+            self.assertEqual(m.count_range(None, None), 2000)
+            self.assertEqual(m.count_range(5000, 100), 0)
+
+
+class testSortedTableMapReversed(unittest.TestCase):
+    def test_neighbours(self):
+        for cls in (SortedTableMap, lambda: BlockedSortedTableMap(load=4)):
+            m = cls()
+            self.assertIsNone(m.find_lt(1))
+            self.assertIsNone(m.find_le(1))
+            for k in range(10, 100, 10):
+                m[k] = str(k)
+            self.assertIsNone(m.find_lt(10))
+            self.assertIsNone(m.find_lt(5))
+            self.assertIsNone(m.find_le(5))
+            self.assertEqual(m.find_le(10), (10, "10"))
+            self.assertEqual(m.find_le(55), (50, "50"))
+            self.assertEqual(m.find_le(60), (60, "60"))
+            self.assertEqual(m.find_le(1000), (90, "90"))
+            self.assertEqual(m.find_lt(60), (50, "50"))
+            self.assertEqual(m.find_lt(1000), (90, "90"))
+
+    def test_range_reversed(self):
+        keys = list(range(0, 300, 3))
+        for cls in (SortedTableMap, lambda: BlockedSortedTableMap(load=8)):
+            m = cls()
+            self.assertEqual(list(m.find_range_reversed(None, None)), [])
+            for k in keys:
+                m[k] = k
+            for start, stop in (
+                (None, None),
+                (10, 100),
+                (None, 50),
+                (50, None),
+                (100, 10),
+                (0, 1),
+                (-5, 0),
+                (299, 1000),
+            ):
+                expected = list(m.find_range(start, stop))[::-1]
+                self.assertEqual(list(m.find_range_reversed(start, stop)), expected)
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from toydata.IntervalTree import IntervalTreeMap
+
+
+def check_high(node):
+    """Return greatest end below node, checking the kept values"""
+    if node is None:
+        return float("-inf")
+    high = max(node._element._key[1], check_high(node._left), check_high(node._right))
+    if node._high != high:
+        raise AssertionError("wrong greatest end")
+    return high
+
+
+class testIntervalTreeMap(unittest.TestCase):
+    def test_queries(self):
+        t = IntervalTreeMap()
+        t[(1, 5)] = "a"
+        t[(3, 4)] = "b"
+        t[(6, 9)] = "c"
+        t[(0, 10)] = "d"
+        self.assertEqual(t[(3, 4)], "b")
+        self.assertEqual([v for _, v in t.overlap(4, 6)], ["d", "a"])
+        self.assertEqual([v for _, v in t.overlap(5, 6)], ["d"])
+        self.assertEqual([v for _, v in t.stab(3)], ["d", "a", "b"])
+        self.assertEqual([v for _, v in t.stab(5)], ["d"])
+        self.assertEqual(list(t.stab(10)), [])
+        # [3, 3) and [4, 3) hold no point
+        self.assertEqual(list(t.overlap(3, 3)), [])
+        self.assertEqual(list(t.overlap(4, 3)), [])
+        del t[(0, 10)]
+        self.assertEqual([v for _, v in t.stab(6)], ["c"])
+        check_high(t._root)
+
+    def test_invalid(self):
+        t = IntervalTreeMap()
+        with self.assertRaises(ValueError):
+            t[(2, 2)] = "x"
+        with self.assertRaises(ValueError):
+            t[(1, 2, 3)] = "x"
+        with self.assertRaises(ValueError):
+            IntervalTreeMap.from_sorted([((5, 1), "x"), ((6, 7), "y")])
+        with self.assertRaises(ValueError):
+            IntervalTreeMap.from_unsorted([((6, 7), "y"), ((6, 6), "x")])
+        t = IntervalTreeMap.from_unsorted([((6, 7), "y"), ((1, 3), "x")])
+        self.assertEqual(list(t.stab(2)), [((1, 3), "x")])
+        check_high(t._root)
+
+    def test_random(self):
+        rng = random.Random(6)
+        t = IntervalTreeMap()
+        d = {}
+        for _ in range(2000):
+            s = rng.randrange(1000)
+            k = (s, s + rng.randrange(1, 60))
+            if d and rng.random() < 0.3:
+                k = rng.choice(sorted(d))
+                del t[k]
+                del d[k]
+            else:
+                t[k] = d[k] = rng.random()
+            if rng.random() < 0.05:
+                check_high(t._root)
+                a = rng.randrange(1000)
+                b = a + rng.randrange(0, 50)
+                expected = [
+                    (k, d[k]) for k in sorted(d) if a < b and k[0] < b and a < k[1]
+                ]
+                self.assertEqual(list(t.overlap(a, b)), expected)
+                expected = [(k, d[k]) for k in sorted(d) if k[0] <= a < k[1]]
+                self.assertEqual(list(t.stab(a)), expected)
+        check_high(t._root)
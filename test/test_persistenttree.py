@@ -0,0 +1,76 @@
+import random
+import unittest
+
+from toydata.PersistentTree import PersistentAVLTreeMap
+
+
+def check_tree(node):
+    """Return height of subtree node, checking AVL balance and sizes"""
+    if node is None:
+        return 0
+    left, right = check_tree(node._left), check_tree(node._right)
+    if abs(left - right) > 1 or node._height != 1 + max(left, right):
+        raise AssertionError("unbalanced node")
+    size = 1 + (node._left._size if node._left else 0)
+    size += node._right._size if node._right else 0
+    if node._size != size:
+        raise AssertionError("wrong size")
+    return node._height
+
+
+class testPersistentAVLTreeMap(unittest.TestCase):
+    def test_versions(self):
+        t0 = PersistentAVLTreeMap()
+        t1 = t0.set(2, "b").set(1, "a").set(3, "c")
+        t2 = t1.set(2, "B")
+        t3 = t2.delete(1)
+        self.assertEqual(len(t0), 0)
+        self.assertEqual(dict(t1), {1: "a", 2: "b", 3: "c"})
+        self.assertEqual(dict(t2), {1: "a", 2: "B", 3: "c"})
+        self.assertEqual(list(t3), [2, 3])
+        self.assertEqual(list(reversed(t1)), [3, 2, 1])
+        with self.assertRaises(KeyError):
+            t3.delete(1)
+        with self.assertRaises(TypeError):
+            t3[4] = "d"
+
+    def test_sharing(self):
+        t = PersistentAVLTreeMap.from_sorted((k, k) for k in range(1023))
+        u = t.set(0, "zero")
+        # only the path down to key 0 is copied
+        self.assertIs(u._root._right, t._root._right)
+        self.assertEqual(t[0], 0)
+        self.assertEqual(u[0], "zero")
+
+    def test_queries(self):
+        t = PersistentAVLTreeMap.from_unsorted((k, str(k)) for k in [8, 2, 6, 4])
+        self.assertEqual(t.find_min(), (2, "2"))
+        self.assertEqual(t.find_max(), (8, "8"))
+        self.assertEqual(t.find_ge(5), (6, "6"))
+        self.assertEqual(t.find_gt(6), (8, "8"))
+        self.assertEqual(t.find_le(5), (4, "4"))
+        self.assertEqual(t.find_lt(2), None)
+        self.assertEqual([k for k, _ in t.find_range(3, 8)], [4, 6])
+        self.assertEqual(t.rank(6), 2)
+        self.assertEqual(t.select(-1), (8, "8"))
+        with self.assertRaises(IndexError):
+            t.select(4)
+
+    def test_random(self):
+        rng = random.Random(47)
+        versions = [(PersistentAVLTreeMap(), {})]
+        for _ in range(1500):
+            t, d = versions[rng.randrange(len(versions))]
+            d = dict(d)
+            k = rng.randrange(300)
+            if k in d and rng.random() < 0.4:
+                t = t.delete(k)
+                del d[k]
+            else:
+                t = t.set(k, rng.random())
+                d[k] = t[k]
+            versions.append((t, d))
+        for t, d in versions[::50]:
+            check_tree(t._root)
+            self.assertEqual(list(t.find_range(None, None)), sorted(d.items()))
+            self.assertEqual(len(t), len(d))
@@ -1,8 +1,22 @@
+import random
 import unittest
 
 from toydata.SearchTree import AVLTreeMap, RedBlackTreeMap, SplayTreeMap
 
 
+def check_links(node):
+    """Return size of the subtree at node, checking parents and sizes"""
+    if node is None:
+        return 0
+    for child in (node._left, node._right):
+        if child is not None and child._parent is not node:
+            raise AssertionError("broken parent link")
+    count = 1 + check_links(node._left) + check_links(node._right)
+    if node._count != count:
+        raise AssertionError("wrong subtree size")
+    return count
+
+
 class testAVLTreeMap(unittest.TestCase):
     def test_insert(self):
         t = AVLTreeMap()
@@ -63,6 +77,61 @@ class testSplayTreeMap(unittest.TestCase):
         with self.assertRaises(KeyError):
             t[2]
 
+    def test_delete_root(self):
+        t = SplayTreeMap()
+        t[1] = "a"
+        t[2] = "b"
+        # the last insert is splayed to the root, with 1 as its only child
+        del t[2]
+        self.assertEqual(list(t), [1])
+        del t[1]
+        self.assertEqual(len(t), 0)
+
+    def test_splay_to_root(self):
+        t = SplayTreeMap.from_sorted((k, k) for k in range(100))
+        t[37]
+        self.assertEqual(t.root().key(), 37)
+        with self.assertRaises(KeyError):
+            t[37.5]
+        self.assertIn(t.root().key(), (37, 38))
+        t[200] = 200
+        self.assertEqual(t.root().key(), 200)
+        del t[50]
+        self.assertEqual(t.root().key(), 49)
+
+    def test_random(self):
+        for rate in (1.0, 0.3):
+            rng = random.Random(9)
+            t = SplayTreeMap(splay_rate=rate)
+            d = {}
+            for _ in range(3000):
+                k = rng.randrange(300)
+                op = rng.random()
+                if k in d and op < 0.3:
+                    del t[k]
+                    del d[k]
+                elif op < 0.6:
+                    t[k] = d[k] = op
+                else:
+                    self.assertEqual(t.get(k), d.get(k))
+            self.assertEqual(check_links(t._root), len(d))
+            self.assertEqual(list(t.find_range(None, None)), sorted(d.items()))
+
+    def test_sampling(self):
+        with self.assertRaises(ValueError):
+            SplayTreeMap(splay_rate=0)
+        t = SplayTreeMap(splay_rate=0.25)
+        for k in range(8):
+            t[k] = k
+        root = t.root().key()
+        splayed = 0
+        for k in (1, 5, 2, 6, 3, 4, 2, 5):
+            t[k]
+            if t.root().key() != root:
+                root = t.root().key()
+                splayed += 1
+        self.assertEqual(splayed, 2)
+
 
 class testRedBlackTreeMap(unittest.TestCase):
     def test_insert(self):
@@ -92,3 +161,404 @@ class testRedBlackTreeMap(unittest.TestCase):
         del t[2]
         with self.assertRaises(KeyError):
             t[2]
+
+    def test_delete_right_red_nephew(self):
+        # deleting 1 leaves its sibling 3 with a red child on the right only
+        t = RedBlackTreeMap()
+        for k in (2, 1, 3, 4):
+            t[k] = k
+        del t[1]
+        self.assertEqual(list(t), [2, 3, 4])
+
+        def black_height(p):
+            if p is None:
+                return 0
+            left, right = t.left(p), t.right(p)
+            if t._is_red(p):
+                self.assertFalse(t._is_red(left) or t._is_red(right))
+            height = black_height(left)
+            self.assertEqual(height, black_height(right))
+            return height + (not t._is_red(p))
+
+        self.assertFalse(t._is_red(t.root()))
+        black_height(t.root())
+
+
+class testRankSelect(unittest.TestCase):
+    def test_rank_select(self):
+        rng = random.Random(7)
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            t = cls()
+            keys = set()
+            for _ in range(3000):
+                k = rng.randrange(500)
+                if k in keys and rng.random() < 0.5:
+                    del t[k]
+                    keys.discard(k)
+                else:
+                    t[k] = str(k)
+                    keys.add(k)
+            ordered = sorted(keys)
+            self.assertEqual(t.root()._node._count, len(ordered))
+            for i in range(len(ordered)):
+                self.assertEqual(t.select(i), (ordered[i], str(ordered[i])))
+            self.assertEqual(t.select(-1)[0], ordered[-1])
+            with self.assertRaises(IndexError):
+                t.select(len(ordered))
+            for k in range(-1, 502, 7):
+                self.assertEqual(t.rank(k), sum(1 for x in ordered if x < k))
+            self.assertEqual(
+                t.count_range(100, 300), sum(1 for x in ordered if 100 <= x < 300)
+            )
+            self.assertEqual(t.count_range(None, None), len(ordered))
+
+
+def black_height(node):
+    """Return black height of a red-black subtree, checking its colours"""
+    if node is None:
+        return 1
+    if node._red and node._parent is not None and node._parent._red:
+        raise AssertionError("red node with red parent")
+    left = black_height(node._left)
+    if left != black_height(node._right):
+        raise AssertionError("unequal black heights")
+    return left + (0 if node._red else 1)
+
+
+def avl_height(node):
+    """Return height of an AVL subtree, checking stored heights"""
+    if node is None:
+        return 0
+    left, right = avl_height(node._left), avl_height(node._right)
+    if abs(left - right) > 1 or node._height != 1 + max(left, right):
+        raise AssertionError("bad AVL height")
+    return node._height
+
+
+class testBulkLoad(unittest.TestCase):
+    def test_from_sorted(self):
+        for n in list(range(0, 40)) + [127, 128, 1000]:
+            pairs = [(k, str(k)) for k in range(n)]
+            avl = AVLTreeMap.from_sorted(pairs)
+            rb = RedBlackTreeMap.from_sorted(pairs)
+            for t in (avl, rb, SplayTreeMap.from_sorted(pairs)):
+                self.assertEqual(len(t), n)
+                self.assertEqual(list(t), list(range(n)))
+                if n:
+                    self.assertEqual(t.root()._node._count, n)
+            avl_height(avl._root)
+            if n:
+                self.assertFalse(rb._root._red)
+            black_height(rb._root)
+
+    def test_update_after_load(self):
+        for cls in (AVLTreeMap, RedBlackTreeMap):
+            t = cls.from_sorted((k, k) for k in range(0, 200, 2))
+            for k in range(1, 200, 4):
+                t[k] = k
+            for k in range(0, 200, 6):
+                del t[k]
+            expected = sorted(set(range(0, 200, 2)) - set(range(0, 200, 6)))
+            expected = sorted(expected + list(range(1, 200, 4)))
+            self.assertEqual(list(t), expected)
+            self.assertEqual(t.select(10)[0], expected[10])
+            if cls is AVLTreeMap:
+                avl_height(t._root)
+            else:
+                black_height(t._root)
+
+    def test_errors_and_unsorted(self):
+        with self.assertRaises(ValueError):
+            AVLTreeMap.from_sorted([(2, "b"), (1, "a")])
+        t = RedBlackTreeMap.from_unsorted([(3, "c"), (1, "a"), (3, "z")])
+        self.assertEqual(list(t.find_range(None, None)), [(1, "a"), (3, "z")])
+
+
+class testSplitJoin(unittest.TestCase):
+    def check(self, t, keys):
+        self.assertEqual(list(t), keys)
+        self.assertEqual(len(t), len(keys))
+        if isinstance(t, AVLTreeMap):
+            avl_height(t._root)
+        elif isinstance(t, RedBlackTreeMap):
+            black_height(t._root)
+            self.assertTrue(t._root is None or not t._root._red)
+
+    def test_split(self):
+        rng = random.Random(11)
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            for _ in range(50):
+                keys = rng.sample(range(1000), rng.randrange(200))
+                t = cls()
+                for k in keys:
+                    t[k] = k
+                k = rng.randrange(-5, 1005)
+                left, right = t.split(k)
+                self.assertEqual(len(t), 0)
+                self.check(left, sorted(x for x in keys if x < k))
+                self.check(right, sorted(x for x in keys if x >= k))
+                if len(left):
+                    self.assertEqual(left.select(-1)[0], max(left))
+
+    def test_join(self):
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            self.check(cls.join(cls(), cls()), [])
+            for n, m in ((0, 5), (5, 0), (1, 1), (3, 200), (200, 3)):
+                left = cls.from_sorted((k, k) for k in range(n))
+                right = cls()
+                for k in range(n, n + m):
+                    right[k] = k
+                t = cls.join(left, right)
+                self.check(t, list(range(n + m)))
+                self.assertEqual(len(left), 0)
+                t[-1] = -1
+                del t[0]
+                self.check(t, [-1] + list(range(1, n + m)))
+            with self.assertRaises(ValueError):
+                cls.join(cls.from_sorted([(2, 2)]), cls.from_sorted([(1, 1)]))
+        with self.assertRaises(TypeError):
+            AVLTreeMap.join(AVLTreeMap(), RedBlackTreeMap())
+
+    def test_split_deep(self):
+        # sequential inserts leave a splay tree as deep as it is large
+        t = SplayTreeMap()
+        for k in range(5000):
+            t[k] = k
+        left, right = t.split(2500)
+        self.assertEqual(list(left), list(range(2500)))
+        self.assertEqual(list(right), list(range(2500, 5000)))
+        self.assertEqual((left._root._count, right._root._count), (2500, 2500))
+
+    def test_split_black_heights(self):
+        # the joins of a split are given black heights instead of measuring
+        t = RedBlackTreeMap()
+        rng = random.Random(5)
+        keys = rng.sample(range(10000), 3000)
+        for k in keys:
+            t[k] = k
+        measured = []
+        black_height = t._black_height
+        t._black_height = lambda node: measured.append(node) or black_height(node)
+        left, right = t.split(5000)
+        self.assertEqual(len(measured), 1)
+        self.check(left, sorted(k for k in keys if k < 5000))
+        self.check(right, sorted(k for k in keys if k >= 5000))
+
+    def test_join_rejected(self):
+        # a rejected join leaves both maps untouched
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            left = cls.from_sorted(((k, k) for k in range(10)), aggregate="sum")
+            right = cls.from_sorted((k, k) for k in range(10, 100))
+            with self.assertRaises(ValueError):
+                cls.join(left, right)
+            self.check(left, list(range(10)))
+            self.check(right, list(range(10, 100)))
+            with self.assertRaises(ValueError):
+                cls.join(right, cls.from_sorted((k, k) for k in range(10)))
+            self.check(right, list(range(10, 100)))
+        left = AVLTreeMap.from_sorted((k, k) for k in range(10))
+        right = RedBlackTreeMap.from_sorted((k, k) for k in range(10, 20))
+        with self.assertRaises(TypeError):
+            RedBlackTreeMap.join(left, right)
+        with self.assertRaises(TypeError):
+            AVLTreeMap.join(left, right)
+        self.assertEqual((len(left), len(right)), (10, 10))
+
+
+class testQueries(unittest.TestCase):
+    def test_neighbours(self):
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            t = cls()
+            self.assertIsNone(t.find_max())
+            self.assertIsNone(t.find_lt(1))
+            self.assertIsNone(t.find_gt(1))
+            for k in (50, 20, 80, 10, 30, 70, 90):
+                t[k] = str(k)
+            self.assertEqual(t.find_max(), (90, "90"))
+            self.assertEqual(t.find_ge(30), (30, "30"))
+            self.assertEqual(t.find_ge(31), (50, "50"))
+            self.assertIsNone(t.find_ge(91))
+            self.assertEqual(t.find_gt(30), (50, "50"))
+            self.assertIsNone(t.find_gt(90))
+            self.assertEqual(t.find_lt(50), (30, "30"))
+            self.assertEqual(t.find_lt(51), (50, "50"))
+            self.assertIsNone(t.find_lt(10))
+            self.assertEqual(t.find_le(10), (10, "10"))
+            self.assertIsNone(t.find_le(9))
+            self.assertEqual(list(reversed(t)), [90, 80, 70, 50, 30, 20, 10])
+
+    def test_random(self):
+        rng = random.Random(2)
+        keys = sorted(rng.sample(range(0, 1000, 2), 150))
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            t = cls.from_unsorted((k, k) for k in keys)
+            for q in range(-3, 1003, 7):
+                above = [(k, k) for k in keys if k >= q]
+                self.assertEqual(t.find_ge(q), above[0] if above else None)
+                above = [(k, k) for k in keys if k > q]
+                self.assertEqual(t.find_gt(q), above[0] if above else None)
+                below = [(k, k) for k in keys if k < q]
+                self.assertEqual(t.find_lt(q), below[-1] if below else None)
+            for start, stop in (
+                (None, None),
+                (100, 500),
+                (None, 3),
+                (501, None),
+                (9, 9),
+            ):
+                expected = list(t.find_range(start, stop))[::-1]
+                self.assertEqual(list(t.find_range_reversed(start, stop)), expected)
+
+
+class testAggregate(unittest.TestCase):
+    def brute(self, d, start, stop, combine, identity):
+        result = identity
+        for k in sorted(d):
+            if (start is None or start <= k) and (stop is None or k < stop):
+                result = combine(result, d[k])
+        return result
+
+    def test_random(self):
+        monoids = {
+            "sum": (lambda a, b: a + b, 0),
+            "min": (min, float("inf")),
+            "max": (max, float("-inf")),
+        }
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            for name, (combine, identity) in monoids.items():
+                rng = random.Random(4)
+                t = cls(aggregate=name)
+                d = {}
+                for _ in range(1500):
+                    k = rng.randrange(200)
+                    if k in d and rng.random() < 0.3:
+                        del t[k]
+                        del d[k]
+                    else:
+                        t[k] = d[k] = rng.randrange(-1000, 1000)
+                    if rng.random() < 0.05:
+                        start = rng.choice([None, rng.randrange(-5, 205)])
+                        stop = rng.choice([None, rng.randrange(-5, 205)])
+                        self.assertEqual(
+                            t.aggregate_range(start, stop),
+                            self.brute(d, start, stop, combine, identity),
+                        )
+
+    def test_order_kept(self):
+        # string concatenation is not commutative
+        concat = (lambda a, b: a + b, "")
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            letters = "abcdefghijklmnopqrstuvwxyz"
+            t = cls.from_sorted(enumerate(letters), aggregate=concat)
+            self.assertEqual(t.aggregate_range(None, None), letters)
+            self.assertEqual(t.aggregate_range(3, 7), "defg")
+            self.assertEqual(t.aggregate_range(7, 3), "")
+            t[4] = "E"
+            del t[5]
+            self.assertEqual(t.aggregate_range(2, 8), "cdEgh")
+            left, right = t.split(10)
+            self.assertEqual(right.aggregate_range(None, 13), "klm")
+            joined = cls.join(left, right)
+            self.assertEqual(joined.aggregate_range(8, 12), "ijkl")
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            AVLTreeMap().aggregate_range(None, None)
+        with self.assertRaises(ValueError):
+            RedBlackTreeMap(aggregate="median")
+
+
+class testCursor(unittest.TestCase):
+    def test_walk(self):
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            t = cls.from_unsorted((k, str(k)) for k in range(0, 100, 3))
+            c = t.cursor()
+            keys = []
+            while c.next():
+                keys.append(c.key())
+            self.assertEqual(keys, list(range(0, 100, 3)))
+            # off the end, a step back returns to the last item
+            self.assertFalse(c.next())
+            self.assertTrue(c.prev())
+            self.assertEqual(c.key(), 99)
+            keys = [c.key()]
+            while c.prev():
+                keys.append(c.key())
+            self.assertEqual(keys, list(range(99, -1, -3)))
+            with self.assertRaises(IndexError):
+                c.value()
+            self.assertTrue(c.next())
+            self.assertEqual(c.key(), 0)
+
+    def test_seek(self):
+        t = RedBlackTreeMap.from_sorted((k, k) for k in range(0, 100, 10))
+        c = t.cursor(35)
+        self.assertEqual(c.key(), 40)
+        self.assertTrue(c.seek(50))
+        self.assertEqual(c.key(), 50)
+        self.assertTrue(c.prev())
+        self.assertEqual(c.key(), 40)
+        self.assertFalse(c.seek(95))
+        self.assertTrue(c.prev())
+        self.assertEqual(c.key(), 90)
+        self.assertTrue(c.first())
+        self.assertFalse(c.prev())
+        self.assertTrue(c.last())
+        self.assertEqual(c.value(), 90)
+        self.assertFalse(AVLTreeMap().cursor().next())
+
+    def test_pages(self):
+        rng = random.Random(50)
+        keys = sorted(rng.sample(range(10000), 1000))
+        t = AVLTreeMap.from_sorted((k, k) for k in keys)
+        c = t.cursor(keys[100])
+        pages, on_item = [], True
+        while on_item:
+            # the cursor is kept between pages, each resumes where it was
+            page = []
+            while on_item and len(page) < 64:
+                page.append(c.key())
+                on_item = c.next()
+            pages.append(page)
+        self.assertEqual(pages[0], keys[100:164])
+        self.assertEqual([k for page in pages for k in page], keys[100:])
+
+    def test_take(self):
+        for cls in (AVLTreeMap, SplayTreeMap, RedBlackTreeMap):
+            t = cls.from_sorted((k, -k) for k in range(50))
+            c = t.cursor()
+            self.assertEqual(c.take(3), [(0, 0), (1, -1), (2, -2)])
+            self.assertEqual(c.key(), 3)
+            pages = [c.take(10) for _ in range(5)]
+            self.assertEqual([len(page) for page in pages], [10, 10, 10, 10, 7])
+            self.assertEqual(pages[-1][-1], (49, -49))
+            self.assertEqual(c.take(10), [])
+            self.assertTrue(c.prev())
+            self.assertEqual(c.key(), 49)
+            self.assertEqual(cls().cursor().take(5), [])
+
+    def test_updates(self):
+        t = AVLTreeMap(aggregate="sum")
+        for k in range(20):
+            t[k] = k
+        c = t.cursor(5)
+        t[6] = 60
+        c.set_value(50)
+        self.assertEqual(t[5], 50)
+        self.assertTrue(c.next())
+        self.assertEqual(c.value(), 60)
+        self.assertEqual(t.aggregate_range(5, 7), 110)
+        t[100] = 100
+        with self.assertRaises(RuntimeError):
+            c.next()
+        self.assertTrue(c.seek(7))
+        del t[3]
+        with self.assertRaises(RuntimeError):
+            c.key()
+        s = SplayTreeMap()
+        for k in range(10):
+            s[k] = k
+        c = s.cursor(2)
+        s[5]
+        with self.assertRaises(RuntimeError):
+            c.next()
@@ -0,0 +1,99 @@
+import random
+import threading
+import unittest
+
+from toydata.SkipList import SkipListMap
+
+
+class testSkipListMap(unittest.TestCase):
+    def test_basic(self):
+        t = SkipListMap(seed=1)
+        for k in [5, 1, 9, 3, 7]:
+            t[k] = str(k)
+        t[3] = "three"
+        self.assertEqual(len(t), 5)
+        self.assertEqual(list(t), [1, 3, 5, 7, 9])
+        self.assertEqual(t[3], "three")
+        del t[1]
+        with self.assertRaises(KeyError):
+            t[1]
+        with self.assertRaises(KeyError):
+            del t[1]
+        self.assertEqual(t.find_min(), (3, "three"))
+        self.assertEqual(t.find_max(), (9, "9"))
+        self.assertEqual(t.find_ge(6), (7, "7"))
+        self.assertEqual(t.find_gt(7), (9, "9"))
+        self.assertEqual(t.find_le(6), (5, "5"))
+        self.assertEqual(t.find_lt(3), None)
+        self.assertEqual(t.find_gt(9), None)
+        self.assertEqual([k for k, _ in t.find_range(4, 9)], [5, 7])
+        self.assertEqual([k for k, _ in t.find_range(None, 5)], [3])
+        with self.assertRaises(ValueError):
+            SkipListMap(p=1)
+
+    def test_empty(self):
+        t = SkipListMap()
+        self.assertEqual(t.find_min(), None)
+        self.assertEqual(t.find_max(), None)
+        self.assertEqual(list(t.find_range(None, None)), [])
+
+    def test_random(self):
+        rng = random.Random(48)
+        t = SkipListMap(seed=48)
+        d = {}
+        for _ in range(3000):
+            k = rng.randrange(500)
+            if k in d and rng.random() < 0.4:
+                del t[k]
+                del d[k]
+            else:
+                t[k] = d[k] = rng.random()
+        self.assertEqual(list(t.find_range(None, None)), sorted(d.items()))
+        self.assertEqual(len(t), len(d))
+        # every level is a sorted sublist of the level below
+        for i in range(t._level):
+            keys = []
+            node = t._head._next[i]
+            while node is not None:
+                keys.append(node._key)
+                node = node._next[i]
+            self.assertEqual(keys, sorted(set(keys)))
+            self.assertTrue(set(keys) <= set(d))
+
+    def test_concurrent(self):
+        t = SkipListMap(concurrent=True)
+        for k in range(0, 1000, 2):
+            t[k] = k
+        done = threading.Event()
+        errors = []
+
+        def writer(seed):
+            rng = random.Random(seed)
+            for _ in range(2000):
+                k = rng.randrange(1, 1000, 2)
+                if k in t:
+                    try:
+                        del t[k]
+                    except KeyError:
+                        pass
+                else:
+                    t[k] = k
+
+        def reader():
+            while not done.is_set():
+                keys = [k for k, _ in t.find_range(100, 900)]
+                even = [k for k in keys if k % 2 == 0]
+                if keys != sorted(keys) or even != list(range(100, 900, 2)):
+                    errors.append(keys)
+
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        writers = [threading.Thread(target=writer, args=(n,)) for n in range(2)]
+        for w in readers + writers:
+            w.start()
+        for w in writers:
+            w.join()
+        done.set()
+        for w in readers:
+            w.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(t), len(list(t)))
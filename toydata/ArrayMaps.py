@@ -0,0 +1,259 @@
+import numpy as np
+
+from toydata.Maps import MapBase
+
+
+class ArraySortedTableMap(MapBase):
+    """Sorted map for numeric keys stored column-wise in NumPy arrays.
+
+    Keys live in one sorted array and values in a parallel array (object
+    dtype unless value_dtype says otherwise). New keys are first collected
+    in a small delta buffer and merged into the arrays in one vectorized
+    pass when the buffer fills up or an ordered query needs them, so a run
+    of n inserts costs O(n * (n / buffer)) element moves rather than O(n^2).
+
+    Batches go through `get_many` and `update_many`, which search with
+    `numpy.searchsorted`; `range_arrays` returns views of a key range
+    without copying.
+
+    Requires NumPy, which is an optional dependency of toydata.
+    """
+
+    def __init__(self, key_dtype=np.float64, value_dtype=object, buffer=1024):
+        """Create an empty map; buffer is the size of the delta buffer"""
+        if buffer < 1:
+            raise ValueError("buffer must be positive")
+        self._keys = np.empty(0, dtype=key_dtype)
+        self._values = np.empty(0, dtype=value_dtype)
+        # keys not yet merged into _keys (never present there) -> value
+        self._delta = {}
+        self._buffer = buffer
+
+    # nonpublic behaviors
+    def _value_array(self, values):
+        """Return values (a sequence, array or other iterable) as a 1-d
+        array of the value dtype"""
+        if not isinstance(values, np.ndarray):
+            # np.asarray would wrap a dict view as a single object
+            values = list(values)
+        if self._values.dtype != object:
+            return np.asarray(values, dtype=self._values.dtype)
+        # fill element-wise so tuples or lists stay single values
+        array = np.empty(len(values), dtype=object)
+        for i, v in enumerate(values):
+            array[i] = v
+        return array
+
+    def _find_index(self, k):
+        """Return index of the leftmost merged key greater than or equal to k"""
+        return int(np.searchsorted(self._keys, k))
+
+    def _flush(self):
+        """Merge the delta buffer into the sorted arrays"""
+        if not self._delta:
+            return
+        n = len(self._delta)
+        keys = np.fromiter(self._delta, dtype=self._keys.dtype, count=n)
+        values = self._value_array(self._delta.values())
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        positions = np.searchsorted(self._keys, keys)
+        self._keys = np.insert(self._keys, positions, keys)
+        self._values = np.insert(self._values, positions, values[order])
+        self._delta = {}
+
+    def _value(self, j):
+        """Return value at index j of the merged arrays as a Python object"""
+        v = self._values[j]
+        return v if self._values.dtype == object else v.item()
+
+    def _pair(self, j):
+        """Return (key, value) pair at index j of the merged arrays"""
+        return (self._keys[j].item(), self._value(j))
+
+    # public behaviors
+    def __len__(self):
+        """Return number of items in the map"""
+        return len(self._keys) + len(self._delta)
+
+    def __getitem__(self, k):
+        """Return value associated with key k
+        (raise KeyError if not found)"""
+        try:
+            return self._delta[k]
+        except KeyError:
+            pass
+        j = self._find_index(k)
+        if j == len(self._keys) or self._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        return self._value(j)
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present"""
+        if k != k:
+            raise ValueError("NaN cannot be used as a key")
+        j = self._find_index(k)
+        if j < len(self._keys) and self._keys[j] == k:
+            self._values[j] = v
+            return
+        self._delta[k] = v
+        if len(self._delta) >= self._buffer:
+            self._flush()
+
+    def __delitem__(self, k):
+        """Remove item associated with key k
+        (raise KeyError if not found)
+
+        Removing a merged key copies the arrays, O(n).
+        """
+        if k in self._delta:
+            del self._delta[k]
+            return
+        j = self._find_index(k)
+        if j == len(self._keys) or self._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        self._keys = np.delete(self._keys, j)
+        self._values = np.delete(self._values, j)
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum"""
+        self._flush()
+        for k in self._keys.tolist():
+            yield k
+
+    def __reversed__(self):
+        """Generate keys of the map ordered from maximum to minimum"""
+        self._flush()
+        for k in self._keys[::-1].tolist():
+            yield k
+
+    def find_min(self):
+        """Return (key, value) pair with minimum key(or None if empty)"""
+        self._flush()
+        return self._pair(0) if len(self._keys) else None
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        self._flush()
+        return self._pair(-1) if len(self._keys) else None
+
+    def find_ge(self, k):
+        """Return (key, value) pair with least key greater than or
+        equal to k"""
+        self._flush()
+        j = self._find_index(k)
+        return self._pair(j) if j < len(self._keys) else None
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than k"""
+        self._flush()
+        j = self._find_index(k)
+        return self._pair(j - 1) if j > 0 else None
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than or
+        equal to k"""
+        self._flush()
+        j = int(np.searchsorted(self._keys, k, side="right"))
+        return self._pair(j - 1) if j > 0 else None
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than k"""
+        self._flush()
+        j = int(np.searchsorted(self._keys, k, side="right"))
+        return self._pair(j) if j < len(self._keys) else None
+
+    def range_arrays(self, start, stop):
+        """Return (keys, values) arrays of the items with start <= key < stop.
+
+        None for start or stop leaves that side unbounded. The arrays are
+        views into the map: no data is copied, and they stop tracking the
+        map once it merges or deletes keys.
+        """
+        self._flush()
+        low = 0 if start is None else self._find_index(start)
+        high = len(self._keys) if stop is None else self._find_index(stop)
+        high = max(low, high)
+        return self._keys[low:high], self._values[low:high]
+
+    def find_range(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop.
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        keys, values = self.range_arrays(start, stop)
+        return zip(keys.tolist(), values.tolist())
+
+    def find_range_reversed(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop,
+        from the greatest key down.
+        None for start or stop leaves that side unbounded.
+        """
+        keys, values = self.range_arrays(start, stop)
+        return zip(keys[::-1].tolist(), values[::-1].tolist())
+
+    def rank(self, k):
+        """Return the number of keys strictly less than k"""
+        self._flush()
+        return self._find_index(k)
+
+    def select(self, i):
+        """Return (key, value) pair with the i-th smallest key(0-based)
+
+        Negative i counts from the maximum; raise IndexError if out of range.
+        """
+        self._flush()
+        return self._pair(i)
+
+    def count_range(self, start, stop):
+        """Return the number of keys such that start <= key < stop.
+
+        None for start or stop leaves that side unbounded.
+        """
+        return len(self.range_arrays(start, stop)[0])
+
+    def get_many(self, keys, default=None):
+        """Return array of the values of keys, default for missing ones.
+
+        All keys are searched at once with numpy.searchsorted. With a
+        value_dtype other than object, default must be given as a value
+        of that dtype (raise ValueError otherwise).
+        """
+        if default is None and self._values.dtype != object:
+            raise ValueError("default is required for numeric values")
+        self._flush()
+        queries = np.asarray(keys, dtype=self._keys.dtype)
+        result = np.empty(len(queries), dtype=self._values.dtype)
+        if len(self._keys) == 0:
+            result[:] = default
+            return result
+        positions = np.searchsorted(self._keys, queries)
+        clipped = np.minimum(positions, len(self._keys) - 1)
+        found = (positions < len(self._keys)) & (self._keys[clipped] == queries)
+        result[found] = self._values[clipped[found]]
+        result[~found] = default
+        return result
+
+    def update_many(self, keys, values):
+        """Assign values[i] to keys[i] for every i in one vectorized merge.
+
+        Of duplicate keys the last value wins.
+        """
+        self._flush()
+        keys = np.asarray(keys, dtype=self._keys.dtype)
+        values = self._value_array(values)
+        if len(keys) != len(values):
+            raise ValueError("keys and values differ in length")
+        if keys.dtype.kind == "f" and np.isnan(keys).any():
+            raise ValueError("NaN cannot be used as a key")
+        # np.unique keeps the first occurrence, so search the reversed batch
+        keys, first = np.unique(keys[::-1], return_index=True)
+        values = values[::-1][first]
+        positions = np.searchsorted(self._keys, keys)
+        clipped = np.minimum(positions, max(len(self._keys) - 1, 0))
+        hit = positions < len(self._keys)
+        hit[hit] = self._keys[clipped[hit]] == keys[hit]
+        self._values[positions[hit]] = values[hit]
+        new = ~hit
+        self._keys = np.insert(self._keys, positions[new], keys[new])
+        self._values = np.insert(self._values, positions[new], values[new])
@@ -0,0 +1,599 @@
+from array import array
+
+from toydata.Maps import MapBase, _check_sorted, _sort_pairs
+
+
+class ArrayTreeMap(MapBase):
+    """Base class, sorted map using a binary search tree whose nodes live
+    in parallel arrays.
+
+    A node is an integer index into the arrays of keys, values, links and
+    subtree sizes; index 0 is the nil sentinel standing for every missing
+    child or parent. Links and sizes are machine integers in `array`
+    objects, so an entry costs a few bytes plus its key and value, instead
+    of a _Node, an _Item and the Positions created while walking a
+    TreeMap. Slots of deleted nodes are kept on a free list, threaded
+    through the left links, and reused by later inserts.
+
+    Indices are C ints, which bounds a tree to 2**31 - 1 nodes.
+    Time complexity: as for TreeMap
+    """
+
+    _TYPECODE = "i"
+
+    def __init__(self):
+        """Create an empty map"""
+        self._keys = [None]
+        self._values = [None]
+        self._left = array(self._TYPECODE, [0])
+        self._right = array(self._TYPECODE, [0])
+        self._parent = array(self._TYPECODE, [0])
+        self._count = array(self._TYPECODE, [0])
+        self._root = 0
+        self._size = 0
+        # first free slot, further ones are linked through _left
+        self._free = 0
+
+    # node storage, extended by subclasses with their balance data
+    def _grow(self):
+        """Append a slot to every array holding balance data"""
+        pass
+
+    def _reset(self, i):
+        """Set balance data of slot i for a new leaf"""
+        pass
+
+    def _alloc(self, k, v, parent):
+        """Store a new leaf with key k and value v; return its index"""
+        i = self._free
+        if i:
+            self._free = self._left[i]
+            self._keys[i] = k
+            self._values[i] = v
+            self._left[i] = 0
+        else:
+            i = len(self._keys)
+            self._keys.append(k)
+            self._values.append(v)
+            self._left.append(0)
+            self._right.append(0)
+            self._parent.append(0)
+            self._count.append(0)
+            self._grow()
+        self._right[i] = 0
+        self._parent[i] = parent
+        self._count[i] = 1
+        self._reset(i)
+        return i
+
+    def _release(self, i):
+        """Put slot i on the free list, dropping its key and value"""
+        self._keys[i] = self._values[i] = None
+        self._right[i] = self._parent[i] = self._count[i] = 0
+        self._left[i] = self._free
+        self._free = i
+
+    # nonpublic utilities
+    def _search(self, k):
+        """Return node having key k, or last node searched(0 if empty)"""
+        keys, left, right = self._keys, self._left, self._right
+        i, last = self._root, 0
+        while i:
+            key = keys[i]
+            if k == key:
+                return i
+            last = i
+            i = left[i] if k < key else right[i]
+        return last
+
+    def _first(self, i):
+        """Return first node in subtree rooted at i"""
+        left = self._left
+        while left[i]:
+            i = left[i]
+        return i
+
+    def _last(self, i):
+        """Return last node in subtree rooted at i"""
+        right = self._right
+        while right[i]:
+            i = right[i]
+        return i
+
+    def _after(self, i):
+        """Return node just after i in the natural order(or 0)"""
+        if self._right[i]:
+            return self._first(self._right[i])
+        parent, right = self._parent, self._right
+        above = parent[i]
+        while above and i == right[above]:
+            i = above
+            above = parent[i]
+        return above
+
+    def _before(self, i):
+        """Return node just before i in the natural order(or 0)"""
+        if self._left[i]:
+            return self._last(self._left[i])
+        parent, left = self._parent, self._left
+        above = parent[i]
+        while above and i == left[above]:
+            i = above
+            above = parent[i]
+        return above
+
+    def _ge(self, k, strict=False):
+        """Return node with least key greater than(strict) or equal to k
+        (or 0)"""
+        keys, left, right = self._keys, self._left, self._right
+        i, best = self._root, 0
+        while i:
+            key = keys[i]
+            if k < key:
+                best = i
+                i = left[i]
+            elif k == key and not strict:
+                return i
+            else:
+                i = right[i]
+        return best
+
+    def _le(self, k, strict=False):
+        """Return node with greatest key less than(strict) or equal to k
+        (or 0)"""
+        keys, left, right = self._keys, self._left, self._right
+        i, best = self._root, 0
+        while i:
+            key = keys[i]
+            if key < k:
+                best = i
+                i = right[i]
+            elif k == key and not strict:
+                return i
+            else:
+                i = left[i]
+        return best
+
+    def _pair(self, i):
+        """Return (key, value) pair of node i(or None if i is 0)"""
+        return (self._keys[i], self._values[i]) if i else None
+
+    def _update_count(self, i):
+        self._count[i] = 1 + self._count[self._left[i]] + self._count[self._right[i]]
+
+    def _sibling(self, i):
+        parent = self._parent[i]
+        if self._left[parent] == i:
+            return self._right[parent]
+        return self._left[parent]
+
+    # Nonpublic Methods for Rotating and Restructuring
+    def _rotate(self, x):
+        """Rotate node x above its parent"""
+        left, right, parent = self._left, self._right, self._parent
+        y = parent[x]
+        z = parent[y]
+        if z == 0:
+            self._root = x
+        elif left[z] == y:
+            left[z] = x
+        else:
+            right[z] = x
+        parent[x] = z
+        # transfer the middle subtree from x to y
+        if left[y] == x:
+            middle = right[x]
+            left[y] = middle
+            right[x] = y
+        else:
+            middle = left[x]
+            right[y] = middle
+            left[x] = y
+        if middle:
+            parent[middle] = y
+        parent[y] = x
+        self._update_count(y)
+        self._update_count(x)
+
+    def _restructure(self, x):
+        """Perform trinode restructure of node x with parent/grandparent"""
+        y = self._parent[x]
+        z = self._parent[y]
+        if (x == self._right[y]) == (y == self._right[z]):
+            self._rotate(y)
+            return y
+        self._rotate(x)
+        self._rotate(x)
+        return x
+
+    # balanced tree subclasses
+    def _rebalance_insert(self, i):
+        pass
+
+    def _rebalance_delete(self, i):
+        pass
+
+    def _bulk_balance(self, i, depth, height):
+        pass
+
+    # bulk construction
+    def _build(self, pairs, low, high, parent, depth, height):
+        """Return root of a balanced subtree holding pairs[low:high]"""
+        if low >= high:
+            return 0
+        mid = (low + high) // 2
+        i = self._alloc(pairs[mid][0], pairs[mid][1], parent)
+        self._left[i] = self._build(pairs, low, mid, i, depth + 1, height)
+        self._right[i] = self._build(pairs, mid + 1, high, i, depth + 1, height)
+        self._update_count(i)
+        self._bulk_balance(i, depth, height)
+        return i
+
+    @classmethod
+    def from_sorted(cls, pairs):
+        """Return map of (key, value) pairs given in increasing key order.
+
+        Builds a perfectly balanced tree in O(n) without any rotations;
+        raise ValueError if keys are not strictly increasing.
+        """
+        t = cls()
+        pairs = list(_check_sorted(pairs))
+        if pairs:
+            height = len(pairs).bit_length() - 1
+            t._root = t._build(pairs, 0, len(pairs), 0, 0, height)
+            t._size = len(pairs)
+        return t
+
+    @classmethod
+    def from_unsorted(cls, pairs):
+        """Return map of (key, value) pairs in any order.
+
+        Sorts once in O(n log n); of duplicate keys the last value wins.
+        """
+        return cls.from_sorted(_sort_pairs(pairs))
+
+    # public behaviors
+    def __len__(self):
+        """Return number of items in the map"""
+        return self._size
+
+    def __getitem__(self, k):
+        """Return value associated with key k
+        (raise KeyError if not found)"""
+        i = self._search(k)
+        if i == 0 or self._keys[i] != k:
+            raise KeyError("Key Error: " + repr(k))
+        return self._values[i]
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value
+        if present"""
+        parent = self._search(k)
+        if parent == 0:
+            self._root = self._alloc(k, v, 0)
+            self._size = 1
+            self._rebalance_insert(self._root)
+            return
+        key = self._keys[parent]
+        if key == k:
+            self._values[parent] = v
+            return
+        i = self._alloc(k, v, parent)
+        if key < k:
+            self._right[parent] = i
+        else:
+            self._left[parent] = i
+        self._size += 1
+        count, up = self._count, self._parent
+        while parent:
+            count[parent] += 1
+            parent = up[parent]
+        self._rebalance_insert(i)
+
+    def __delitem__(self, k):
+        """Remove item associated with key k
+        (raise KeyError if not found)"""
+        i = self._search(k)
+        if i == 0 or self._keys[i] != k:
+            raise KeyError("Key Error: " + repr(k))
+        left, right = self._left, self._right
+        if left[i] and right[i]:
+            # move the predecessor's item here and remove its node instead
+            j = self._last(left[i])
+            self._keys[i], self._values[i] = self._keys[j], self._values[j]
+            i = j
+        # now i has at most one child
+        child = left[i] or right[i]
+        parent = self._parent[i]
+        if child:
+            self._parent[child] = parent
+        if parent == 0:
+            self._root = child
+        elif left[parent] == i:
+            left[parent] = child
+        else:
+            right[parent] = child
+        self._release(i)
+        self._size -= 1
+        count, up, walk = self._count, self._parent, parent
+        while walk:
+            count[walk] -= 1
+            walk = up[walk]
+        self._rebalance_delete(parent)
+
+    def __iter__(self):
+        """Generate an iteration of all keys in the map in order"""
+        if self._root:
+            i = self._first(self._root)
+            while i:
+                yield self._keys[i]
+                i = self._after(i)
+
+    def __reversed__(self):
+        """Generate an iteration of all keys in the map in reverse order"""
+        if self._root:
+            i = self._last(self._root)
+            while i:
+                yield self._keys[i]
+                i = self._before(i)
+
+    def find_min(self):
+        """Return (key, value) pair with minimum key(or None if empty)"""
+        return self._pair(self._first(self._root)) if self._root else None
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        return self._pair(self._last(self._root)) if self._root else None
+
+    def find_ge(self, k):
+        """Return (key, value) pair with least key greater than
+        or equal to k. Return None if there does not exist such a key.
+        """
+        return self._pair(self._ge(k))
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than k.
+        Return None if there does not exist such a key.
+        """
+        return self._pair(self._ge(k, strict=True))
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than
+        or equal to k. Return None if there does not exist such a key.
+        """
+        return self._pair(self._le(k))
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than k.
+        Return None if there does not exist such a key.
+        """
+        return self._pair(self._le(k, strict=True))
+
+    def find_range(self, start, stop):
+        """Iterate all (key, value) pairs such that
+        start <= key < stop.
+
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key
+        of map"""
+        if self._root == 0:
+            return
+        i = self._first(self._root) if start is None else self._ge(start)
+        while i:
+            k = self._keys[i]
+            if stop is not None and not k < stop:
+                return
+            yield (k, self._values[i])
+            i = self._after(i)
+
+    def find_range_reversed(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop,
+        from the greatest key down.
+        None for start or stop leaves that side unbounded.
+        """
+        if self._root == 0:
+            return
+        if stop is None:
+            i = self._last(self._root)
+        else:
+            i = self._le(stop, strict=True)
+        while i:
+            k = self._keys[i]
+            if start is not None and k < start:
+                return
+            yield (k, self._values[i])
+            i = self._before(i)
+
+    def rank(self, k):
+        """Return the number of keys strictly less than k"""
+        keys, left, right, count = self._keys, self._left, self._right, self._count
+        r, i = 0, self._root
+        while i:
+            if keys[i] < k:
+                r += 1 + count[left[i]]
+                i = right[i]
+            else:
+                i = left[i]
+        return r
+
+    def select(self, i):
+        """Return (key, value) pair with the i-th smallest key(0-based)
+
+        Negative i counts from the maximum; raise IndexError if out of range.
+        """
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("index out of range")
+        left, right, count = self._left, self._right, self._count
+        node = self._root
+        while True:
+            below = count[left[node]]
+            if i < below:
+                node = left[node]
+            elif i == below:
+                return (self._keys[node], self._values[node])
+            else:
+                i -= below + 1
+                node = right[node]
+
+    def count_range(self, start, stop):
+        """Return the number of keys such that start <= key < stop.
+
+        None for start or stop leaves that side unbounded.
+        """
+        low = 0 if start is None else self.rank(start)
+        high = self._size if stop is None else self.rank(stop)
+        return max(0, high - low)
+
+
+class ArrayAVLTreeMap(ArrayTreeMap):
+    """Sorted map implementation using an AVL tree stored in arrays.
+
+    Node heights are kept in a bytearray, as an AVL tree of height 255
+    would need more nodes than memory can hold.
+    """
+
+    def __init__(self):
+        self._height = bytearray(1)
+        super().__init__()
+
+    def _grow(self):
+        self._height.append(1)
+
+    def _reset(self, i):
+        self._height[i] = 1
+
+    def _bulk_balance(self, i, depth, height):
+        self._recompute_height(i)
+
+    def _recompute_height(self, i):
+        h = self._height
+        h[i] = 1 + max(h[self._left[i]], h[self._right[i]])
+
+    def _tall_child(self, i, favorleft=False):
+        h = self._height
+        left, right = self._left[i], self._right[i]
+        return left if h[left] + favorleft > h[right] else right
+
+    def _tall_grandchild(self, i):
+        child = self._tall_child(i)
+        # if child is on left, favor left grandchild;else favor right
+        return self._tall_child(child, child == self._left[i])
+
+    def _rebalance(self, i):
+        h = self._height
+        while i:
+            old_height = h[i]
+            if abs(h[self._left[i]] - h[self._right[i]]) > 1:
+                i = self._restructure(self._tall_grandchild(i))
+                self._recompute_height(self._left[i])
+                self._recompute_height(self._right[i])
+            self._recompute_height(i)
+            if h[i] == old_height:
+                return
+            i = self._parent[i]
+
+    def _rebalance_insert(self, i):
+        # a new leaf already has height 1, so start with its parent
+        self._rebalance(self._parent[i])
+
+    def _rebalance_delete(self, i):
+        self._rebalance(i)
+
+
+class ArrayRedBlackTreeMap(ArrayTreeMap):
+    """Sorted map implementation using a red-black tree stored in arrays.
+
+    Colours are kept in a bytearray, 1 for red; the nil sentinel is black.
+    """
+
+    def __init__(self):
+        self._red = bytearray(1)
+        super().__init__()
+
+    def _grow(self):
+        self._red.append(1)
+
+    def _reset(self, i):
+        self._red[i] = 1
+
+    def _bulk_balance(self, i, depth, height):
+        # see RedBlackTreeMap._bulk_balance
+        self._red[i] = depth == height and depth > 0
+
+    def _red_child(self, i):
+        """Return a red child of i (or 0 if no such child)"""
+        for child in (self._left[i], self._right[i]):
+            if self._red[child]:
+                return child
+        return 0
+
+    def _is_red_leaf(self, i):
+        return self._red[i] and not self._left[i] and not self._right[i]
+
+    # support for insertion
+    def _rebalance_insert(self, i):
+        red, left, right = self._red, self._left, self._right
+        while i != self._root:
+            parent = self._parent[i]
+            if not red[parent]:
+                return
+            # double red problem
+            uncle = self._sibling(parent)
+            if not red[uncle]:
+                middle = self._restructure(i)
+                red[middle] = 0
+                red[left[middle]] = red[right[middle]] = 1
+                return
+            grand = self._parent[parent]
+            red[grand] = 1
+            red[left[grand]] = red[right[grand]] = 0
+            # continue at red grandparent
+            i = grand
+        red[i] = 0
+
+    # support for deletions
+    def _rebalance_delete(self, i):
+        red, left, right = self._red, self._left, self._right
+        if self._size == 1:
+            # special case: ensure that root is black
+            red[self._root] = 0
+        elif i:
+            if bool(left[i]) != bool(right[i]):
+                # deficit exists unless child is red leaf
+                child = left[i] or right[i]
+                if not self._is_red_leaf(child):
+                    self._fix_deficit(i, child)
+            elif left[i]:
+                # removed black node with red child
+                if self._is_red_leaf(left[i]):
+                    red[left[i]] = 0
+                else:
+                    red[right[i]] = 0
+
+    def _fix_deficit(self, z, y):
+        """Resolve black deficit at z, where y is the root of z's heavier
+        subtree"""
+        red = self._red
+        while True:
+            if not red[y]:
+                x = self._red_child(y)
+                if x:
+                    old_color = red[z]
+                    middle = self._restructure(x)
+                    red[middle] = old_color
+                    red[self._left[middle]] = red[self._right[middle]] = 0
+                    return
+                red[y] = 1
+                if red[z]:
+                    red[z] = 0
+                    return
+                if z == self._root:
+                    return
+                z, y = self._parent[z], self._sibling(z)
+            else:
+                self._rotate(y)
+                red[y] = 0
+                red[z] = 1
+                y = self._left[z] if z == self._right[y] else self._right[z]
@@ -0,0 +1,347 @@
+from bisect import bisect_left, bisect_right
+
+from toydata.Maps import MapBase, _check_sorted, _sort_pairs
+
+
+class BPlusTreeMap(MapBase):
+    """Sorted map implementation using a B+-tree.
+
+    All items live in the leaves, each holding up to `order` keys in a
+    sorted list with a parallel list of values; leaves are linked both
+    ways, so iteration and range scans walk whole lists of keys instead of
+    single nodes. Internal nodes hold up to `order` children and the
+    separating keys, children[i] holding keys k with
+    keys[i - 1] <= k < keys[i].
+
+    Space complexity: O(n)
+    Time complexity:
+    find_range: O(s + log n)
+    iter, reversed: O(n)
+    others: O(log n), with h = log_{order / 2}(n) levels of bisect searches
+    """
+
+    class _Leaf:
+        """Node holding items, linked to the neighbouring leaves"""
+
+        __slots__ = "_keys", "_values", "_prev", "_next"
+
+        def __init__(self, keys, values):
+            self._keys = keys
+            self._values = values
+            self._prev = None
+            self._next = None
+
+    class _Internal:
+        """Node holding separating keys and children"""
+
+        __slots__ = "_keys", "_children"
+
+        def __init__(self, keys, children):
+            self._keys = keys
+            self._children = children
+
+    def __init__(self, order=64):
+        """Create an empty map whose nodes hold up to order entries"""
+        if order < 3:
+            raise ValueError("order must be at least 3")
+        self._order = order
+        # nodes other than the root never get below this many entries
+        self._min = (order + 1) // 2
+        self._root = self._head = self._tail = self._Leaf([], [])
+        # number of internal levels above the leaves
+        self._height = 0
+        self._size = 0
+
+    # nonpublic behaviors
+    def _find_leaf(self, k):
+        """Return the leaf whose range covers key k"""
+        node = self._root
+        for _ in range(self._height):
+            node = node._children[bisect_right(node._keys, k)]
+        return node
+
+    def _find_path(self, k):
+        """Return (leaf covering key k, list of (node, child index) above it)"""
+        path = []
+        node = self._root
+        for _ in range(self._height):
+            i = bisect_right(node._keys, k)
+            path.append((node, i))
+            node = node._children[i]
+        return node, path
+
+    def _link(self, left, right):
+        """Link leaf right just after leaf left"""
+        right._prev = left
+        right._next = left._next
+        if left._next is None:
+            self._tail = right
+        else:
+            left._next._prev = right
+        left._next = right
+
+    def _unlink(self, leaf):
+        """Take an emptied leaf out of the leaf list"""
+        leaf._prev._next = leaf._next
+        if leaf._next is None:
+            self._tail = leaf._prev
+        else:
+            leaf._next._prev = leaf._prev
+
+    def _split(self, node):
+        """Split an overfull node in two; return (separating key, new right
+        node)"""
+        if isinstance(node, self._Leaf):
+            mid = len(node._keys) // 2
+            right = self._Leaf(node._keys[mid:], node._values[mid:])
+            del node._keys[mid:]
+            del node._values[mid:]
+            self._link(node, right)
+            return right._keys[0], right
+        mid = len(node._children) // 2
+        separator = node._keys[mid - 1]
+        right = self._Internal(node._keys[mid:], node._children[mid:])
+        del node._keys[mid - 1 :]
+        del node._children[mid:]
+        return separator, right
+
+    def _fix_underflow(self, parent, i):
+        """Refill child i of parent from a sibling, merging the two when
+        they fit in one node"""
+        # the sibling to the left, or the right one for the first child
+        s = i - 1 if i > 0 else 0
+        left, right = parent._children[s], parent._children[s + 1]
+        if isinstance(left, self._Leaf):
+            if len(left._keys) + len(right._keys) <= self._order:
+                left._keys += right._keys
+                left._values += right._values
+                self._unlink(right)
+                del parent._keys[s]
+                del parent._children[s + 1]
+                return
+            keys = left._keys + right._keys
+            values = left._values + right._values
+            half = len(keys) // 2
+            left._keys, right._keys = keys[:half], keys[half:]
+            left._values, right._values = values[:half], values[half:]
+            parent._keys[s] = right._keys[0]
+            return
+        # the separator moves down between the children of both nodes
+        keys = left._keys + [parent._keys[s]] + right._keys
+        children = left._children + right._children
+        if len(children) <= self._order:
+            left._keys, left._children = keys, children
+            del parent._keys[s]
+            del parent._children[s + 1]
+            return
+        half = len(children) // 2
+        left._keys, left._children = keys[: half - 1], children[:half]
+        parent._keys[s] = keys[half - 1]
+        right._keys, right._children = keys[half:], children[half:]
+
+    # public behaviors
+    @classmethod
+    def from_sorted(cls, pairs, order=64):
+        """Return map of (key, value) pairs given in increasing key order.
+
+        Packs the leaves and every level above them in O(n), with nodes
+        filled evenly up to order entries; raise ValueError if keys are
+        not strictly increasing.
+        """
+        t = cls(order)
+        pairs = list(_check_sorted(pairs))
+        if not pairs:
+            return t
+        leaves = []
+        for low, high in _chunks(len(pairs), order):
+            leaf = cls._Leaf(
+                [k for k, _ in pairs[low:high]], [v for _, v in pairs[low:high]]
+            )
+            if leaves:
+                leaves[-1]._next = leaf
+                leaf._prev = leaves[-1]
+            leaves.append(leaf)
+        t._head, t._tail = leaves[0], leaves[-1]
+        level = leaves
+        # minimum key below each node of level
+        lows = [leaf._keys[0] for leaf in leaves]
+        while len(level) > 1:
+            parents, parent_lows = [], []
+            for low, high in _chunks(len(level), order):
+                parents.append(cls._Internal(lows[low + 1 : high], level[low:high]))
+                parent_lows.append(lows[low])
+            level, lows = parents, parent_lows
+            t._height += 1
+        t._root = level[0]
+        t._size = len(pairs)
+        return t
+
+    @classmethod
+    def from_unsorted(cls, pairs, order=64):
+        """Return map of (key, value) pairs in any order.
+
+        Sorts once in O(n log n); of duplicate keys the last value wins.
+        """
+        return cls.from_sorted(_sort_pairs(pairs), order)
+
+    def __len__(self):
+        """Return number of items in the map"""
+        return self._size
+
+    def __getitem__(self, k):
+        """Return value associated with key k
+        (raise KeyError if not found)"""
+        leaf = self._find_leaf(k)
+        j = bisect_left(leaf._keys, k)
+        if j == len(leaf._keys) or leaf._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        return leaf._values[j]
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present"""
+        leaf, path = self._find_path(k)
+        j = bisect_left(leaf._keys, k)
+        if j < len(leaf._keys) and leaf._keys[j] == k:
+            leaf._values[j] = v
+            return
+        leaf._keys.insert(j, k)
+        leaf._values.insert(j, v)
+        self._size += 1
+        if len(leaf._keys) <= self._order:
+            return
+        # split overfull nodes upwards
+        separator, right = self._split(leaf)
+        while path:
+            parent, i = path.pop()
+            parent._keys.insert(i, separator)
+            parent._children.insert(i + 1, right)
+            if len(parent._children) <= self._order:
+                return
+            separator, right = self._split(parent)
+        self._root = self._Internal([separator], [self._root, right])
+        self._height += 1
+
+    def __delitem__(self, k):
+        """Remove item associated with key k
+        (raise KeyError if not found)"""
+        leaf, path = self._find_path(k)
+        j = bisect_left(leaf._keys, k)
+        if j == len(leaf._keys) or leaf._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        del leaf._keys[j]
+        del leaf._values[j]
+        self._size -= 1
+        # refill underfull nodes upwards
+        entries = len(leaf._keys)
+        while path and entries < self._min:
+            parent, i = path.pop()
+            self._fix_underflow(parent, i)
+            entries = len(parent._children)
+        if self._height and len(self._root._children) == 1:
+            self._root = self._root._children[0]
+            self._height -= 1
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum"""
+        leaf = self._head
+        while leaf is not None:
+            yield from leaf._keys
+            leaf = leaf._next
+
+    def __reversed__(self):
+        """Generate keys of the map ordered from maximum to minimum"""
+        leaf = self._tail
+        while leaf is not None:
+            yield from reversed(leaf._keys)
+            leaf = leaf._prev
+
+    def first(self):
+        """Return (key, value) pair with minimum key(or None if empty)"""
+        return self.find_min()
+
+    def last(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        return self.find_max()
+
+    def find_min(self):
+        """Return (key, value) pair with minimum key(or None if empty)"""
+        if self._size == 0:
+            return None
+        return (self._head._keys[0], self._head._values[0])
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        if self._size == 0:
+            return None
+        return (self._tail._keys[-1], self._tail._values[-1])
+
+    def find_ge(self, k):
+        """Return (key, value) pair with least key greater than or
+        equal to k"""
+        leaf = self._find_leaf(k)
+        j = bisect_left(leaf._keys, k)
+        if j == len(leaf._keys):
+            leaf, j = leaf._next, 0
+            if leaf is None:
+                return None
+        return (leaf._keys[j], leaf._values[j])
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than k"""
+        leaf = self._find_leaf(k)
+        j = bisect_right(leaf._keys, k)
+        if j == len(leaf._keys):
+            leaf, j = leaf._next, 0
+            if leaf is None:
+                return None
+        return (leaf._keys[j], leaf._values[j])
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than k"""
+        leaf = self._find_leaf(k)
+        j = bisect_left(leaf._keys, k)
+        if j == 0:
+            leaf = leaf._prev
+            if leaf is None:
+                return None
+            j = len(leaf._keys)
+        return (leaf._keys[j - 1], leaf._values[j - 1])
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than or
+        equal to k"""
+        leaf = self._find_leaf(k)
+        j = bisect_right(leaf._keys, k)
+        if j == 0:
+            leaf = leaf._prev
+            if leaf is None:
+                return None
+            j = len(leaf._keys)
+        return (leaf._keys[j - 1], leaf._values[j - 1])
+
+    def find_range(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop.
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        if start is None:
+            leaf, j = self._head, 0
+        else:
+            leaf = self._find_leaf(start)
+            j = bisect_left(leaf._keys, start)
+        while leaf is not None:
+            keys = leaf._keys
+            end = len(keys) if stop is None else bisect_left(keys, stop, j)
+            for i in range(j, end):
+                yield (keys[i], leaf._values[i])
+            if end < len(keys):
+                return
+            leaf, j = leaf._next, 0
+
+
+def _chunks(n, size):
+    """Return (low, high) bounds cutting range(n) into the fewest evenly
+    filled pieces of at most size"""
+    count = -(-n // size)
+    bounds = [n * i // count for i in range(count + 1)]
+    return list(zip(bounds, bounds[1:]))
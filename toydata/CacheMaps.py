@@ -0,0 +1,328 @@
+from time import monotonic
+
+from toydata.Maps import ChainHashMap, MapBase
+from toydata.PositionalList import _DoublyLinkedBase
+from toydata.PriorityQueue import HeapPriorityQueue
+
+
+class _LinkedItems(_DoublyLinkedBase):
+    """Doubly linked list of cache items, most recently used first.
+
+    Nodes are relinked rather than recreated, so the hash map index of a
+    cache can keep pointing at the same node for the life of an entry.
+    """
+
+    def _add_first(self, e):
+        """Add element e at the front and return its node"""
+        return self._insert_between(e, self._header, self._header._next)
+
+    def _unlink(self, node):
+        """Take node out of the list, keeping it usable"""
+        node._prev._next = node._next
+        node._next._prev = node._prev
+        self._size -= 1
+
+    def _link_first(self, node):
+        """Put an unlinked node at the front of the list"""
+        node._prev = self._header
+        node._next = self._header._next
+        self._header._next._prev = node
+        self._header._next = node
+        self._size += 1
+
+    def _last_node(self):
+        """Return the least recently used node(or None if empty)"""
+        return self._tailer._prev if self._size else None
+
+    def __iter__(self):
+        node = self._header._next
+        while node is not self._tailer:
+            yield node._element
+            node = node._next
+
+
+class CacheMapBase(MapBase):
+    """Base class for bounded cache maps counting hits and misses.
+
+    A lookup through [] or get() counts as a hit or a miss and refreshes
+    the entry according to the eviction policy; `k in cache` does neither.
+    """
+
+    def __init__(self, maxsize=128):
+        """Create an empty cache holding at most maxsize entries"""
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self._maxsize = maxsize
+        # key -> node (or item) of the entry
+        self._index = ChainHashMap()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, k):
+        try:
+            self._index[k]
+        except KeyError:
+            return False
+        return True
+
+    def __str__(self):
+        return " ".join(f"({k}:{self._peek(k)})" for k in self)
+
+    def _peek(self, k):
+        """Return value of key k without touching hit counters or order"""
+        return self._index[k]._element._value
+
+    def cache_info(self):
+        """Return dict with hits, misses, maxsize and current size"""
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "maxsize": self._maxsize,
+            "currsize": len(self),
+        }
+
+    def cache_clear(self):
+        """Remove every entry and reset the counters"""
+        for k in list(self):
+            del self[k]
+        self._hits = self._misses = 0
+
+
+class LRUCacheMap(CacheMapBase):
+    """Cache map evicting the least recently used entry.
+
+    A hash map indexes the nodes of a doubly linked recency list, so get
+    and put are O(1).
+    """
+
+    def __init__(self, maxsize=128):
+        super().__init__(maxsize)
+        self._order = _LinkedItems()
+
+    def __getitem__(self, k):
+        try:
+            node = self._index[k]
+        except KeyError:
+            self._misses += 1
+            raise
+        self._hits += 1
+        self._order._unlink(node)
+        self._order._link_first(node)
+        return node._element._value
+
+    def __setitem__(self, k, v):
+        try:
+            node = self._index[k]
+        except KeyError:
+            if len(self._index) == self._maxsize:
+                victim = self._order._last_node()
+                del self._index[victim._element._key]
+                self._order._delete_node(victim)
+            self._index[k] = self._order._add_first(self._Item(k, v))
+            return
+        node._element._value = v
+        self._order._unlink(node)
+        self._order._link_first(node)
+
+    def __delitem__(self, k):
+        node = self._index[k]
+        del self._index[k]
+        self._order._delete_node(node)
+
+    def __iter__(self):
+        """Generate keys from most to least recently used"""
+        for item in self._order:
+            yield item._key
+
+
+class LFUCacheMap(CacheMapBase):
+    """Cache map evicting the least frequently used entry.
+
+    Entries are kept in one recency list per use count, so get and put are
+    O(1); ties between equally used entries go to the least recent one.
+    """
+
+    class _Item(MapBase._Item):
+        __slots__ = "_count"
+
+        def __init__(self, k, v):
+            super().__init__(k, v)
+            self._count = 1
+
+    def __init__(self, maxsize=128):
+        super().__init__(maxsize)
+        # use count -> _LinkedItems holding the entries used that often
+        self._buckets = ChainHashMap()
+        self._min_count = 0
+
+    def _bucket(self, count):
+        """Return recency list of entries used count times, creating it"""
+        try:
+            return self._buckets[count]
+        except KeyError:
+            bucket = self._buckets[count] = _LinkedItems()
+            return bucket
+
+    def _touch(self, node):
+        """Move node to the list of the next use count"""
+        item = node._element
+        bucket = self._buckets[item._count]
+        bucket._unlink(node)
+        if bucket.is_empty():
+            del self._buckets[item._count]
+            if self._min_count == item._count:
+                self._min_count += 1
+        item._count += 1
+        self._bucket(item._count)._link_first(node)
+
+    def __getitem__(self, k):
+        try:
+            node = self._index[k]
+        except KeyError:
+            self._misses += 1
+            raise
+        self._hits += 1
+        self._touch(node)
+        return node._element._value
+
+    def __setitem__(self, k, v):
+        try:
+            node = self._index[k]
+        except KeyError:
+            if len(self._index) == self._maxsize:
+                bucket = self._buckets[self._min_count]
+                victim = bucket._last_node()
+                del self._index[victim._element._key]
+                bucket._delete_node(victim)
+                if bucket.is_empty():
+                    del self._buckets[self._min_count]
+            self._index[k] = self._bucket(1)._add_first(self._Item(k, v))
+            self._min_count = 1
+            return
+        node._element._value = v
+        self._touch(node)
+
+    def __delitem__(self, k):
+        node = self._index[k]
+        del self._index[k]
+        count = node._element._count
+        bucket = self._buckets[count]
+        bucket._delete_node(node)
+        if bucket.is_empty():
+            del self._buckets[count]
+            if count == self._min_count:
+                # rare, so a scan over the distinct counts is fine
+                self._min_count = min(self._buckets, default=0)
+
+    def __iter__(self):
+        """Generate keys from least to most frequently used"""
+        for count in sorted(self._buckets):
+            for item in reversed(list(self._buckets[count])):
+                yield item._key
+
+    def use_count(self, k):
+        """Return how many times key k has been set or looked up"""
+        return self._index[k]._element._count
+
+
+class TTLCacheMap(CacheMapBase):
+    """Cache map whose entries expire ttl seconds after they were set.
+
+    Expiry times are kept in a HeapPriorityQueue; overwritten entries leave
+    stale heap records behind that are skipped when they reach the top.
+    When maxsize is reached, the entry closest to expiry is evicted.
+    """
+
+    class _Item(MapBase._Item):
+        __slots__ = "_expires"
+
+        def __init__(self, k, v, expires):
+            super().__init__(k, v)
+            self._expires = expires
+
+    def __init__(self, ttl, maxsize=None, timer=monotonic):
+        """Create an empty cache; timer returns the current time in seconds"""
+        super().__init__(maxsize)
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self._ttl = ttl
+        self._timer = timer
+        # (expiry time, key) records, possibly stale
+        self._expiry = HeapPriorityQueue()
+
+    def _peek(self, k):
+        return self._index[k]._value
+
+    def _pop_expiry(self):
+        """Remove the earliest heap record and return its live item, if any"""
+        expires, k = self._expiry.remove_min()
+        try:
+            item = self._index[k]
+        except KeyError:
+            return None
+        return item if item._expires == expires else None
+
+    def expire(self):
+        """Remove every expired entry"""
+        now = self._timer()
+        while not self._expiry.is_empty() and self._expiry.min()[0] <= now:
+            item = self._pop_expiry()
+            if item is not None:
+                del self._index[item._key]
+
+    def __len__(self):
+        self.expire()
+        return len(self._index)
+
+    def __contains__(self, k):
+        try:
+            item = self._index[k]
+        except KeyError:
+            return False
+        return item._expires > self._timer()
+
+    def __getitem__(self, k):
+        try:
+            item = self._index[k]
+        except KeyError:
+            self._misses += 1
+            raise
+        if item._expires <= self._timer():
+            del self._index[k]
+            self._misses += 1
+            raise KeyError("Key Error: " + repr(k))
+        self._hits += 1
+        return item._value
+
+    def __setitem__(self, k, v):
+        self.expire()
+        expires = self._timer() + self._ttl
+        try:
+            item = self._index[k]
+        except KeyError:
+            while len(self._index) == self._maxsize:
+                victim = self._pop_expiry()
+                if victim is not None:
+                    del self._index[victim._key]
+            self._index[k] = self._Item(k, v, expires)
+        else:
+            item._value = v
+            item._expires = expires
+        self._expiry.add(expires, k)
+        # drop stale records once they outnumber the live ones
+        if len(self._expiry) > 2 * len(self._index) + 16:
+            self._expiry = HeapPriorityQueue()
+            for item in self._index.values():
+                self._expiry.add(item._expires, item._key)
+
+    def __delitem__(self, k):
+        del self._index[k]
+
+    def __iter__(self):
+        """Generate keys of the entries that have not expired"""
+        self.expire()
+        for k in list(self._index):
+            yield k
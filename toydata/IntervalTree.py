@@ -0,0 +1,94 @@
+from toydata.SearchTree import RedBlackTreeMap
+
+
+class IntervalTreeMap(RedBlackTreeMap):
+    """Map from half-open intervals [start, end) to values, answering
+    overlap and stabbing queries.
+
+    Keys are (start, end) pairs ordered as tuples, so the tree is a
+    red-black tree on start points. Every node also keeps the greatest end
+    point in its subtree, recomputed through the _augment hook on every
+    rotation, insertion and deletion; a query skips each subtree whose
+    greatest end is not past the query.
+
+    Time complexity:
+    overlap, stab: O(min(n, (k + 1) log n)) for k results
+    others: as for RedBlackTreeMap
+    """
+
+    class _Node(RedBlackTreeMap._Node):
+        """Node class keeping the greatest end point of its subtree"""
+
+        __slots__ = "_high"
+
+        def __init__(self, element, parent=None, left=None, right=None):
+            super().__init__(element, parent, left, right)
+            self._high = element._key[1]
+
+    def _augment(self, node):
+        super()._augment(node)
+        high = node._element._key[1]
+        if node._left is not None and node._left._high > high:
+            high = node._left._high
+        if node._right is not None and node._right._high > high:
+            high = node._right._high
+        node._high = high
+
+    def _search_intervals(self, low, high, closed):
+        """Generate (interval, value) pairs with end > low and start < high
+        (start <= high if closed), in key order"""
+        stack = []
+        node = self._root
+        while True:
+            # subtrees ending at or before low hold no match
+            while node is not None and node._high > low:
+                stack.append(node)
+                node = node._left
+            if not stack:
+                return
+            node = stack.pop()
+            item = node._element
+            start, end = item._key
+            if high < start or (start == high and not closed):
+                # every later interval starts even later
+                return
+            if low < end:
+                yield (item._key, item._value)
+            node = node._right
+
+    def __setitem__(self, k, v):
+        """Assign value v to interval k = (start, end), start < end"""
+        start, end = k
+        if not start < end:
+            raise ValueError("interval must have start < end")
+        super().__setitem__((start, end), v)
+
+    @classmethod
+    def from_sorted(cls, pairs, **options):
+        """Return map of (interval, value) pairs given in increasing order.
+
+        Raise ValueError if intervals are not strictly increasing or one
+        does not have start < end. from_unsorted sorts and comes here too.
+        """
+        return super().from_sorted(_check_intervals(pairs), **options)
+
+    def overlap(self, start, stop):
+        """Iterate all (interval, value) pairs whose interval overlaps
+        [start, stop), ordered by interval; none if stop <= start"""
+        if not start < stop:
+            return iter(())
+        return self._search_intervals(start, stop, False)
+
+    def stab(self, point):
+        """Iterate all (interval, value) pairs whose interval contains
+        point, ordered by interval"""
+        return self._search_intervals(point, point, True)
+
+
+def _check_intervals(pairs):
+    """Generate (interval, value) pairs, raising ValueError unless every
+    interval has start < end"""
+    for (start, end), v in pairs:
+        if not start < end:
+            raise ValueError("interval must have start < end")
+        yield (start, end), v
@@ -1,6 +1,16 @@
+import mmap
+import pickle
+import struct
+import sys
+
 from abc import ABCMeta, abstractmethod
-from collections.abc import MutableMapping
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, MutableMapping
+from operator import itemgetter
 from random import randrange
+from threading import Lock
+from time import perf_counter
 
 
 class MapBase(MutableMapping):
@@ -36,65 +46,109 @@ class MapBase(MutableMapping):
 class UnsortedTableMap(MapBase):
     """
     Map implementation using an unsorted list.
+
+    Keys and values are kept in two parallel lists, so a lookup is a single
+    scan over the keys. This is the fast path for the small maps used as
+    ChainHashMap buckets.
     """
 
-    def __init__(self):
-        """Create an empty map."""
-        self._table = []
+    def __init__(self, move_to_front=False):
+        """Create an empty map.
+
+        If move_to_front is True, every successful lookup moves its key to
+        the front of the table, so frequently used keys are found first.
+        """
+        self._keys = []
+        self._values = []
+        self._move_to_front = move_to_front
 
     def __str__(self):
-        if not self._table:
+        if not self._keys:
             return "Empty"
         s = ""
-        for item in self._table:
-            s += f"|{str(item)}|".center(5)
+        for k, v in zip(self._keys, self._values):
+            s += f"|({k}:{v})|".center(5)
             s += "\n"
         # remove the last '\n'
         s = s.rstrip()
         return s
 
+    def _find_index(self, k):
+        """Return index of key k in the table, or -1 if not found."""
+        try:
+            # list.index compares at C speed
+            return self._keys.index(k)
+        except ValueError:
+            return -1
+
     def __getitem__(self, k):
         """
         Return value associated with key k
         (raise KeyError if not found)
         """
-        for item in self._table:
-            if k == item._key:
-                return item._value
+        j = self._find_index(k)
+        if j < 0:
             raise KeyError("Key Error: " + repr(k))
+        if j and self._move_to_front:
+            self._keys.insert(0, self._keys.pop(j))
+            self._values.insert(0, self._values.pop(j))
+            j = 0
+        return self._values[j]
 
     def __setitem__(self, k, v):
         """Assign value v to key k,
         overwriting existing value if present."""
-        for item in self._table:
-            if k == item._key:
-                item._value = v
-                return
-        self._table.append(self._Item(k, v))
+        j = self._find_index(k)
+        if j < 0:
+            self._keys.append(k)
+            self._values.append(v)
+        else:
+            self._values[j] = v
 
     def __delitem__(self, k):
         """
         Remove item associated with key k
         (raise KeyError if not found).
         """
-        for j in range(len(self._table)):
-            if k == self._table[j]._key:
-                self._table.pop(j)
-            return
-        raise KeyError("Key Error: " + repr(k))
+        j = self._find_index(k)
+        if j < 0:
+            raise KeyError("Key Error: " + repr(k))
+        self._keys.pop(j)
+        self._values.pop(j)
 
     def __len__(self):
         """
         Return number of items in the map.
         """
-        return len(self._table)
+        return len(self._keys)
 
     def __iter__(self):
         """
         Generate iteration of the map's keys.
         """
-        for item in self._table:
-            yield (item._key, item._value)
+        for k in self._keys:
+            yield k
+
+
+class HashMapStats:
+    """Traffic counters of a hash map, see HashMapBase.enable_stats()."""
+
+    __slots__ = "_probes", "_resizes", "_resize_time"
+
+    def __init__(self):
+        # probe length -> number of lookups
+        self._probes = {}
+        self._resizes = 0
+        self._resize_time = 0.0
+
+    def probed(self, n):
+        """Record a lookup that examined n slots or chained items"""
+        self._probes[n] = self._probes.get(n, 0) + 1
+
+    def resized(self, seconds):
+        """Record a resize of the table that took the given time"""
+        self._resizes += 1
+        self._resize_time += seconds
 
 
 class HashMapBase(MapBase, metaclass=ABCMeta):
@@ -113,6 +167,8 @@ class HashMapBase(MapBase, metaclass=ABCMeta):
         self._scale = 1 + randrange(p - 1)
         # shift from 0 to p-1 for MAD
         self._shift = randrange(p)
+        # HashMapStats while instrumentation is enabled
+        self._stats = None
 
     def _hash_function(self, k):
         return (hash(k) * self._scale + self._shift) % self._prime % len(self._table)
@@ -143,6 +199,8 @@ class HashMapBase(MapBase, metaclass=ABCMeta):
 
     def __getitem__(self, k):
         j = self._hash_function(k)
+        if self._stats is not None:
+            self._stats.probed(self._probe_length(j, k))
         return self._bucket_getitem(j, k)
 
     def __setitem__(self, k, v):
@@ -150,17 +208,295 @@ class HashMapBase(MapBase, metaclass=ABCMeta):
         self._bucket_setitem(j, k, v)
         if self._n > len(self._table) // 2:
             # number 2*x-1 is often prime
-            self._resize(2 * len(self._table) - 1)
+            if self._stats is None:
+                self._resize(2 * len(self._table) - 1)
+            else:
+                start = perf_counter()
+                self._resize(2 * len(self._table) - 1)
+                self._stats.resized(perf_counter() - start)
 
     def __delitem__(self, k):
         j = self._hash_function(k)
         self._bucket_delitem(j, k)
         self._n -= 1
 
+    # nonpublic hooks for instrumentation, only called with stats enabled
+    def _probe_length(self, j, k):
+        """Return number of slots or chained items a lookup of k examines."""
+        return 1
+
+    def _chain_lengths(self):
+        """Generate the length of every chain (or probe cluster) in the table."""
+        for slot in self._table:
+            yield 0 if slot is None else 1
+
+    def _tombstones(self):
+        """Return number of slots holding a deletion marker."""
+        return 0
+
+    def _capacity(self):
+        """Return total number of slots."""
+        return len(self._table)
+
+    def enable_stats(self):
+        """
+        Start collecting probe lengths of lookups and resize events.
+
+        While stats are disabled (the default) the only cost is one
+        attribute check per lookup and per resize.
+        """
+        self._stats = HashMapStats()
+
+    def disable_stats(self):
+        """Stop collecting and discard the counters"""
+        self._stats = None
+
+    def stats(self):
+        """
+        Return a dict describing the table and the traffic it has seen.
+
+        The table part (load factor, chain length histogram, tombstone
+        ratio) is computed from the current layout. The traffic part (probe
+        length histogram of lookups, resize count and seconds spent
+        resizing) covers the time since enable_stats(), and is zero while
+        stats are disabled.
+        """
+        capacity = self._capacity()
+        chains = {}
+        for length in self._chain_lengths():
+            chains[length] = chains.get(length, 0) + 1
+        counters = self._stats if self._stats is not None else HashMapStats()
+        lookups = sum(counters._probes.values())
+        probes = sum(n * count for n, count in counters._probes.items())
+        return {
+            "size": len(self),
+            "capacity": capacity,
+            "load_factor": len(self) / capacity if capacity else 0.0,
+            "chain_histogram": dict(sorted(chains.items())),
+            "tombstone_ratio": self._tombstones() / capacity if capacity else 0.0,
+            "lookups": lookups,
+            "probe_histogram": dict(sorted(counters._probes.items())),
+            "mean_probes": probes / lookups if lookups else 0.0,
+            "max_probes": max(counters._probes, default=0),
+            "resizes": counters._resizes,
+            "resize_time": counters._resize_time,
+        }
+
+    # snapshot layout: header, metadata, slot offsets, slot records
+    _MAGIC = b"TDHM"
+    _VERSION = 1
+    _HEADER = struct.Struct("<4sBqQQQQI")
+    # hash() of this string changes when the interpreter's hash seed does
+    _HASH_CHECK = "toydata.Maps"
+
+    # nonpublic hooks describing the table layout for save/load
+    def _layout(self):
+        """Return (tables, params): slot lists and extra state to save."""
+        return ([self._table], {})
+
+    def _restore_layout(self, tables, params):
+        """Install slot tables (lists or _MappedTable) and extra state."""
+        self._table = tables[0]
+
+    def _slot_record(self, slot):
+        """Return picklable record of a nonempty slot."""
+        return (slot._key, slot._value)
+
+    def _slot_from_record(self, record):
+        """Rebuild a slot from its record."""
+        return self._Item(*record)
+
+    def _rebuild(self):
+        """Rehash every key, used when hash() changed since the save."""
+        self._resize(len(self._table))
+
+    def save(self, path):
+        """
+        Write the table layout of the map to the file at path.
+
+        The file keeps the capacity, the MAD parameters and every slot in
+        place, so load() restores the map without rehashing any key. Keys
+        and values must be picklable.
+        """
+        tables, params = self._layout()
+        meta = pickle.dumps(
+            {
+                "class": type(self).__name__,
+                "tables": [len(table) for table in tables],
+                "params": params,
+            }
+        )
+        offsets = array("Q", bytes(8 * sum(len(table) for table in tables)))
+        with open(path, "wb") as f:
+            f.write(
+                self._HEADER.pack(
+                    self._MAGIC,
+                    self._VERSION,
+                    hash(self._HASH_CHECK),
+                    self._n,
+                    self._prime,
+                    self._scale,
+                    self._shift,
+                    len(meta),
+                )
+            )
+            f.write(meta)
+            offsets_at = f.tell()
+            f.write(offsets.tobytes())
+            # offset 0 marks an empty slot
+            j = 0
+            for table in tables:
+                for slot in table:
+                    if slot is not None:
+                        offsets[j] = f.tell()
+                        f.write(pickle.dumps(self._slot_record(slot)))
+                    j += 1
+            if sys.byteorder == "big":
+                offsets.byteswap()
+            f.seek(offsets_at)
+            f.write(offsets.tobytes())
+
+    @classmethod
+    def load(cls, path, mapped=False):
+        """
+        Return the map saved at path by save().
+
+        With mapped=True the file is memory-mapped and slots are decoded on
+        access, returning a read-only MappedHashMap whose pages can be
+        shared by every process mapping the same file. Records are pickled,
+        so only load files you trust.
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        try:
+            magic, version, hash_check, n, p, scale, shift, size = (
+                cls._HEADER.unpack_from(view)
+            )
+            if magic != cls._MAGIC or version != cls._VERSION:
+                raise ValueError(f"{path!r} is not a saved hash map")
+            start = cls._HEADER.size
+            meta = pickle.loads(view[start : start + size])
+            if meta["class"] != cls.__name__:
+                raise ValueError(
+                    f"{path!r} holds a {meta['class']}, not a {cls.__name__}"
+                )
+            rehash = hash_check != hash(cls._HASH_CHECK)
+            if rehash and mapped:
+                raise ValueError(
+                    "hash seed differs from the saving process, "
+                    "set PYTHONHASHSEED to map this file"
+                )
+            m = cls.__new__(cls)
+            m._n, m._prime, m._scale, m._shift = n, p, scale, shift
+            m._stats = None
+            start += size
+            tables = []
+            for length in meta["tables"]:
+                tables.append(_MappedTable(view, start, length, m._slot_from_record))
+                start += 8 * length
+            m._restore_layout(tables, meta["params"])
+            if not mapped:
+                # decode every slot while the file is still mapped
+                m._restore_layout([list(table) for table in tables], meta["params"])
+        except BaseException:
+            view.release()
+            buffer.close()
+            raise
+        if mapped:
+            return MappedHashMap(m, view, buffer)
+        view.release()
+        buffer.close()
+        if rehash:
+            m._rebuild()
+        return m
+
+
+class _MappedTable:
+    """Read-only slot table decoding the records of a saved map on access."""
+
+    __slots__ = "_view", "_start", "_length", "_decode", "_last_j", "_last"
+
+    def __init__(self, view, start, length, decode):
+        self._view = view
+        # position of the first slot offset
+        self._start = start
+        self._length = length
+        self._decode = decode
+        # probing reads the same slot several times in a row
+        self._last_j = -1
+        self._last = None
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, j):
+        if j == self._last_j:
+            return self._last
+        if not 0 <= j < self._length:
+            raise IndexError("slot index out of range")
+        offset = struct.unpack_from("<Q", self._view, self._start + 8 * j)[0]
+        slot = None
+        if offset:
+            # pickle ignores the bytes following the record
+            slot = self._decode(pickle.loads(self._view[offset:]))
+        self._last_j, self._last = j, slot
+        return slot
+
+    def __setitem__(self, j, slot):
+        raise TypeError("memory-mapped hash map is read-only")
+
+    def __iter__(self):
+        for j in range(self._length):
+            yield self[j]
+
+
+class MappedHashMap(Mapping):
+    """
+    Read-only view of a hash map memory-mapped by HashMapBase.load().
+
+    Lookups run the map's own probing logic over the file, decoding only
+    the slots they touch. Call close() (or use a with block) to unmap.
+    """
+
+    def __init__(self, m, view, buffer):
+        self._map = m
+        self._view = view
+        self._buffer = buffer
+
+    def __getitem__(self, k):
+        return self._map[k]
+
+    def __iter__(self):
+        return iter(self._map)
+
+    def __len__(self):
+        return len(self._map)
+
+    def close(self):
+        """Release the memory mapping"""
+        if not self._buffer.closed:
+            self._view.release()
+            self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 
 class ChainHashMap(HashMapBase):
     """Hash map implemented with seperate chaining for collision resolution"""
 
+    def __init__(self, cap=4, p=10945121, move_to_front=False):
+        """Create an empty hash map.
+
+        move_to_front is passed on to the UnsortedTableMap buckets.
+        """
+        super().__init__(cap, p)
+        self._move_to_front = move_to_front
+
     def __str__(self):
         N = len(self._table)
         s = ""
@@ -186,7 +522,7 @@ class ChainHashMap(HashMapBase):
     def _bucket_setitem(self, j, k, v):
         if self._table[j] is None:
             # bucket is new to the table
-            self._table[j] = UnsortedTableMap()
+            self._table[j] = UnsortedTableMap(self._move_to_front)
         oldsize = len(self._table[j])
         self._table[j][k] = v
         if len(self._table[j]) > oldsize:
@@ -197,6 +533,8 @@ class ChainHashMap(HashMapBase):
         if bucket is None:
             raise KeyError("Key Error: " + repr(k))
         del bucket[k]
+        if not bucket:
+            self._table[j] = None
 
     def __iter__(self):
         for bucket in self._table:
@@ -204,13 +542,38 @@ class ChainHashMap(HashMapBase):
                 for key in list(bucket):
                     yield key
 
+    def _probe_length(self, j, k):
+        bucket = self._table[j]
+        if bucket is None:
+            return 0
+        i = bucket._find_index(k)
+        return i + 1 if i >= 0 else len(bucket)
+
+    def _chain_lengths(self):
+        for bucket in self._table:
+            yield 0 if bucket is None else len(bucket)
+
+    def _layout(self):
+        return ([self._table], {"move_to_front": self._move_to_front})
+
+    def _restore_layout(self, tables, params):
+        self._table = tables[0]
+        self._move_to_front = params["move_to_front"]
+
+    def _slot_record(self, slot):
+        return (slot._keys, slot._values)
+
+    def _slot_from_record(self, record):
+        bucket = UnsortedTableMap(self._move_to_front)
+        bucket._keys, bucket._values = record
+        return bucket
+
     # resize bucket array to capcity c
     def _resize(self, c):
-        unsort_maps = [unsort_map for unsort_map in self._table if unsort_map]
         old = []
-        for unsort_map in unsort_maps:
-            for item in unsort_map:
-                old.append(item)
+        for unsort_map in self._table:
+            if unsort_map is not None:
+                old.extend(zip(unsort_map._keys, unsort_map._values))
         self._table = c * [None]
         self._n = 0
         for k, v in old:
@@ -225,6 +588,12 @@ class ProbeHashMap(HashMapBase):
     # sentinal marks locations of previous deletion
     _AVAIL = object()
 
+    def __init__(self, cap=4, p=10945121):
+        """Create an empty hash map."""
+        super().__init__(cap, p)
+        # number of _AVAIL slots in the table
+        self._deleted = 0
+
     def __str__(self):
         N = len(self._table)
         s = ""
@@ -265,8 +634,21 @@ class ProbeHashMap(HashMapBase):
     def _bucket_setitem(self, j, k, v):
         found, s = self._find_slot(j, k)
         if not found:
+            if self._table[s] is ProbeHashMap._AVAIL:
+                self._deleted -= 1
             self._table[s] = self._Item(k, v)
             self._n += 1
+            # probing stops at empty slots only, so tombstones must never
+            # fill them all: rehash in place once under a quarter of the
+            # slots are empty, which after a rehash or a resize (at most
+            # half load) takes a quarter of the table in deletions
+            if self._n + self._deleted > 3 * len(self._table) // 4:
+                if self._stats is None:
+                    self._resize(len(self._table))
+                else:
+                    start = perf_counter()
+                    self._resize(len(self._table))
+                    self._stats.resized(perf_counter() - start)
         else:
             self._table[s]._value = v
 
@@ -275,26 +657,577 @@ class ProbeHashMap(HashMapBase):
         if not found:
             raise KeyError("Key Error: " + repr(k))
         self._table[s] = ProbeHashMap._AVAIL
+        self._deleted += 1
 
     def __iter__(self):
-        for j in range(self._table):
+        for j in range(len(self._table)):
             if not self._is_available(j):
                 yield self._table[j]._key
 
+    def _probe_length(self, j, k):
+        probes = 1
+        while self._table[j] is not None:
+            if not self._is_available(j) and k == self._table[j]._key:
+                break
+            j = (j + 1) % len(self._table)
+            probes += 1
+        return probes
+
+    def _chain_lengths(self):
+        # length of every run of nonempty slots, tombstones included
+        run = 0
+        for slot in self._table:
+            if slot is None:
+                if run:
+                    yield run
+                run = 0
+            else:
+                run += 1
+        if run:
+            yield run
+
+    def _tombstones(self):
+        return sum(1 for slot in self._table if slot is ProbeHashMap._AVAIL)
+
+    def _layout(self):
+        return ([self._table], {"deleted": self._deleted})
+
+    def _restore_layout(self, tables, params):
+        self._table = tables[0]
+        self._deleted = params.get("deleted", 0)
+
+    def _slot_record(self, slot):
+        # tombstones must survive a save, probing runs past them
+        if slot is ProbeHashMap._AVAIL:
+            return None
+        return (slot._key, slot._value)
+
+    def _slot_from_record(self, record):
+        if record is None:
+            return ProbeHashMap._AVAIL
+        return self._Item(*record)
+
     # resize bucket array to capcity c
     def _resize(self, c):
-        old = [item for item in self._table if item]
+        old = [
+            item for item in self._table if item is not None and item is not self._AVAIL
+        ]
         self._table = c * [None]
         self._n = 0
+        self._deleted = 0
+        for item in old:
+            self[item._key] = item._value
+
+
+class CuckooHashMap(HashMapBase):
+    """
+    Hash map implementated with cuckoo hashing for collision resolution.
+
+    Each key can only live in one of two slots, one per table, chosen by
+    two independent MAD hash functions, so a lookup probes at most two
+    slots. An insert evicts occupants back and forth between the tables;
+    when that runs into a cycle, fresh hash functions are drawn and every
+    item is rehashed.
+
+    Keys whose hash() values agree modulo the prime get the same slots
+    from every MAD function, so past the first two they go to a small
+    stash that lookups check last. A full stash rebuilds the map with a
+    fresh prime; the tables only grow with the load factor.
+    """
+
+    # rehash attempts before giving up on a clean layout, see _rehash
+    _MAX_REHASH = 8
+    # stash size that triggers a rebuild with a fresh prime
+    _MAX_STASH = 8
+
+    def __init__(self, cap=4, p=10945121):
+        """Create an empty cuckoo hash map."""
+        super().__init__(cap, p)
+        # second table with its own MAD parameters
+        self._alt_table = cap * [None]
+        self._alt_scale = 1 + randrange(p - 1)
+        self._alt_shift = randrange(p)
+        # items no pair of hash functions could place, normally empty
+        self._stash = []
+        self._stash_limit = self._MAX_STASH
+        # displacement chain length -> number of inserts
+        self._chains = {}
+        self._rehashes = 0
+
+    def __str__(self):
+        s = ""
+        for table in (self._table, self._alt_table):
+            for item in table:
+                s += "|" + f"  {str(item)}  " + "|"
+            s += "\n"
+        return s.rstrip()
+
+    def _alt_hash_function(self, k):
+        return (
+            (hash(k) * self._alt_scale + self._alt_shift)
+            % self._prime
+            % len(self._alt_table)
+        )
+
+    def _max_loop(self):
+        """Return the number of evictions after which we assume a cycle."""
+        return max(8, 3 * len(self._table).bit_length())
+
+    def _code(self, k):
+        """Return hash code of k that both MAD functions start from."""
+        return hash(k) % self._prime
+
+    def _stash_item(self, item):
+        """Put item, which has no slot, in the stash; rebuild with a fresh
+        prime once the stash is full."""
+        if len(self._stash) < self._stash_limit:
+            self._stash.append(item)
+        else:
+            self._prime = _random_prime(self._prime, 2 * self._prime)
+            self._rehash(len(self._table), item)
+
+    def _stash_index(self, k):
+        """Return index of key k in the stash, or None if not there."""
+        for s in range(len(self._stash)):
+            if k == self._stash[s]._key:
+                return s
+        return None
+
+    def _bucket_getitem(self, j, k):
+        item = self._table[j]
+        if item is not None and k == item._key:
+            return item._value
+        item = self._alt_table[self._alt_hash_function(k)]
+        if item is not None and k == item._key:
+            return item._value
+        if self._stash:
+            s = self._stash_index(k)
+            if s is not None:
+                return self._stash[s]._value
+        raise KeyError("Key Error: " + repr(k))
+
+    def _bucket_setitem(self, j, k, v):
+        item = self._table[j]
+        if item is not None and k == item._key:
+            item._value = v
+            return
+        i = self._alt_hash_function(k)
+        if self._alt_table[i] is not None and k == self._alt_table[i]._key:
+            self._alt_table[i]._value = v
+            return
+        if self._stash:
+            s = self._stash_index(k)
+            if s is not None:
+                self._stash[s]._value = v
+                return
+        self._n += 1
+        alt = self._alt_table[i]
+        if item is None:
+            self._table[j] = self._Item(k, v)
+            self._record_chain(0)
+        elif alt is None:
+            self._alt_table[i] = self._Item(k, v)
+            self._record_chain(0)
+        elif self._code(k) == self._code(item._key) == self._code(alt._key):
+            # both slots hold keys with k's code: no rehash can place k
+            self._record_chain(0)
+            self._stash_item(self._Item(k, v))
+        else:
+            homeless, moves = self._place(self._Item(k, v))
+            self._record_chain(moves)
+            if homeless is not None:
+                self._rehash(len(self._table), homeless)
+
+    def _bucket_delitem(self, j, k):
+        item = self._table[j]
+        if item is not None and k == item._key:
+            self._table[j] = None
+            return
+        i = self._alt_hash_function(k)
+        item = self._alt_table[i]
+        if item is not None and k == item._key:
+            self._alt_table[i] = None
+            return
+        if self._stash:
+            s = self._stash_index(k)
+            if s is not None:
+                self._stash.pop(s)
+                return
+        raise KeyError("Key Error: " + repr(k))
+
+    def __iter__(self):
+        for table in (self._table, self._alt_table, self._stash):
+            for item in table:
+                if item is not None:
+                    yield item._key
+
+    def _record_chain(self, moves):
+        self._chains[moves] = self._chains.get(moves, 0) + 1
+
+    def _place(self, item):
+        """
+        Insert item, evicting occupants to their slot in the other table.
+
+        Return (homeless, moves) tuple, where homeless is None on success or
+        the item left without a slot once the displacement chain exceeds
+        _max_loop (likely a cycle), and moves is the number of evictions.
+        """
+        table, hash_function = self._table, self._hash_function
+        for moves in range(self._max_loop()):
+            j = hash_function(item._key)
+            item, table[j] = table[j], item
+            if item is None:
+                return (None, moves)
+            # the evicted item moves to the other table
+            if table is self._table:
+                table, hash_function = self._alt_table, self._alt_hash_function
+            else:
+                table, hash_function = self._table, self._hash_function
+        return (item, self._max_loop())
+
+    def _rehash(self, c, homeless=None):
+        """
+        Rebuild both tables with capacity c and fresh hash functions.
+
+        Item homeless (if any) is a key already counted in the map that
+        lost its slot during a failed insert. Keys sharing a hash code with
+        two others can never be placed and go straight to the stash; if
+        the new hash functions fail on the rest we draw again, up to
+        _MAX_REHASH times, and stash what is still left. The capacity
+        stays c either way.
+        """
+        old = [item for item in self._table + self._alt_table if item is not None]
+        old.extend(self._stash)
+        if homeless is not None:
+            old.append(homeless)
+        # at most two keys of a hash code fit, one per table
+        codes = {}
+        placeable, stash = [], []
         for item in old:
+            code = self._code(item._key)
+            codes[code] = codes.get(code, 0) + 1
+            (placeable if codes[code] <= 2 else stash).append(item)
+        for _ in range(self._MAX_REHASH):
+            self._rehashes += 1
+            self._table = c * [None]
+            self._alt_table = c * [None]
+            self._scale = 1 + randrange(self._prime - 1)
+            self._shift = randrange(self._prime)
+            self._alt_scale = 1 + randrange(self._prime - 1)
+            self._alt_shift = randrange(self._prime)
+            self._stash = list(stash)
+            for item in placeable:
+                homeless = self._place(item)[0]
+                if homeless is not None:
+                    self._stash.append(homeless)
+            if len(self._stash) == len(stash):
+                break
+        # keys with equal hash() values defeat every prime; make room for
+        # them so that only a doubling of the stash rebuilds again
+        self._stash_limit = max(self._MAX_STASH, 2 * len(self._stash))
+
+    def _probe_length(self, j, k):
+        item = self._table[j]
+        if item is not None and k == item._key:
+            return 1
+        item = self._alt_table[self._alt_hash_function(k)]
+        if (item is not None and k == item._key) or not self._stash:
+            return 2
+        # the stash is scanned after both tables missed
+        s = self._stash_index(k)
+        return 3 + s if s is not None else 2 + len(self._stash)
+
+    def _chain_lengths(self):
+        for table in (self._table, self._alt_table):
+            for item in table:
+                yield 0 if item is None else 1
+        if self._stash:
+            yield len(self._stash)
+
+    def _capacity(self):
+        return len(self._table) + len(self._alt_table)
+
+    def _layout(self):
+        params = {
+            "alt_scale": self._alt_scale,
+            "alt_shift": self._alt_shift,
+            "stash": [(item._key, item._value) for item in self._stash],
+            "chains": self._chains,
+            "rehashes": self._rehashes,
+        }
+        return ([self._table, self._alt_table], params)
+
+    def _restore_layout(self, tables, params):
+        self._table, self._alt_table = tables
+        self._alt_scale = params["alt_scale"]
+        self._alt_shift = params["alt_shift"]
+        self._stash = [self._Item(k, v) for k, v in params["stash"]]
+        self._stash_limit = max(self._MAX_STASH, 2 * len(self._stash))
+        self._chains = params["chains"]
+        self._rehashes = params["rehashes"]
+
+    # resize both tables to capcity c
+    def _resize(self, c):
+        self._rehash(c)
+
+    def displacement_stats(self):
+        """
+        Return statistics about the displacement chains of inserts.
+
+        The result is a dict holding the number of inserts, the total and
+        longest chain length, the histogram of chain lengths, the number
+        of rehashes (including the ones caused by resizing) and the number
+        of stashed items.
+        """
+        return {
+            "inserts": sum(self._chains.values()),
+            "displacements": sum(m * c for m, c in self._chains.items()),
+            "max_chain": max(self._chains, default=0),
+            "histogram": dict(sorted(self._chains.items())),
+            "rehashes": self._rehashes,
+            "stashed": len(self._stash),
+        }
+
+
+def _random_prime(low, high):
+    """Return a random prime in range(low, high), for 2 < low < high // 2"""
+    while True:
+        n = randrange(low, high) | 1
+        if n < high and all(n % d for d in range(3, int(n**0.5) + 1, 2)):
+            return n
+
+
+class ConcurrentHashMap(HashMapBase):
+    """
+    Thread-safe hash map using lock striping.
+
+    The bucket array is split into segments, each guarded by its own lock
+    and resized independently, so writers on different segments never wait
+    for each other. Buckets are immutable tuples that writers replace as a
+    whole, which lets readers work on a snapshot without taking any lock.
+    """
+
+    class _Segment:
+        """Slice of the bucket array with its own lock and size."""
+
+        __slots__ = "_lock", "_table", "_n"
+
+        def __init__(self, cap):
+            self._lock = Lock()
+            self._table = cap * [None]
+            self._n = 0
+
+    def __init__(self, segments=16, cap=4, p=10945121):
+        """Create an empty map striped over the given number of segments."""
+        super().__init__(segments, p)
+        self._table = [self._Segment(cap) for _ in range(segments)]
+
+    def __str__(self):
+        return " ".join(f"({k}:{self[k]})" for k in self)
+
+    def _hash_function(self, k):
+        """Return the full MAD code of k.
+
+        The low part (modulo the number of segments) selects the segment,
+        the rest selects the bucket inside the segment's own array.
+        """
+        return (hash(k) * self._scale + self._shift) % self._prime
+
+    def __len__(self):
+        return sum(segment._n for segment in self._table)
+
+    def __setitem__(self, k, v):
+        # resizing is segment-local, see _bucket_setitem
+        self._bucket_setitem(self._hash_function(k), k, v)
+
+    def __delitem__(self, k):
+        self._bucket_delitem(self._hash_function(k), k)
+
+    def _bucket_getitem(self, j, k):
+        segments = len(self._table)
+        # a concurrent resize swaps the whole array, so read it only once
+        table = self._table[j % segments]._table
+        bucket = table[j // segments % len(table)]
+        if bucket is not None:
+            for item in bucket:
+                if k == item._key:
+                    return item._value
+        raise KeyError("Key Error: " + repr(k))
+
+    def _bucket_setitem(self, j, k, v):
+        segments = len(self._table)
+        segment = self._table[j % segments]
+        with segment._lock:
+            table = segment._table
+            i = j // segments % len(table)
+            bucket = table[i]
+            if bucket is not None:
+                for item in bucket:
+                    if k == item._key:
+                        item._value = v
+                        return
+                table[i] = bucket + (self._Item(k, v),)
+            else:
+                table[i] = (self._Item(k, v),)
+            segment._n += 1
+            if segment._n > len(table) // 2:
+                if self._stats is None:
+                    self._resize_segment(segment, 2 * len(table) - 1)
+                else:
+                    start = perf_counter()
+                    self._resize_segment(segment, 2 * len(table) - 1)
+                    self._stats.resized(perf_counter() - start)
+
+    def _bucket_delitem(self, j, k):
+        segments = len(self._table)
+        segment = self._table[j % segments]
+        with segment._lock:
+            table = segment._table
+            i = j // segments % len(table)
+            bucket = table[i]
+            if bucket is not None:
+                for pos, item in enumerate(bucket):
+                    if k == item._key:
+                        # an emptied bucket goes back to None
+                        table[i] = bucket[:pos] + bucket[pos + 1 :] or None
+                        segment._n -= 1
+                        return
+        raise KeyError("Key Error: " + repr(k))
+
+    def __iter__(self):
+        for segment in self._table:
+            for bucket in segment._table:
+                if bucket is not None:
+                    for item in bucket:
+                        yield item._key
+
+    def _resize_segment(self, segment, c):
+        """Rebuild the array of segment with capacity c.
+
+        Must be called with the segment's lock held. The new array is fully
+        populated before it is published, so readers never see it half built.
+        """
+        segments = len(self._table)
+        table = c * [None]
+        for bucket in segment._table:
+            if bucket is not None:
+                for item in bucket:
+                    i = self._hash_function(item._key) // segments % c
+                    table[i] = (item,) if table[i] is None else table[i] + (item,)
+        segment._table = table
+
+    # resize every segment's bucket array to capcity c
+    def _resize(self, c):
+        for segment in self._table:
+            with segment._lock:
+                self._resize_segment(segment, c)
+
+    def _probe_length(self, j, k):
+        segments = len(self._table)
+        table = self._table[j % segments]._table
+        bucket = table[j // segments % len(table)]
+        if bucket is None:
+            return 0
+        for probes, item in enumerate(bucket, 1):
+            if k == item._key:
+                return probes
+        return len(bucket)
+
+    def _chain_lengths(self):
+        for segment in self._table:
+            for bucket in segment._table:
+                yield 0 if bucket is None else len(bucket)
+
+    def _capacity(self):
+        return sum(len(segment._table) for segment in self._table)
+
+    def _layout(self):
+        tables = [segment._table for segment in self._table]
+        return (tables, {"sizes": [segment._n for segment in self._table]})
+
+    def _restore_layout(self, tables, params):
+        self._table = []
+        for table, n in zip(tables, params["sizes"]):
+            segment = self._Segment(0)
+            segment._table, segment._n = table, n
+            self._table.append(segment)
+
+    def _slot_record(self, slot):
+        return [(item._key, item._value) for item in slot]
+
+    def _slot_from_record(self, record):
+        return tuple(self._Item(k, v) for k, v in record)
+
+    def _rebuild(self):
+        # keys may now belong to another segment, so reinsert them all
+        items = []
+        for segment in self._table:
+            for bucket in segment._table:
+                if bucket is not None:
+                    items.extend(bucket)
+        for segment in self._table:
+            segment._table = len(segment._table) * [None]
+            segment._n = 0
+        for item in items:
             self[item._key] = item._value
 
 
+def _merge_sorted(left, right):
+    """Merge two iterables of (key, value) pairs sorted by key.
+
+    When both hold the same key, the pair from right wins.
+    """
+    left, right = iter(left), iter(right)
+    a, b = next(left, None), next(right, None)
+    while a is not None and b is not None:
+        if a[0] < b[0]:
+            yield a
+            a = next(left, None)
+        elif b[0] < a[0]:
+            yield b
+            b = next(right, None)
+        else:
+            yield b
+            a, b = next(left, None), next(right, None)
+    while a is not None:
+        yield a
+        a = next(left, None)
+    while b is not None:
+        yield b
+        b = next(right, None)
+
+
+def _check_sorted(pairs):
+    """Generate pairs, raising ValueError unless keys strictly increase"""
+    previous = None
+    for j, (k, v) in enumerate(pairs):
+        if j and not previous < k:
+            raise ValueError(f"keys not strictly increasing at {k!r}")
+        previous = k
+        yield (k, v)
+
+
+def _sort_pairs(pairs):
+    """Return pairs sorted by key, keeping the last value of a duplicate"""
+    pairs = sorted(pairs, key=itemgetter(0))
+    result = []
+    for k, v in pairs:
+        if result and result[-1][0] == k:
+            result[-1] = (k, v)
+        else:
+            result.append((k, v))
+    return result
+
+
 class SortedTableMap(MapBase):
-    """Map implementation using a sorted table"""
+    """Map implementation using a sorted table
+
+    Besides the table of items, the keys are kept in a parallel list so
+    that searches can run on the bisect module.
+    """
 
     # nonpublic behaviors
-    def _find_index(self, k, low, high):
+    def _find_index(self, k, low=0, high=None):
         """Return index of the leftmost item with key greate
         than or equal to k.
 
@@ -304,21 +1237,46 @@ class SortedTableMap(MapBase):
             all items of slice table[low:j] have key < k
             all items of slice table[j:high+1] have key >= k
         """
-        if high < low:
-            return high + 1
-        else:
-            mid = (low + high) // 2
-            if k == self._table[mid]._key:
-                return mid
-            elif k < self._table[mid]._key:
-                return self._find_index(k, low, mid - 1)
-            else:
-                return self._find_index(k, mid + 1, high)
+        if high is None:
+            high = len(self._keys) - 1
+        return bisect_left(self._keys, k, low, high + 1)
 
     # public behaviors
     def __init__(self):
         """Create an empty map"""
         self._table = []
+        # keys of the items in _table, in the same order
+        self._keys = []
+
+    @classmethod
+    def from_sorted(cls, pairs):
+        """Return map of (key, value) pairs given in increasing key order.
+
+        Runs in O(n); raise ValueError if keys are not strictly increasing.
+        """
+        m = cls()
+        for k, v in _check_sorted(pairs):
+            m._table.append(m._Item(k, v))
+            m._keys.append(k)
+        return m
+
+    @classmethod
+    def from_unsorted(cls, pairs):
+        """Return map of (key, value) pairs in any order.
+
+        Sorts once in O(n log n); of duplicate keys the last value wins.
+        """
+        return cls.from_sorted(_sort_pairs(pairs))
+
+    def merge(self, other):
+        """Return new map holding the items of this map and other.
+
+        other may be any sorted map with find_range; for keys present in
+        both, other's value wins. Runs in linear time.
+        """
+        return type(self).from_sorted(
+            _merge_sorted(self.find_range(None, None), other.find_range(None, None))
+        )
 
     def __str__(self):
         return " ".join(str(item) for item in self._table)
@@ -330,37 +1288,39 @@ class SortedTableMap(MapBase):
     def __getitem__(self, k):
         """Return value associated with kay k
         (raise KeyError if not found)"""
-        j = self._find_index(k, 0, len(self._table) - 1)
-        if j == len(self._table) or self._table[j]._key != k:
+        j = self._find_index(k)
+        if j == len(self._keys) or self._keys[j] != k:
             raise KeyError("Key Errpr" + repr(k))
         return self._table[j]._value
 
     def __setitem__(self, k, v):
         """Assign value v to key k, overwriting existing value if present"""
-        j = self._find_index(k, 0, len(self._table) - 1)
-        if j < len(self._table) and self._table[j]._key == k:
+        j = self._find_index(k)
+        if j < len(self._keys) and self._keys[j] == k:
             self._table[j]._value = v
         else:
             self._table.insert(j, self._Item(k, v))
+            self._keys.insert(j, k)
 
     def __delitem__(self, k):
         """Remove item associated with key k
         (raise KeyError if not found)
         """
-        j = self._find_index(k, 0, len(self._table) - 1)
-        if j == len(self._table) or self._table[j]._key != k:
+        j = self._find_index(k)
+        if j == len(self._keys) or self._keys[j] != k:
             raise KeyError("Key Error: " + repr(k))
         self._table.pop(j)
+        self._keys.pop(j)
 
     def __iter__(self):
         """Generate keys of the map ordered from minimum to maximum"""
-        for item in self._table:
-            yield item._key
+        for k in self._keys:
+            yield k
 
     def __reversed__(self):
         """Generate keys of the map ordered from maximum to minimum"""
-        for item in reversed(self._table):
-            yield item._key
+        for k in reversed(self._keys):
+            yield k
 
     def find_min(self):
         """Return (key, value) pair with minimum key(or None if empty)"""
@@ -379,7 +1339,7 @@ class SortedTableMap(MapBase):
     def find_ge(self, k):
         """Return (key, value) pair with least key greater that or
         equal to k"""
-        j = self._find_index(k, 0, len(self._table) - 1)
+        j = self._find_index(k)
         if j < len(self._table):
             return (self._table[j]._key, self._table[j]._value)
         else:
@@ -387,8 +1347,17 @@ class SortedTableMap(MapBase):
 
     def find_lt(self, k):
         """Return (key, value) pair with greatest key strictly less than k"""
-        j = self._find_index(k, 0, len(self._table) - 1)
-        if j >= 0:
+        j = self._find_index(k)
+        if j > 0:
+            return (self._table[j - 1]._key, self._table[j - 1]._value)
+        else:
+            return None
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than or
+        equal to k"""
+        j = bisect_right(self._keys, k)
+        if j > 0:
             return (self._table[j - 1]._key, self._table[j - 1]._value)
         else:
             return None
@@ -396,8 +1365,8 @@ class SortedTableMap(MapBase):
     def find_gt(self, k):
         """Return (key, value) pair with least key strictly greater than k"""
         # j's ley >= k
-        j = self._find_index(k, 0, len(self._table) - 1)
-        if j < len(self._table) and self._table[j]._key == k:
+        j = self._find_index(k)
+        if j < len(self._keys) and self._keys[j] == k:
             j += 1  # advanced past match
         if j < len(self._table):
             return (self._table[j]._key, self._table[j]._value)
@@ -413,7 +1382,399 @@ class SortedTableMap(MapBase):
             j = 0
         else:
             # find first result
-            j = self._find_index(start, 0, len(self._table) - 1)
-        while j < len(self._table) and (stop is None or self._table[j]._key < stop):
-            yield (self._table[j]._key, self._table[j]._value)
-            j += 1
+            j = self._find_index(start)
+        if stop is None:
+            end = len(self._keys)
+        else:
+            end = max(j, self._find_index(stop))
+        for item in self._table[j:end]:
+            yield (item._key, item._value)
+
+    def find_range_reversed(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop,
+        from the greatest key down.
+        None for start or stop leaves that side unbounded.
+        """
+        end = len(self._keys) if stop is None else self._find_index(stop)
+        if start is None:
+            j = 0
+        else:
+            j = bisect_left(self._keys, start, 0, end)
+        # walk indices backwards instead of copying the slice
+        for i in range(end - 1, j - 1, -1):
+            item = self._table[i]
+            yield (item._key, item._value)
+
+    def rank(self, k):
+        """Return the number of keys strictly less than k"""
+        return self._find_index(k)
+
+    def select(self, i):
+        """Return (key, value) pair with the i-th smallest key(0-based)
+
+        Negative i counts from the maximum; raise IndexError if out of range.
+        """
+        item = self._table[i]
+        return (item._key, item._value)
+
+    def count_range(self, start, stop):
+        """Return the number of keys such that start <= key < stop.
+
+        None for start or stop leaves that side unbounded.
+        """
+        low = 0 if start is None else self.rank(start)
+        high = len(self) if stop is None else self.rank(stop)
+        return max(0, high - low)
+
+    def get_many(self, keys, default=None):
+        """Return list of the values of keys, default for missing ones.
+
+        Each search gallops forward from where the previous one ended, so a
+        sorted batch of m queries costs O(m log(n/m)) comparisons instead
+        of m independent binary searches. Unsorted batches are still
+        answered correctly.
+        """
+        table_keys = self._keys
+        n = len(table_keys)
+        result = []
+        j = 0
+        for k in keys:
+            if j and not table_keys[j - 1] < k:
+                # query went backwards, search the part already passed
+                j = bisect_left(table_keys, k, 0, j)
+            else:
+                # probe j, j+1, j+3, j+7, ... until reaching a key >= k
+                lo, hi, step = j, j, 1
+                while hi < n and table_keys[hi] < k:
+                    lo = hi + 1
+                    hi += step
+                    step *= 2
+                j = bisect_left(table_keys, k, lo, min(hi, n))
+            if j < n and table_keys[j] == k:
+                result.append(self._table[j]._value)
+            else:
+                result.append(default)
+        return result
+
+
+class BlockedSortedTableMap(MapBase):
+    """Sorted map implementation using a list of sorted blocks
+
+    The sorted sequence of keys is cut into blocks of about `load` keys
+    (values are kept in parallel blocks), and the maximum key of every
+    block is kept in a separate list. A search bisects the maxima and then
+    one block, and an update only moves the items of a single block, so
+    loading n unsorted keys costs O(n sqrt n) memory moves at worst
+    instead of O(n^2) for SortedTableMap.
+
+    A Fenwick tree over the block lengths serves as positional index,
+    translating between global positions and (block, offset) pairs in
+    O(log b) for b blocks.
+    """
+
+    def __init__(self, load=1000):
+        """Create an empty map whose blocks hold about load keys"""
+        if load < 2:
+            raise ValueError("load must be at least 2")
+        self._load = load
+        self._lists = []
+        self._vals = []
+        self._maxes = []
+        self._len = 0
+        # Fenwick tree over block lengths, 1-based
+        self._index = [0]
+
+    @classmethod
+    def from_sorted(cls, pairs, load=1000):
+        """Return map of (key, value) pairs given in increasing key order.
+
+        Runs in O(n); raise ValueError if keys are not strictly increasing.
+        """
+        m = cls(load)
+        for k, v in _check_sorted(pairs):
+            if not m._lists or len(m._lists[-1]) == load:
+                m._lists.append([])
+                m._vals.append([])
+            m._lists[-1].append(k)
+            m._vals[-1].append(v)
+            m._len += 1
+        m._maxes = [keys[-1] for keys in m._lists]
+        m._build_index()
+        return m
+
+    @classmethod
+    def from_unsorted(cls, pairs, load=1000):
+        """Return map of (key, value) pairs in any order.
+
+        Sorts once in O(n log n); of duplicate keys the last value wins.
+        """
+        return cls.from_sorted(_sort_pairs(pairs), load)
+
+    def merge(self, other):
+        """Return new map holding the items of this map and other.
+
+        other may be any sorted map with find_range; for keys present in
+        both, other's value wins. Runs in linear time.
+        """
+        return type(self).from_sorted(
+            _merge_sorted(self.find_range(None, None), other.find_range(None, None)),
+            self._load,
+        )
+
+    def __str__(self):
+        return " ".join(f"({k}:{v})" for k, v in self.find_range(None, None))
+
+    def __len__(self):
+        """Return number of items in the map"""
+        return self._len
+
+    # positional index
+    def _build_index(self):
+        """Rebuild the Fenwick tree after blocks were added or removed"""
+        tree = [0] + [len(keys) for keys in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._index = tree
+
+    def _index_add(self, b, delta):
+        """Add delta to the length of block b"""
+        tree = self._index
+        i = b + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _pos(self, b, i):
+        """Return global position of offset i in block b"""
+        tree = self._index
+        while b:
+            i += tree[b]
+            b -= b & -b
+        return i
+
+    def _loc(self, pos):
+        """Return (block, offset) pair of global position pos"""
+        tree = self._index
+        b = 0
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            if b + step < len(tree) and tree[b + step] <= pos:
+                b += step
+                pos -= tree[b]
+            step >>= 1
+        return (b, pos)
+
+    # nonpublic behaviors
+    def _find(self, k):
+        """Return (block, offset) of the leftmost key >= k.
+
+        Return (len(blocks), 0) if no such key exists.
+        """
+        b = bisect_left(self._maxes, k)
+        if b == len(self._maxes):
+            return (b, 0)
+        return (b, bisect_left(self._lists[b], k))
+
+    def _item(self, b, i):
+        return (self._lists[b][i], self._vals[b][i])
+
+    def _split(self, b):
+        """Split block b into two halves"""
+        half = len(self._lists[b]) // 2
+        self._lists.insert(b + 1, self._lists[b][half:])
+        self._vals.insert(b + 1, self._vals[b][half:])
+        del self._lists[b][half:]
+        del self._vals[b][half:]
+        self._maxes.insert(b, self._lists[b][-1])
+        self._build_index()
+
+    def _merge(self, b):
+        """Join small block b with a neighbour, splitting again if too big"""
+        if b == len(self._lists) - 1:
+            b -= 1
+        self._lists[b].extend(self._lists.pop(b + 1))
+        self._vals[b].extend(self._vals.pop(b + 1))
+        del self._maxes[b]
+        if len(self._lists[b]) > 2 * self._load:
+            self._split(b)
+        else:
+            self._build_index()
+
+    # public behaviors
+    def __getitem__(self, k):
+        """Return value associated with key k
+        (raise KeyError if not found)"""
+        b, i = self._find(k)
+        if b == len(self._lists) or self._lists[b][i] != k:
+            raise KeyError("Key Error: " + repr(k))
+        return self._vals[b][i]
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present"""
+        if not self._lists:
+            self._lists.append([k])
+            self._vals.append([v])
+            self._maxes.append(k)
+            self._len = 1
+            self._build_index()
+            return
+        b, i = self._find(k)
+        if b == len(self._lists):
+            # new maximum goes to the end of the last block
+            b -= 1
+            i = len(self._lists[b])
+            self._maxes[b] = k
+        elif self._lists[b][i] == k:
+            self._vals[b][i] = v
+            return
+        self._lists[b].insert(i, k)
+        self._vals[b].insert(i, v)
+        self._len += 1
+        self._index_add(b, 1)
+        if len(self._lists[b]) > 2 * self._load:
+            self._split(b)
+
+    def __delitem__(self, k):
+        """Remove item associated with key k
+        (raise KeyError if not found)
+        """
+        b, i = self._find(k)
+        if b == len(self._lists) or self._lists[b][i] != k:
+            raise KeyError("Key Error: " + repr(k))
+        keys = self._lists[b]
+        del keys[i]
+        del self._vals[b][i]
+        self._len -= 1
+        if not keys:
+            del self._lists[b]
+            del self._vals[b]
+            del self._maxes[b]
+            self._build_index()
+            return
+        self._maxes[b] = keys[-1]
+        self._index_add(b, -1)
+        if len(keys) < self._load // 2 and len(self._lists) > 1:
+            self._merge(b)
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum"""
+        for keys in self._lists:
+            for k in keys:
+                yield k
+
+    def __reversed__(self):
+        """Generate keys of the map ordered from maximum to minimum"""
+        for keys in reversed(self._lists):
+            for k in reversed(keys):
+                yield k
+
+    def peekitem(self, index=-1):
+        """Return (key, value) pair at position index of the sorted order.
+
+        Negative indices count from the end; raise IndexError if out of
+        range.
+        """
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("index out of range")
+        return self._item(*self._loc(index))
+
+    def rank(self, k):
+        """Return the number of keys strictly less than k"""
+        return self._pos(*self._find(k))
+
+    def select(self, i):
+        """Return (key, value) pair with the i-th smallest key(0-based)
+
+        Negative i counts from the maximum; raise IndexError if out of range.
+        """
+        return self.peekitem(i)
+
+    def count_range(self, start, stop):
+        """Return the number of keys such that start <= key < stop.
+
+        None for start or stop leaves that side unbounded.
+        """
+        low = 0 if start is None else self.rank(start)
+        high = len(self) if stop is None else self.rank(stop)
+        return max(0, high - low)
+
+    def find_min(self):
+        """Return (key, value) pair with minimum key(or None if empty)"""
+        return self._item(0, 0) if self._lists else None
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        return self._item(-1, -1) if self._lists else None
+
+    def find_ge(self, k):
+        """Return (key, value) pair with least key greater that or
+        equal to k"""
+        b, i = self._find(k)
+        return self._item(b, i) if b < len(self._lists) else None
+
+    def _before(self, b, i):
+        """Return (key, value) pair just before offset i of block b
+        (or None if there is none)"""
+        if i > 0:
+            return self._item(b, i - 1)
+        if b > 0:
+            return self._item(b - 1, -1)
+        return None
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than k"""
+        return self._before(*self._find(k))
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than or
+        equal to k"""
+        b = bisect_right(self._maxes, k)
+        if b == len(self._maxes):
+            return self.find_max()
+        return self._before(b, bisect_right(self._lists[b], k))
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than k"""
+        b = bisect_right(self._maxes, k)
+        if b == len(self._maxes):
+            return None
+        return self._item(b, bisect_right(self._lists[b], k))
+
+    def find_range(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop.
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        b, i = (0, 0) if start is None else self._find(start)
+        while b < len(self._lists):
+            keys, vals = self._lists[b], self._vals[b]
+            end = len(keys) if stop is None else bisect_left(keys, stop, i)
+            for j in range(i, end):
+                yield (keys[j], vals[j])
+            if end < len(keys):
+                return
+            b, i = b + 1, 0
+
+    def find_range_reversed(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop,
+        from the greatest key down.
+        None for start or stop leaves that side unbounded.
+        """
+        b, i = (len(self._lists), 0) if stop is None else self._find(stop)
+        if b == len(self._lists):
+            # stop is past the last key: start at the end of the last block
+            b -= 1
+            i = len(self._lists[b]) if self._lists else 0
+        while b >= 0:
+            keys, vals = self._lists[b], self._vals[b]
+            low = 0 if start is None else bisect_left(keys, start, 0, i)
+            for j in range(i - 1, low - 1, -1):
+                yield (keys[j], vals[j])
+            if low > 0:
+                return
+            b -= 1
+            i = len(self._lists[b])
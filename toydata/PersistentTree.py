@@ -0,0 +1,327 @@
+from collections.abc import Mapping
+
+from toydata.Maps import _check_sorted, _sort_pairs
+
+
+class PersistentAVLTreeMap(Mapping):
+    """Immutable sorted map using an AVL tree with path copying.
+
+    Nodes are never modified once built. set() and delete() copy only the
+    O(log n) nodes on the path to the changed key and return a new map that
+    shares every other node with the old one, so earlier versions stay
+    valid and readable, and a snapshot is simply a reference to a version.
+    Memory grows with the number of changes, not with copies of the map.
+
+    Time complexity:
+    set, delete, get, find_*, rank, select: O(log n)
+    find_range: O(s + log n)
+    iter, reversed: O(n)
+    """
+
+    class _Node:
+        """Immutable node with the height and size of its subtree"""
+
+        __slots__ = "_key", "_value", "_left", "_right", "_height", "_size"
+
+        def __init__(self, k, v, left, right):
+            self._key = k
+            self._value = v
+            self._left = left
+            self._right = right
+            self._height = 1 + max(_height(left), _height(right))
+            self._size = 1 + _size(left) + _size(right)
+
+    def __init__(self):
+        """Create an empty map"""
+        self._root = None
+
+    # nonpublic behaviors
+    @classmethod
+    def _version(cls, root):
+        """Return a map of the same class rooted at node root"""
+        t = cls.__new__(cls)
+        t._root = root
+        return t
+
+    def _balance(self, k, v, left, right):
+        """Return node for (k, v) over left and right, whose heights differ
+        by at most two, restoring the AVL property with new nodes"""
+        Node = self._Node
+        if _height(left) > _height(right) + 1:
+            if _height(left._left) >= _height(left._right):
+                # single right rotation
+                return Node(
+                    left._key,
+                    left._value,
+                    left._left,
+                    Node(k, v, left._right, right),
+                )
+            # double rotation
+            mid = left._right
+            return Node(
+                mid._key,
+                mid._value,
+                Node(left._key, left._value, left._left, mid._left),
+                Node(k, v, mid._right, right),
+            )
+        if _height(right) > _height(left) + 1:
+            if _height(right._right) >= _height(right._left):
+                return Node(
+                    right._key,
+                    right._value,
+                    Node(k, v, left, right._left),
+                    right._right,
+                )
+            mid = right._left
+            return Node(
+                mid._key,
+                mid._value,
+                Node(k, v, left, mid._left),
+                Node(right._key, right._value, mid._right, right._right),
+            )
+        return Node(k, v, left, right)
+
+    def _insert(self, node, k, v):
+        """Return copy of subtree node with key k mapped to v"""
+        if node is None:
+            return self._Node(k, v, None, None)
+        if k < node._key:
+            left = self._insert(node._left, k, v)
+            return self._balance(node._key, node._value, left, node._right)
+        if node._key < k:
+            right = self._insert(node._right, k, v)
+            return self._balance(node._key, node._value, node._left, right)
+        return self._Node(k, v, node._left, node._right)
+
+    def _remove_min(self, node):
+        """Return (minimum node, copy of subtree node without it)"""
+        if node._left is None:
+            return node, node._right
+        lowest, left = self._remove_min(node._left)
+        return lowest, self._balance(node._key, node._value, left, node._right)
+
+    def _remove(self, node, k):
+        """Return copy of subtree node without key k
+        (raise KeyError if not found)"""
+        if node is None:
+            raise KeyError("Key Error: " + repr(k))
+        if k < node._key:
+            left = self._remove(node._left, k)
+            return self._balance(node._key, node._value, left, node._right)
+        if node._key < k:
+            right = self._remove(node._right, k)
+            return self._balance(node._key, node._value, node._left, right)
+        if node._left is None:
+            return node._right
+        if node._right is None:
+            return node._left
+        lowest, right = self._remove_min(node._right)
+        return self._balance(lowest._key, lowest._value, node._left, right)
+
+    def _search(self, k):
+        """Return node with key k, or None if not found"""
+        node = self._root
+        while node is not None:
+            if k < node._key:
+                node = node._left
+            elif node._key < k:
+                node = node._right
+            else:
+                return node
+        return None
+
+    def _ge(self, k, strict=False):
+        """Return node with least key greater than (or equal to, unless
+        strict) k, or None"""
+        node, best = self._root, None
+        while node is not None:
+            if k < node._key or (not strict and k == node._key):
+                best, node = node, node._left
+            else:
+                node = node._right
+        return best
+
+    def _le(self, k, strict=False):
+        """Return node with greatest key less than (or equal to, unless
+        strict) k, or None"""
+        node, best = self._root, None
+        while node is not None:
+            if node._key < k or (not strict and k == node._key):
+                best, node = node, node._right
+            else:
+                node = node._left
+        return best
+
+    def _build(self, pairs, low, high):
+        """Return balanced subtree of pairs[low:high]"""
+        if low >= high:
+            return None
+        mid = (low + high) // 2
+        k, v = pairs[mid]
+        return self._Node(
+            k, v, self._build(pairs, low, mid), self._build(pairs, mid + 1, high)
+        )
+
+    # public behaviors
+    @classmethod
+    def from_sorted(cls, pairs):
+        """Return map of (key, value) pairs given in increasing key order.
+
+        Builds a balanced tree in O(n); raise ValueError if keys are not
+        strictly increasing.
+        """
+        t = cls()
+        pairs = list(_check_sorted(pairs))
+        t._root = t._build(pairs, 0, len(pairs))
+        return t
+
+    @classmethod
+    def from_unsorted(cls, pairs):
+        """Return map of (key, value) pairs in any order.
+
+        Sorts once in O(n log n); of duplicate keys the last value wins.
+        """
+        return cls.from_sorted(_sort_pairs(pairs))
+
+    def __len__(self):
+        """Return number of items in the map"""
+        return _size(self._root)
+
+    def __getitem__(self, k):
+        """Return value associated with key k
+        (raise KeyError if not found)"""
+        node = self._search(k)
+        if node is None:
+            raise KeyError("Key Error: " + repr(k))
+        return node._value
+
+    def set(self, k, v):
+        """Return new version of the map with key k mapped to value v"""
+        return self._version(self._insert(self._root, k, v))
+
+    def delete(self, k):
+        """Return new version of the map without key k
+        (raise KeyError if not found)"""
+        return self._version(self._remove(self._root, k))
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum"""
+        for k, _ in self.find_range(None, None):
+            yield k
+
+    def __reversed__(self):
+        """Generate keys of the map ordered from maximum to minimum"""
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node._right
+            node = stack.pop()
+            yield node._key
+            node = node._left
+
+    def find_min(self):
+        """Return (key, value) pair with minimum key(or None if empty)"""
+        node = self._root
+        if node is None:
+            return None
+        while node._left is not None:
+            node = node._left
+        return (node._key, node._value)
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        node = self._root
+        if node is None:
+            return None
+        while node._right is not None:
+            node = node._right
+        return (node._key, node._value)
+
+    def find_ge(self, k):
+        """Return (key, value) pair with least key greater than or
+        equal to k"""
+        node = self._ge(k)
+        return None if node is None else (node._key, node._value)
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than k"""
+        node = self._ge(k, strict=True)
+        return None if node is None else (node._key, node._value)
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than or
+        equal to k"""
+        node = self._le(k)
+        return None if node is None else (node._key, node._value)
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than k"""
+        node = self._le(k, strict=True)
+        return None if node is None else (node._key, node._value)
+
+    def find_range(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop.
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        # stack of the ancestors still to visit, as in an in-order walk
+        stack = []
+        node = self._root
+        while node is not None:
+            if start is None or not node._key < start:
+                stack.append(node)
+                node = node._left
+            else:
+                node = node._right
+        while stack:
+            node = stack.pop()
+            if stop is not None and not node._key < stop:
+                return
+            yield (node._key, node._value)
+            node = node._right
+            while node is not None:
+                stack.append(node)
+                node = node._left
+
+    def rank(self, k):
+        """Return the number of keys strictly less than k"""
+        r = 0
+        node = self._root
+        while node is not None:
+            if node._key < k:
+                r += _size(node._left) + 1
+                node = node._right
+            else:
+                node = node._left
+        return r
+
+    def select(self, i):
+        """Return (key, value) pair with the i-th smallest key, counting
+        from 0 (raise IndexError if out of range)"""
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("index out of range")
+        node = self._root
+        while True:
+            left = _size(node._left)
+            if i < left:
+                node = node._left
+            elif i > left:
+                i -= left + 1
+                node = node._right
+            else:
+                return (node._key, node._value)
+
+
+def _height(node):
+    """Return height of subtree node, 0 for None"""
+    return 0 if node is None else node._height
+
+
+def _size(node):
+    """Return number of nodes in subtree node, 0 for None"""
+    return 0 if node is None else node._size
@@ -1,6 +1,15 @@
-from toydata.Maps import MapBase
+from operator import add
+
+from toydata.Maps import MapBase, _check_sorted, _sort_pairs
 from toydata.Tree import LinkedBinaryTree
 
+# (combine, identity) of the aggregates that can be named
+_AGGREGATES = {
+    "sum": (add, 0),
+    "min": (min, float("inf")),
+    "max": (max, float("-inf")),
+}
+
 
 class TreeMap(LinkedBinaryTree, MapBase):
     """Base class, Sorted map implementation using a binary search tree.
@@ -23,39 +32,319 @@ class TreeMap(LinkedBinaryTree, MapBase):
             """Return value of map's key-value pair"""
             return self.element()._value
 
+    class Cursor:
+        """Stateful iterator over a TreeMap that moves both ways.
+
+        The cursor keeps the path from the root to its current node on an
+        explicit stack, so next and prev cost O(1) amortised and resuming
+        a scan needs no new search. A new cursor stands before the first
+        item; stepping past either end leaves it off that end, and a step
+        back from there returns to the first or last item.
+
+        Value updates (set_value, or assigning to an existing key) keep
+        the cursor valid. Inserts and deletions change the shape of the
+        tree, as do lookups in a SplayTreeMap; after one, moving the
+        cursor raises RuntimeError until it is placed again with seek,
+        first or last.
+        """
+
+        __slots__ = "_tree", "_stack", "_end", "_changes"
+
+        def __init__(self, tree):
+            self._tree = tree
+            # nodes from the root down to the current one
+            self._stack = []
+            # -1 before the first item, 1 after the last one
+            self._end = -1
+            self._changes = tree._changes
+
+        def _place(self, stack, end):
+            """Stand on the last node of stack, or off the given end if
+            stack is empty; return True if on an item"""
+            self._stack = stack
+            self._end = end
+            self._changes = self._tree._changes
+            return bool(stack)
+
+        def _check(self):
+            if self._changes != self._tree._changes:
+                raise RuntimeError("tree changed shape since the cursor was placed")
+
+        def _node(self):
+            """Return the current node
+            (raise IndexError if off the ends)"""
+            self._check()
+            if not self._stack:
+                raise IndexError("cursor is not on an item")
+            return self._stack[-1]
+
+        def first(self):
+            """Move to the item with the minimum key; return False if the
+            map is empty"""
+            stack = []
+            node = self._tree._root
+            while node is not None:
+                stack.append(node)
+                node = node._left
+            return self._place(stack, 1)
+
+        def last(self):
+            """Move to the item with the maximum key; return False if the
+            map is empty"""
+            stack = []
+            node = self._tree._root
+            while node is not None:
+                stack.append(node)
+                node = node._right
+            return self._place(stack, -1)
+
+        def seek(self, k):
+            """Move to the item with the least key greater than or equal
+            to k; return False, leaving the cursor after the last item,
+            if there is none"""
+            stack = []
+            # length of the path down to the best node so far
+            depth = 0
+            node = self._tree._root
+            while node is not None:
+                stack.append(node)
+                key = node._element._key
+                if k == key:
+                    depth = len(stack)
+                    break
+                if k < key:
+                    depth = len(stack)
+                    node = node._left
+                else:
+                    node = node._right
+            del stack[depth:]
+            return self._place(stack, 1)
+
+        def next(self):
+            """Move to the next item; return False, leaving the cursor
+            after the last item, if there is none"""
+            if self._changes != self._tree._changes:
+                self._check()
+            stack = self._stack
+            if not stack:
+                return self._end < 0 and self.first()
+            node = stack[-1]._right
+            if node is not None:
+                while node is not None:
+                    stack.append(node)
+                    node = node._left
+                return True
+            # climb past the ancestors whose right subtree is done
+            child = stack.pop()
+            while stack and stack[-1]._right is child:
+                child = stack.pop()
+            self._end = 1
+            return bool(stack)
+
+        def prev(self):
+            """Move to the previous item; return False, leaving the cursor
+            before the first item, if there is none"""
+            if self._changes != self._tree._changes:
+                self._check()
+            stack = self._stack
+            if not stack:
+                return self._end > 0 and self.last()
+            node = stack[-1]._left
+            if node is not None:
+                while node is not None:
+                    stack.append(node)
+                    node = node._right
+                return True
+            child = stack.pop()
+            while stack and stack[-1]._left is child:
+                child = stack.pop()
+            self._end = -1
+            return bool(stack)
+
+        def take(self, n):
+            """Return list of the (key, value) pairs of up to n items from
+            the current one on, leaving the cursor on the item after them"""
+            self._check()
+            if not self._stack and self._end < 0:
+                self.first()
+            pairs = []
+            stack = self._stack
+            while stack and len(pairs) < n:
+                node = stack[-1]
+                pairs.append((node._element._key, node._element._value))
+                # the step of next, inlined
+                child = node._right
+                if child is not None:
+                    while child is not None:
+                        stack.append(child)
+                        child = child._left
+                    continue
+                stack.pop()
+                while stack and stack[-1]._right is node:
+                    node = stack.pop()
+            if not stack:
+                self._end = 1
+            return pairs
+
+        def key(self):
+            """Return key of the current item"""
+            return self._node()._element._key
+
+        def value(self):
+            """Return value of the current item"""
+            return self._node()._element._value
+
+        def set_value(self, v):
+            """Replace value of the current item, keeping the cursor valid"""
+            node = self._node()
+            node._element._value = v
+            if self._tree._monoid is not None:
+                self._tree._augment_path(node)
+
+    class _Node(LinkedBinaryTree._Node):
+        """Node class maintaining the size and aggregate of its subtree"""
+
+        __slots__ = "_count", "_agg"
+
+        def __init__(self, element, parent=None, left=None, right=None):
+            super().__init__(element, parent, left, right)
+            self._count = 1
+            self._agg = None
+
+    def __init__(self, aggregate=None):
+        """Create an empty map.
+
+        aggregate, if given, is kept over the values of every subtree for
+        aggregate_range: "sum", "min" or "max" for numeric values, or a
+        (combine, identity) pair of an associative function and its
+        identity element. Subtree sizes are always kept (count_range).
+        """
+        super().__init__()
+        if isinstance(aggregate, str):
+            try:
+                self._monoid = _AGGREGATES[aggregate]
+            except KeyError:
+                raise ValueError("unknown aggregate " + repr(aggregate)) from None
+        else:
+            self._monoid = aggregate
+        self._aggregate = aggregate
+        # bumped by every change of the tree's shape, which moves nodes
+        # under a Cursor
+        self._changes = 0
+
+    def _options(self):
+        """Return keyword arguments creating an empty map like this one"""
+        return {"aggregate": self._aggregate}
+
+    # augmentation: summary data kept at every node
+    def _augment(self, node):
+        """Recompute the data node keeps about its subtree"""
+        left, right = node._left, node._right
+        node._count = (
+            1
+            + (left._count if left is not None else 0)
+            + (right._count if right is not None else 0)
+        )
+        if self._monoid is not None:
+            combine = self._monoid[0]
+            agg = node._element._value
+            if left is not None:
+                agg = combine(left._agg, agg)
+            if right is not None:
+                agg = combine(agg, right._agg)
+            node._agg = agg
+
+    def _augment_path(self, node):
+        """Recompute augmentation from node up to the root"""
+        while node is not None:
+            self._augment(node)
+            node = node._parent
+
+    def _add_root(self, e):
+        root = super()._add_root(e)
+        self._augment(self._root)
+        self._changes += 1
+        return root
+
+    def _add_left(self, p, e):
+        leaf = super()._add_left(p, e)
+        self._augment_path(leaf._node)
+        self._changes += 1
+        return leaf
+
+    def _add_right(self, p, e):
+        leaf = super()._add_right(p, e)
+        self._augment_path(leaf._node)
+        self._changes += 1
+        return leaf
+
+    def _delete(self, p):
+        parent = p._node._parent
+        self._changes += 1
+        element = super()._delete(p)
+        self._augment_path(parent)
+        return element
+
     # nonpublic utilities
+    # searches and walks work on nodes and only wrap the node they end at
+    # in a Position, which keeps lookups and iteration allocation-free
+    def _node_search(self, node, k):
+        """Return node of node's subtree having key k, or last node
+        searched"""
+        while True:
+            key = node._element._key
+            if k == key:
+                return node
+            child = node._left if k < key else node._right
+            if child is None:
+                # unsuccessful search
+                return node
+            node = child
+
+    def _node_first(self, node):
+        """Return first node in subtree rooted at node"""
+        while node._left is not None:
+            node = node._left
+        return node
+
+    def _node_last(self, node):
+        """Return last node in subtree rooted at node"""
+        while node._right is not None:
+            node = node._right
+        return node
+
+    def _node_after(self, node):
+        """Return node just after node in the natural order(or None)"""
+        if node._right is not None:
+            return self._node_first(node._right)
+        above = node._parent
+        while above is not None and node is above._right:
+            node = above
+            above = node._parent
+        return above
+
+    def _node_before(self, node):
+        """Return node just before node in the natural order(or None)"""
+        if node._left is not None:
+            return self._node_last(node._left)
+        above = node._parent
+        while above is not None and node is above._left:
+            node = above
+            above = node._parent
+        return above
+
     def _subtree_search(self, p, k):
         """Return Position of p's subtree having key k, or last node
         searched"""
-        # found match
-        if k == p.key():
-            return p
-        # search left subtree
-        if k < p.key():
-            if self.left(p) is not None:
-                return self._subtree_search(self.left(p), k)
-        # search right subtree
-        else:
-            if self.right(p) is not None:
-                return self._subtree_search(self.right(p), k)
-        # unsuccessful search
-        return p
+        return self._make_position(self._node_search(p._node, k))
 
     def _subtree_first_position(self, p):
         """Return Position if first item in subtree rooted at p"""
-        walk = p
-        # keep walking left
-        while self.left(walk) is not None:
-            walk = self.left(walk)
-        return walk
+        return self._make_position(self._node_first(p._node))
 
     def _subtree_last_position(self, p):
         """Return Position of last item in subtree rooted at p"""
-        walk = p
-        # keep walking right
-        while self.right(walk) is not None:
-            walk = self.right(walk)
-        return walk
+        return self._make_position(self._node_last(p._node))
 
     # Nonpublic Methods for Rotating and Restructuring
     def _relink(self, parent, child, make_left_child):
@@ -73,6 +362,7 @@ class TreeMap(LinkedBinaryTree, MapBase):
     def _rotate(self, p):
         """Rotate Position p above its parent"""
         x = p._node
+        self._changes += 1
         # we assume this exist
         y = x._parent
         # grandparent(possibly None)
@@ -95,6 +385,9 @@ class TreeMap(LinkedBinaryTree, MapBase):
             self._relink(y, x._left, False)
             # y becomes left child of x
             self._relink(x, y, True)
+        # y is now x's child, so it goes first
+        self._augment(y)
+        self._augment(x)
 
     def _restructure(self, x):
         """Perform tirnode restructure of Position x with parent/grandparent"""
@@ -112,6 +405,155 @@ class TreeMap(LinkedBinaryTree, MapBase):
             # x is new subtree root
             return x
 
+    # bulk construction
+    def _build(self, items, low, high, parent, depth, height):
+        """Return root node of a balanced subtree holding items[low:high]
+
+        depth is the depth of that root and height the height of the
+        whole tree being built.
+        """
+        if low >= high:
+            return None
+        mid = (low + high) // 2
+        node = self._Node(items[mid], parent)
+        node._left = self._build(items, low, mid, node, depth + 1, height)
+        node._right = self._build(items, mid + 1, high, node, depth + 1, height)
+        self._augment(node)
+        self._bulk_balance(node, depth, height)
+        return node
+
+    def _bulk_balance(self, node, depth, height):
+        """Set balance data of node built at depth of a tree of height;
+        its children are already set"""
+        pass
+
+    @classmethod
+    def from_sorted(cls, pairs, **options):
+        """Return map of (key, value) pairs given in increasing key order.
+
+        Builds a perfectly balanced tree in O(n) without any rotations;
+        raise ValueError if keys are not strictly increasing. options are
+        passed to the constructor.
+        """
+        t = cls(**options)
+        items = [t._Item(k, v) for k, v in _check_sorted(pairs)]
+        if items:
+            height = len(items).bit_length() - 1
+            t._root = t._build(items, 0, len(items), None, 0, height)
+            t._size = len(items)
+        return t
+
+    @classmethod
+    def from_unsorted(cls, pairs, **options):
+        """Return map of (key, value) pairs in any order.
+
+        Sorts once in O(n log n); of duplicate keys the last value wins.
+        """
+        return cls.from_sorted(_sort_pairs(pairs), **options)
+
+    # split and join
+    def _join_nodes(self, left, mid, right):
+        """Link detached subtrees left and right under the detached node
+        mid, whose key lies between them; return the new root node.
+
+        The tree is used as a workspace: self._root is overwritten.
+        Balanced subclasses override this to keep their invariants.
+        """
+        self._relink(mid, left, True)
+        self._relink(mid, right, False)
+        self._augment(mid)
+        return mid
+
+    def _cut_path(self, node, k):
+        """Detach the search path of k below node; return a list of
+        (node, subtree, below) top-down, where subtree is the child the
+        node leaves behind and below is True if the node's key is < k"""
+        path = []
+        while node is not None:
+            left, right = node._left, node._right
+            for child in (left, right):
+                if child is not None:
+                    child._parent = None
+            node._left = node._right = node._parent = None
+            if node._element._key < k:
+                path.append((node, left, True))
+                node = right
+            else:
+                path.append((node, right, False))
+                node = left
+        return path
+
+    def _split_node(self, node, k):
+        """Split node's subtree into detached roots of the subtrees with
+        keys < k and keys >= k"""
+        path = self._cut_path(node, k)
+        # join bottom-up: every node goes with the subtree it left behind
+        low = high = None
+        for node, subtree, below in reversed(path):
+            if below:
+                low = self._join_nodes(subtree, node, low)
+            else:
+                high = self._join_nodes(high, node, subtree)
+        return low, high
+
+    def _adopt(self, root):
+        """Make the detached subtree at root this (empty) tree's content"""
+        self._changes += 1
+        self._root = root
+        self._size = root._count if root is not None else 0
+
+    def split(self, k):
+        """Split the map into two maps, of keys < k and of keys >= k.
+
+        Return (left, right) maps of the same type; this map is left empty.
+        The search path is cut out and its pieces joined back, one join
+        per node on the path.
+        Time complexity: O(log n) for AVLTreeMap and RedBlackTreeMap,
+        whose joins telescope; O(h) for SplayTreeMap, which links without
+        rebalancing
+        """
+        low, high = self._split_node(self._root, k)
+        self._adopt(None)
+        left, right = type(self)(**self._options()), type(self)(**self._options())
+        left._adopt(low)
+        right._adopt(high)
+        return left, right
+
+    @classmethod
+    def join(cls, left, right):
+        """Return a map holding the items of maps left and right.
+
+        left and right must be of the same type and options(raise
+        TypeError or ValueError otherwise), and every key of left must be
+        less than every key of right(raise ValueError otherwise). Both maps
+        are left empty unless an error is raised, which leaves them as
+        they were.
+        Time complexity: O(log n) for AVLTreeMap and RedBlackTreeMap; O(h)
+        for SplayTreeMap, plus the amortised O(log n) removal of the
+        minimum of right
+        """
+        # check everything before either map is touched
+        if not isinstance(left, cls) or type(left) is not type(right):
+            raise TypeError("can only join two maps of type " + cls.__name__)
+        if left._options() != right._options():
+            raise ValueError("can only join maps created with the same options")
+        if not (left.is_empty() or right.is_empty()):
+            lowest = right._node_first(right._root)
+            highest = left._node_last(left._root)
+            if not highest._element._key < lowest._element._key:
+                raise ValueError("keys of left must be less than keys of right")
+        t = cls(**left._options())
+        if left.is_empty() or right.is_empty():
+            root = left._root if right.is_empty() else right._root
+        else:
+            # the minimum of right becomes the node linking both trees
+            right.delete(right._make_position(lowest))
+            root = t._join_nodes(left._root, t._Node(lowest._element), right._root)
+        t._adopt(root)
+        left._adopt(None)
+        right._adopt(None)
+        return t
+
     # balanced tree subclassed
     def _rebalance_access(self, p):
         pass
@@ -141,69 +583,113 @@ class TreeMap(LinkedBinaryTree, MapBase):
         Return None if p is the first position.
         """
         # inheried from LinkedBinaryTree
-        self._validate(p)
-        if self.left(p):
-            return self._subtree_last_position(self.left(p))
-        else:
-            # walk upward
-            walk = p
-            above = self.parent(walk)
-            while above is not None and walk == self.left(above):
-                walk = above
-                above = self.parent(walk)
-            return above
+        node = self._validate(p)
+        return self._make_position(self._node_before(node))
 
     def after(self, p):
         """Return the Position just after p in the natural order.
         Return None if p is the last position"""
-        self._validate(p)
-        if self.right(p):
-            return self._subtree_first_position(self.right(p))
-        else:
-            # walk upward
-            walk = p
-            above = self.parent(walk)
-            while above is not None and walk == self.right(above):
-                walk = above
-                above = self.parent(walk)
-            return above
+        node = self._validate(p)
+        return self._make_position(self._node_after(node))
+
+    def cursor(self, start=None):
+        """Return a Cursor on the map, standing before the first item, or
+        on the least key greater than or equal to start if given"""
+        c = self.Cursor(self)
+        if start is not None:
+            c.seek(start)
+        return c
 
     def find_position(self, k):
         """Return position with key k, or else neighbor(or None if empty)"""
         if self.is_empty():
             return None
         else:
-            p = self._subtree_search(self.root(), k)
+            p = self._make_position(self._node_search(self._root, k))
             # hook for balance tree subclasses
             self._rebalance_access(p)
             return p
 
+    def _node_ge(self, k, strict=False):
+        """Return node with least key greater than(strict) or equal to k,
+        or None, in a single descent"""
+        node, best, last = self._root, None, None
+        while node is not None:
+            last = node
+            key = node._element._key
+            if k < key:
+                best = node
+                node = node._left
+            elif k == key and not strict:
+                best = node
+                break
+            else:
+                node = node._right
+        if last is not None:
+            # hook for balance tree subclasses
+            self._rebalance_access(self._make_position(last))
+        return best
+
+    def _node_le(self, k, strict=False):
+        """Return node with greatest key less than(strict) or equal to k,
+        or None, in a single descent"""
+        node, best, last = self._root, None, None
+        while node is not None:
+            last = node
+            key = node._element._key
+            if key < k:
+                best = node
+                node = node._right
+            elif k == key and not strict:
+                best = node
+                break
+            else:
+                node = node._left
+        if last is not None:
+            self._rebalance_access(self._make_position(last))
+        return best
+
+    def _pair(self, node):
+        """Return (key, value) pair of node(or None)"""
+        if node is None:
+            return None
+        return (node._element._key, node._element._value)
+
     def find_min(self):
         """Return (key, value) pair with minimum key(or None if empty)"""
         if self.is_empty():
             return None
-        p = self.first()
-        # Note here we use `isinstance` to ensure p
-        # is a position instance only which has key() and value()
-        if isinstance(p, TreeMap.Position):
-            return (p.key(), p.value())
+        return self._pair(self._node_first(self._root))
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        if self.is_empty():
+            return None
+        return self._pair(self._node_last(self._root))
 
     def find_ge(self, k):
         """Return (key, value) pair with least key greater than
         or equal to k. Return None if there does not exist such a key.
         """
-        if self.is_empty():
-            return None
-        else:
-            # may not find exact match
-            p = self.find_position(k)
-            # p's key is too small
-            if isinstance(p, TreeMap.Position) and p.key() < k:
-                p = self.after(p)
-            if isinstance(p, TreeMap.Position):
-                return (p.key(), p.value())
-            else:
-                return None
+        return self._pair(self._node_ge(k))
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than k.
+        Return None if there does not exist such a key.
+        """
+        return self._pair(self._node_ge(k, strict=True))
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than
+        or equal to k. Return None if there does not exist such a key.
+        """
+        return self._pair(self._node_le(k))
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than k.
+        Return None if there does not exist such a key.
+        """
+        return self._pair(self._node_le(k, strict=True))
 
     def find_range(self, start, stop):
         """Iterate all (key, value) pairs such that
@@ -215,60 +701,189 @@ class TreeMap(LinkedBinaryTree, MapBase):
 
         if not self.is_empty():
             if start is None:
-                p = self.first()
+                node = self._node_first(self._root)
+            else:
+                node = self._node_ge(start)
+            while node is not None:
+                item = node._element
+                if stop is not None and not item._key < stop:
+                    return
+                yield (item._key, item._value)
+                node = self._node_after(node)
+
+    def find_range_reversed(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop,
+        from the greatest key down.
+        None for start or stop leaves that side unbounded.
+        """
+        if not self.is_empty():
+            if stop is None:
+                node = self._node_last(self._root)
             else:
-                # we initialize p with logic similar to find_ge
-                p = self.find_position(start)
-                if isinstance(p, TreeMap.Position) and p.key() < start:
-                    p = self.after(p)
-            while isinstance(p, TreeMap.Position) and (stop is None or p.key() < stop):
-                yield (p.key(), p.value())
-                p = self.after(p)
+                node = self._node_le(stop, strict=True)
+            while node is not None:
+                item = node._element
+                if start is not None and item._key < start:
+                    return
+                yield (item._key, item._value)
+                node = self._node_before(node)
+
+    def rank(self, k):
+        """Return the number of keys strictly less than k
+
+        Time complexity: O(h)
+        """
+        r = 0
+        node = self._root
+        while node is not None:
+            if node._element._key < k:
+                r += 1 + (node._left._count if node._left is not None else 0)
+                node = node._right
+            else:
+                node = node._left
+        return r
+
+    def select(self, i):
+        """Return (key, value) pair with the i-th smallest key(0-based)
+
+        Negative i counts from the maximum; raise IndexError if out of range.
+        Time complexity: O(h)
+        """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("index out of range")
+        node = self._root
+        while True:
+            left = node._left._count if node._left is not None else 0
+            if i < left:
+                node = node._left
+            elif i == left:
+                return (node._element._key, node._element._value)
+            else:
+                i -= left + 1
+                node = node._right
+
+    def count_range(self, start, stop):
+        """Return the number of keys such that start <= key < stop.
+
+        None for start or stop leaves that side unbounded.
+        Time complexity: O(h)
+        """
+        low = 0 if start is None else self.rank(start)
+        high = len(self) if stop is None else self.rank(stop)
+        return max(0, high - low)
+
+    def aggregate_range(self, start, stop):
+        """Return the aggregate of the values of keys start <= key < stop.
+
+        None for start or stop leaves that side unbounded; an empty range
+        gives the identity. Raise ValueError if the map was created
+        without an aggregate.
+        Time complexity: O(h)
+        """
+        if self._monoid is None:
+            raise ValueError("map was created without an aggregate")
+        combine, identity = self._monoid
+        # descend to the highest node inside the range
+        node = self._root
+        while node is not None:
+            key = node._element._key
+            if start is not None and key < start:
+                node = node._right
+            elif stop is not None and not key < stop:
+                node = node._left
+            else:
+                break
+        if node is None:
+            return identity
+        # keys >= start in the left subtree, collected from the top down,
+        # so each part found lies before the ones already collected
+        below = identity
+        walk = node._left
+        while walk is not None:
+            if start is not None and walk._element._key < start:
+                walk = walk._right
+                continue
+            part = walk._element._value
+            if walk._right is not None:
+                part = combine(part, walk._right._agg)
+            below = combine(part, below)
+            if start is None:
+                if walk._left is not None:
+                    below = combine(walk._left._agg, below)
+                break
+            walk = walk._left
+        # keys < stop in the right subtree, each part after the previous
+        above = identity
+        walk = node._right
+        while walk is not None:
+            if stop is not None and not walk._element._key < stop:
+                walk = walk._left
+                continue
+            part = walk._element._value
+            if walk._left is not None:
+                part = combine(walk._left._agg, part)
+            above = combine(above, part)
+            if stop is None:
+                if walk._right is not None:
+                    above = combine(above, walk._right._agg)
+                break
+            walk = walk._right
+        return combine(combine(below, node._element._value), above)
 
     def __getitem__(self, k):
         """Return value associated with key k
         (raise KeyError if not found)"""
         if self.is_empty():
             raise KeyError("Key Error: " + repr(k))
-        else:
-            p = self._subtree_search(self.root(), k)
-            self._rebalance_access(p)
-            if isinstance(p, TreeMap.Position):
-                if k != p.key():
-                    raise KeyError("Key Error: " + repr(k))
-                return p.value()
+        node = self._node_search(self._root, k)
+        self._rebalance_access(self._make_position(node))
+        if k != node._element._key:
+            raise KeyError("Key Error: " + repr(k))
+        return node._element._value
 
     def __setitem__(self, k, v):
         """Assign value v to key k, overwriting exsiting value
         if present"""
-        leaf = None
         if self.is_empty():
             # from LinkedBinaryTree
             leaf = self._add_root(self._Item(k, v))
         else:
-            p = self._subtree_search(self.root(), k)
-            if isinstance(p, TreeMap.Position):
-                if p.key() == k:
-                    # replace existing item's value
-                    p.element()._value = v
-                    self._rebalance_access(p)
-                    return
-                else:
-                    item = self._Item(k, v)
-                    if p.key() < k:
-                        # inherited from LinkedBinaryTree
-                        leaf = self._add_right(p, item)
-                    else:
-                        leaf = self._add_left(p, item)
-        if leaf:
-            self._rebalance_insert(leaf)
+            node = self._node_search(self._root, k)
+            p = self._make_position(node)
+            if node._element._key == k:
+                # replace existing item's value
+                node._element._value = v
+                if self._monoid is not None:
+                    self._augment_path(node)
+                self._rebalance_access(p)
+                return
+            item = self._Item(k, v)
+            if node._element._key < k:
+                # inherited from LinkedBinaryTree
+                leaf = self._add_right(p, item)
+            else:
+                leaf = self._add_left(p, item)
+        self._rebalance_insert(leaf)
 
     def __iter__(self):
         """Generate an iteration of all keys in the map in order"""
-        p = self.first()
-        while isinstance(p, TreeMap.Position) and p is not None:
-            yield p.key()
-            p = self.after(p)
+        if self.is_empty():
+            return
+        node = self._node_first(self._root)
+        while node is not None:
+            yield node._element._key
+            node = self._node_after(node)
+
+    def __reversed__(self):
+        """Generate an iteration of all keys in the map in reverse order"""
+        if self.is_empty():
+            return
+        node = self._node_last(self._root)
+        while node is not None:
+            yield node._element._key
+            node = self._node_before(node)
 
     def __len__(self):
         """Return the total number of elements in the tree
@@ -293,8 +908,8 @@ class TreeMap(LinkedBinaryTree, MapBase):
         """remove item associated with key k
         (raise KeyError if not found)"""
         if not self.is_empty():
-            p = self._subtree_search(self.root(), k)
-            if isinstance(p, TreeMap.Position) and k == p.key():
+            p = self._make_position(self._node_search(self._root, k))
+            if k == p._node._element._key:
                 self.delete(p)
                 return
             self._rebalance_access(p)
@@ -369,6 +984,37 @@ class AVLTreeMap(TreeMap):
             else:
                 p = self.parent(p)  # repeat with parent
 
+    def _bulk_balance(self, node, depth, height):
+        node._height = 1 + max(node.left_height(), node.right_height())
+
+    def _join_nodes(self, left, mid, right):
+        hl = left._height if left is not None else 0
+        hr = right._height if right is not None else 0
+        if abs(hl - hr) <= 1:
+            mid._height = 1 + max(hl, hr)
+            return super()._join_nodes(left, mid, right)
+        # as for a new leaf, so that _rebalance sees mid's height change
+        mid._height = 0
+        # hang mid and the shorter tree off the facing spine of the taller
+        # tree, at the first subtree no more than one level taller
+        taller, outer = (left, hr) if hl > hr else (right, hl)
+        parent, child = None, taller
+        while child is not None and child._height > outer + 1:
+            parent = child
+            child = child._right if hl > hr else child._left
+        if hl > hr:
+            self._relink(mid, child, True)
+            self._relink(mid, right, False)
+        else:
+            self._relink(mid, left, True)
+            self._relink(mid, child, False)
+        self._relink(parent, mid, hl < hr)
+        self._root = taller
+        self._augment_path(mid)
+        # heights above mid may grow by one, as after an insertion
+        self._rebalance(self._make_position(mid))
+        return self._root
+
     # override balancing hooks
     def _rebalance_insert(self, p):
         self._rebalance(p)
@@ -378,34 +1024,202 @@ class AVLTreeMap(TreeMap):
 
 
 class SplayTreeMap(TreeMap):
-    """Sorted map implementation using a splay tree"""
+    """Sorted map implementation using a splay tree.
+
+    Splaying is top-down: one pass from the root both searches for a key
+    and brings it (or its last neighbour on the search path) to the root,
+    relinking nodes directly.
+
+    splay_rate is the fraction of read accesses (lookups, searches and
+    updates of existing keys) that splay; the others search without
+    restructuring. Inserts and deletions always splay.
+    """
+
+    def __init__(self, splay_rate=1.0, aggregate=None):
+        """Create an empty map splaying on splay_rate of read accesses"""
+        if not 0 < splay_rate <= 1:
+            raise ValueError("splay_rate must be in (0, 1]")
+        super().__init__(aggregate)
+        self._splay_rate = splay_rate
+        # accumulates splay_rate per read; a read splays when it reaches 1
+        self._credit = 0.0
+
+    def _options(self):
+        options = super()._options()
+        options["splay_rate"] = self._splay_rate
+        return options
 
     # splay operation
-    def _splay(self, p):
-        while p != self.root():
-            parent = self.parent(p)
-            grand = self.parent(parent)
-            if grand is None:
-                # zig case
-                self._rotate(p)
-            elif (parent == self.left(grand)) == (p == self.left(parent)):
-                # zig-zig case
-                self._rotate(parent)  # move PARENT up
-                self._rotate(p)  # then move p up
+    def _splay_subtree(self, t, k):
+        """Splay the node with key k, or the last node on its search path,
+        to the top of the detached subtree rooted at t; return it"""
+        self._changes += 1
+        # nodes hung on the left tree (all keys < k) and the right tree
+        # (all keys > k), in the order they were linked
+        left_nodes, right_nodes = [], []
+        while True:
+            key = t._element._key
+            if k < key:
+                child = t._left
+                if child is None:
+                    break
+                if k < child._element._key:
+                    # zig-zig: rotate child above t
+                    t._left = child._right
+                    if child._right is not None:
+                        child._right._parent = t
+                    child._right = t
+                    t._parent = child
+                    self._augment(t)
+                    t = child
+                    if t._left is None:
+                        break
+                # link t as the new minimum of the right tree
+                if right_nodes:
+                    right_nodes[-1]._left = t
+                    t._parent = right_nodes[-1]
+                right_nodes.append(t)
+                t = t._left
+            elif key < k:
+                child = t._right
+                if child is None:
+                    break
+                if child._element._key < k:
+                    # zag-zag: rotate child above t
+                    t._right = child._left
+                    if child._left is not None:
+                        child._left._parent = t
+                    child._left = t
+                    t._parent = child
+                    self._augment(t)
+                    t = child
+                    if t._right is None:
+                        break
+                # link t as the new maximum of the left tree
+                if left_nodes:
+                    left_nodes[-1]._right = t
+                    t._parent = left_nodes[-1]
+                left_nodes.append(t)
+                t = t._right
             else:
-                # zig-zag case
-                self._rotate(p)  # move p up
-                self._rotate(p)  # move p up again
+                break
+        # reassemble: t's subtrees go to the inner ends of both trees
+        if left_nodes:
+            self._relink(left_nodes[-1], t._left, False)
+            self._relink(t, left_nodes[0], True)
+        if right_nodes:
+            self._relink(right_nodes[-1], t._right, True)
+            self._relink(t, right_nodes[0], False)
+        t._parent = None
+        # deepest linked nodes first, so children are up to date
+        for node in reversed(left_nodes):
+            self._augment(node)
+        for node in reversed(right_nodes):
+            self._augment(node)
+        self._augment(t)
+        return t
+
+    def _splay_key(self, k):
+        """Splay key k(or its neighbour) to the root and return the root"""
+        self._root = self._splay_subtree(self._root, k)
+        return self._root
+
+    def _splay(self, p):
+        """Splay the node at Position p to the root"""
+        self._splay_key(p._node._element._key)
+
+    def _sample(self):
+        """Return whether the current read access should splay"""
+        self._credit += self._splay_rate
+        if self._credit >= 1:
+            self._credit -= 1
+            return True
+        return False
 
     # override balancing hooks
     def _rebalance_insert(self, p):
         self._splay(p)
 
     def _rebalance_delete(self, p):
-        self._splay(p)
+        # p is None when the root itself was removed
+        if p is not None:
+            self._splay(p)
 
     def _rebalance_access(self, p):
-        self._splay(p)
+        if self._sample():
+            self._splay(p)
+
+    # search, insert and delete in one top-down pass
+    def __getitem__(self, k):
+        """Return value associated with key k
+        (raise KeyError if not found)"""
+        if self.is_empty():
+            raise KeyError("Key Error: " + repr(k))
+        if self._sample():
+            node = self._splay_key(k)
+        else:
+            node = self._node_search(self._root, k)
+        if k != node._element._key:
+            raise KeyError("Key Error: " + repr(k))
+        return node._element._value
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting exsiting value
+        if present"""
+        if self.is_empty():
+            self._add_root(self._Item(k, v))
+            return
+        if not self._sample():
+            node = self._node_search(self._root, k)
+            if node._element._key == k:
+                node._element._value = v
+                if self._monoid is not None:
+                    self._augment_path(node)
+                return
+        root = self._splay_key(k)
+        if root._element._key == k:
+            root._element._value = v
+            self._augment(root)
+            return
+        # the new node becomes the root, splitting the old one's subtrees
+        node = self._Node(self._Item(k, v))
+        if k < root._element._key:
+            self._relink(node, root._left, True)
+            root._left = None
+            self._relink(node, root, False)
+        else:
+            self._relink(node, root._right, False)
+            root._right = None
+            self._relink(node, root, True)
+        self._augment(root)
+        self._augment(node)
+        self._root = node
+        self._size += 1
+
+    def __delitem__(self, k):
+        """remove item associated with key k
+        (raise KeyError if not found)"""
+        if self.is_empty():
+            raise KeyError("Key Error: " + repr(k))
+        root = self._splay_key(k)
+        if root._element._key != k:
+            raise KeyError("Key Error: " + repr(k))
+        left, right = root._left, root._right
+        for child in (left, right):
+            if child is not None:
+                child._parent = None
+        if left is None:
+            self._root = right
+        else:
+            # every key of left is below k: its maximum comes to the top
+            # with no right child
+            top = self._splay_subtree(left, k)
+            self._relink(top, right, False)
+            self._augment(top)
+            self._root = top
+        self._size -= 1
+        root._left = root._right = None
+        root._parent = root  # convention for deprecated node
 
 
 class RedBlackTreeMap(TreeMap):
@@ -448,16 +1262,91 @@ class RedBlackTreeMap(TreeMap):
         for child in (self.left(p), self.right(p)):
             if self._is_red(child):
                 return child
-            return None
+        return None
+
+    def _black_height(self, node):
+        """Return number of black nodes on any path down from node"""
+        height = 0
+        while node is not None:
+            height += not node._red
+            node = node._left
+        return height
+
+    def _join_nodes(self, left, mid, right):
+        bl, br = self._black_height(left), self._black_height(right)
+        return self._join_black(left, bl, mid, right, br)[0]
+
+    def _join_black(self, left, bl, mid, right, br):
+        """Join as _join_nodes, given the black heights bl and br of left
+        and right; return (new root node, its black height)"""
+        # a red root may simply turn black, adding a black node to its paths
+        if left is not None and left._red:
+            left._red = False
+            bl += 1
+        if right is not None and right._red:
+            right._red = False
+            br += 1
+        if bl == br:
+            mid._red = False
+            return super()._join_nodes(left, mid, right), bl + 1
+        # hang red mid and the shorter tree off the facing spine of the
+        # taller tree, above the first black subtree of equal black height
+        taller, outer = (left, br) if bl > br else (right, bl)
+        parent, child, height = None, taller, max(bl, br)
+        while height > outer or (child is not None and child._red):
+            height -= not child._red
+            parent = child
+            child = child._right if bl > br else child._left
+        mid._red = True
+        if bl > br:
+            self._relink(mid, child, True)
+            self._relink(mid, right, False)
+        else:
+            self._relink(mid, left, True)
+            self._relink(mid, child, False)
+        self._relink(parent, mid, bl < br)
+        self._root = taller
+        self._augment_path(mid)
+        # a red parent makes a double red, fixed as after an insertion
+        grown = self._resolve_red(self._make_position(mid))
+        return self._root, max(bl, br) + grown
+
+    def _split_node(self, node, k):
+        # black heights follow down the path from the root's, and each
+        # join returns its own, so no join measures a spine
+        height = self._black_height(node)
+        path = self._cut_path(node, k)
+        heights = []
+        for node, _, _ in path:
+            # black height of node's children
+            height -= not node._red
+            heights.append(height)
+        low = high = None
+        hl = hh = 0
+        for (node, subtree, below), h in zip(reversed(path), reversed(heights)):
+            if below:
+                low, hl = self._join_black(subtree, h, node, low, hl)
+            else:
+                high, hh = self._join_black(high, hh, node, subtree, h)
+        return low, high
+
+    def _bulk_balance(self, node, depth, height):
+        # a balanced build leaves every empty child link at depth height or
+        # height + 1, so the black height is even once the deepest level is
+        # red; a one-node tree's root stays black
+        node._red = depth == height and depth > 0
 
     # support for insertion
     def _rebalance_insert(self, p):
         self._resolve_red(p)  # new node is always red
 
     def _resolve_red(self, p):
-        """Solve red confliction cased when insertion"""
+        """Solve red confliction cased when insertion; return True if the
+        black height of the tree grew"""
         if self.is_root(p):
+            grown = self._is_red(p)
             self._set_black(p)
+            return grown
         else:
             parent = self.parent(p)
             # double red problem
@@ -477,7 +1366,8 @@ class RedBlackTreeMap(TreeMap):
                     self._set_black(self.left(grand))
                     self._set_black(self.right(grand))
                     # recur at red grandparent
-                    self._resolve_red(grand)
+                    return self._resolve_red(grand)
+        return False
 
     # support for deletions
     def _rebalance_delete(self, p):
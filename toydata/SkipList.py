@@ -0,0 +1,190 @@
+from contextlib import nullcontext
+from random import Random
+from threading import Lock
+
+from toydata.Maps import MapBase
+
+
+class SkipListMap(MapBase):
+    """Sorted map implementation using a probabilistic skip list.
+
+    Every node holds an array of forward pointers, one per level it takes
+    part in; a node reaches level i + 1 with probability p once it is on
+    level i. Searches descend from the top level of the head sentinel,
+    while iteration and range scans only walk the bottom level.
+
+    With concurrent=True writers serialize on one lock and readers never
+    take it. Inserts link a new node bottom-up and deletes unlink it
+    top-down, each by single pointer stores, and a removed node keeps its
+    forward pointers, so a reader always sees a well-formed list at every
+    level and a scan standing on a removed node carries on past it.
+
+    Time complexity (expected):
+    find_range: O(s + log n)
+    iter: O(n)
+    others: O(log n)
+    """
+
+    class _Node:
+        """Node with its key, value and forward pointers"""
+
+        __slots__ = "_key", "_value", "_next"
+
+        def __init__(self, k, v, level):
+            self._key = k
+            self._value = v
+            self._next = level * [None]
+
+    def __init__(self, p=0.5, max_level=32, concurrent=False, seed=None):
+        """Create an empty map.
+
+        p is the probability of promoting a node one level up and
+        max_level caps the number of levels. If concurrent is True, updates
+        may run in several threads alongside any number of lock-free
+        readers.
+        """
+        if not 0 < p < 1:
+            raise ValueError("p must be between 0 and 1")
+        self._p = p
+        self._max_level = max_level
+        self._head = self._Node(None, None, max_level)
+        # number of levels in use
+        self._level = 1
+        self._size = 0
+        self._random = Random(seed).random
+        self._lock = Lock() if concurrent else nullcontext()
+
+    # nonpublic behaviors
+    def _random_level(self):
+        """Return a level drawn from the geometric distribution of p"""
+        level = 1
+        while level < self._max_level and self._random() < self._p:
+            level += 1
+        return level
+
+    def _lower(self, k, strict=True):
+        """Return the last node with key less than (or equal to, unless
+        strict) k; the head if there is none"""
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            nxt = node._next[i]
+            while nxt is not None and (nxt._key < k or (not strict and nxt._key == k)):
+                node = nxt
+                nxt = node._next[i]
+        return node
+
+    def _predecessors(self, k):
+        """Return list whose i-th entry is the last node before key k on
+        level i"""
+        update = self._level * [None]
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            nxt = node._next[i]
+            while nxt is not None and nxt._key < k:
+                node = nxt
+                nxt = node._next[i]
+            update[i] = node
+        return update
+
+    def _pair(self, node):
+        """Return (key, value) pair of node, or None for no node"""
+        if node is None or node is self._head:
+            return None
+        return (node._key, node._value)
+
+    # public behaviors
+    def __len__(self):
+        """Return number of items in the map"""
+        return self._size
+
+    def __getitem__(self, k):
+        """Return value associated with key k
+        (raise KeyError if not found)"""
+        node = self._lower(k)._next[0]
+        if node is None or node._key != k:
+            raise KeyError("Key Error: " + repr(k))
+        return node._value
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present"""
+        with self._lock:
+            update = self._predecessors(k)
+            node = update[0]._next[0]
+            if node is not None and node._key == k:
+                node._value = v
+                return
+            level = self._random_level()
+            update += (level - self._level) * [self._head]
+            new = self._Node(k, v, level)
+            # link bottom-up, so every level a reader sees is complete
+            for i in range(level):
+                new._next[i] = update[i]._next[i]
+                update[i]._next[i] = new
+            if level > self._level:
+                self._level = level
+            self._size += 1
+
+    def __delitem__(self, k):
+        """Remove item associated with key k
+        (raise KeyError if not found)"""
+        with self._lock:
+            update = self._predecessors(k)
+            node = update[0]._next[0]
+            if node is None or node._key != k:
+                raise KeyError("Key Error: " + repr(k))
+            # unlink top-down; node keeps its pointers for readers on it
+            for i in range(len(node._next) - 1, -1, -1):
+                update[i]._next[i] = node._next[i]
+            while self._level > 1 and self._head._next[self._level - 1] is None:
+                self._level -= 1
+            self._size -= 1
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum"""
+        node = self._head._next[0]
+        while node is not None:
+            yield node._key
+            node = node._next[0]
+
+    def find_min(self):
+        """Return (key, value) pair with minimum key(or None if empty)"""
+        return self._pair(self._head._next[0])
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key(or None if empty)"""
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node._next[i] is not None:
+                node = node._next[i]
+        return self._pair(node)
+
+    def find_ge(self, k):
+        """Return (key, value) pair with least key greater than or
+        equal to k"""
+        return self._pair(self._lower(k)._next[0])
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than k"""
+        return self._pair(self._lower(k, strict=False)._next[0])
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than or
+        equal to k"""
+        return self._pair(self._lower(k, strict=False))
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than k"""
+        return self._pair(self._lower(k))
+
+    def find_range(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop.
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        if start is None:
+            node = self._head._next[0]
+        else:
+            node = self._lower(start)._next[0]
+        while node is not None and (stop is None or node._key < stop):
+            yield (node._key, node._value)
+            node = node._next[0]
@@ -1,9 +1,22 @@
+from .ArraySearchTree import ArrayAVLTreeMap, ArrayRedBlackTreeMap
+from .BTree import BPlusTreeMap
+from .CacheMaps import LFUCacheMap, LRUCacheMap, TTLCacheMap
 from .Graph import Graph
+from .IntervalTree import IntervalTreeMap
 from .LinkedLists import Doublellist, Singlellist
-from .Maps import ChainHashMap, ProbeHashMap, SortedTableMap
+from .Maps import (
+    BlockedSortedTableMap,
+    ChainHashMap,
+    ConcurrentHashMap,
+    CuckooHashMap,
+    ProbeHashMap,
+    SortedTableMap,
+)
+from .PersistentTree import PersistentAVLTreeMap
 from .PositionalList import PositionalList
 from .Queue import ArrayDeque, ArrayQueue, LinkedDeque, LinkedQueue
 from .SearchTree import AVLTreeMap, RedBlackTreeMap, SplayTreeMap
+from .SkipList import SkipListMap
 from .Stack import ArrayStack, LinkedStack
 from .Tree import LinkedBinaryTree
 
@@ -15,7 +28,13 @@ __all__ = [
     "Singlellist",
     "ChainHashMap",
     "ProbeHashMap",
+    "CuckooHashMap",
+    "ConcurrentHashMap",
     "SortedTableMap",
+    "BlockedSortedTableMap",
+    "LRUCacheMap",
+    "LFUCacheMap",
+    "TTLCacheMap",
     "PositionalList",
     "ArrayDeque",
     "ArrayQueue",
@@ -24,6 +43,12 @@ __all__ = [
     "AVLTreeMap",
     "RedBlackTreeMap",
     "SplayTreeMap",
+    "ArrayAVLTreeMap",
+    "ArrayRedBlackTreeMap",
+    "BPlusTreeMap",
+    "IntervalTreeMap",
+    "PersistentAVLTreeMap",
+    "SkipListMap",
     "LinkedStack",
     "ArrayStack",
     "LinkedBinaryTree",